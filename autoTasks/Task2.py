@@ -2,26 +2,40 @@ import warnings
 
 import numpy as np
 import pandas as pd
+from scipy.cluster.hierarchy import linkage
 from sklearn.cluster import KMeans
 from sklearn.metrics import silhouette_score
 from sklearn.preprocessing import StandardScaler
 
+from autoTasks.consensus_2 import ConsensusClustering
+from autoTasks.rules_2 import DEFAULT_RULES_PATH, ClusterRuleEngine
+
 warnings.filterwarnings('ignore')
 
 
+FEATURE_COLUMNS = ['delivery_rate', 'price', 'quality']
+
+
 class ClusteringSolver:
-    def __init__(self):
-        self.scaler = StandardScaler()
+    def __init__(self, rules_path=DEFAULT_RULES_PATH):
+        # copy=False: масштабирование выполняется на месте, без копии матрицы признаков
+        self.scaler = StandardScaler(copy=False)
+        self.rule_engine = ClusterRuleEngine.from_config(rules_path)
         self.model = None
         self.features = None
+        self.supplier_names = None
+        self.seed_centers = None
+        self.max_impurity = None
+        self.labels = None
 
-    def prepare_data(self, df):
+    def prepare_data(self, df, max_impurity=None):
         """
         Подготовка данных для кластеризации с русскими названиями колонок
-        """
-        # Создаем копию данных
-        data = df.copy()
 
+        Возвращает одну непрерывную матрицу float32 с колонками FEATURE_COLUMNS.
+        max_impurity - нормировка качества; по умолчанию берется максимум по данным
+        и запоминается для последующего преобразования новых поставщиков.
+        """
         # Проверяем наличие обязательных колонок
         required_columns = [
             'Название поставщика',
@@ -30,30 +44,61 @@ class ClusteringSolver:
             'Содержание примесей (%)'
         ]
 
-        missing_columns = [col for col in required_columns if col not in data.columns]
+        missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
             raise ValueError(f"Отсутствуют обязательные колонки: {missing_columns}")
 
-        # Подготавливаем признаки
-        features_data = {}
+        features = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float32)
 
         # 1. Коэффициент выполнения заказов (нормализуем к 0-1)
-        features_data['delivery_rate'] = data['Коэффициент выполнения поставок в срок (%)'] / 100.0
+        np.divide(df['Коэффициент выполнения поставок в срок (%)'].to_numpy(), 100.0,
+                  out=features[:, 0], casting='unsafe')
 
         # 2. Стоимость песка
-        features_data['price'] = data['Стоимость 1 тонны песка (руб)']
+        features[:, 1] = df['Стоимость 1 тонны песка (руб)'].to_numpy()
 
         # 3. Качество песка (инвертируем - чем меньше примесей, тем лучше)
-        max_impurity = data['Содержание примесей (%)'].max()
-        features_data['quality'] = 1 - (data['Содержание примесей (%)'] / max_impurity)
+        impurity = df['Содержание примесей (%)'].to_numpy()
+        if max_impurity is None:
+            max_impurity = impurity.max()
+            self.max_impurity = max_impurity
+        np.divide(impurity, max_impurity, out=features[:, 2], casting='unsafe')
+        np.subtract(1, features[:, 2], out=features[:, 2])
+
+        return features
+
+    def feature_columns(self, df):
+        """
+        Признаки в float64 по исходным колонкам: {колонка FEATURE_COLUMNS: одномерный массив}
 
-        # Сохраняем названия поставщиков
-        features_data['supplier_name'] = data['Название поставщика']
+        Матрица prepare_data хранится в float32 для K-means; статистики и таблица результатов
+        строятся по этим значениям, чтобы округленные результаты не зависели от точности float32.
+        Цена берется из таблицы без копирования, временные массивы нужны только производным признакам.
+        """
+        return {
+            'delivery_rate': df['Коэффициент выполнения поставок в срок (%)'].to_numpy(dtype=np.float64) / 100.0,
+            'price': df['Стоимость 1 тонны песка (руб)'].to_numpy(dtype=np.float64),
+            'quality': 1 - df['Содержание примесей (%)'].to_numpy(dtype=np.float64) / self.max_impurity
+        }
+
+    def transform_features(self, df):
+        """
+        Масштабирование признаков новых поставщиков обученными нормировкой и scaler
+
+        Возвращает масштабированную матрицу признаков и названия поставщиков.
+        """
+        if self.model is None:
+            raise ValueError("Сначала необходимо выполнить кластеризацию")
 
-        # Собираем все признаки в один DataFrame
-        self.features = pd.DataFrame(features_data)
+        features = self.prepare_data(df, max_impurity=self.max_impurity)
+        scaled = self.scaler.transform(features, copy=False)
+        return scaled, df['Название поставщика'].to_numpy()
 
-        return self.features
+    def scaled_features(self):
+        """
+        Масштабированная копия матрицы признаков последней кластеризации
+        """
+        return self.scaler.transform(self.features, copy=True)
 
     def find_optimal_clusters(self, data, max_k=8):
         """
@@ -73,7 +118,113 @@ class ClusteringSolver:
             else:
                 silhouette_scores.append(0)
 
-        # Находим оптимальное k (простой метод локтя)
+        optimal_k = self._elbow_k(wcss)
+
+        return optimal_k, wcss, silhouette_scores
+
+    def find_optimal_clusters_hierarchical(self, data, max_k=8, method='ward',
+                                           refine=True, sample_size=2000):
+        """
+        Поиск оптимального количества кластеров по одному дереву иерархической кластеризации
+
+        Дерево строится один раз, после чего разрезается на k = 2..max_k кластеров.
+        Для метода Уорда WCSS берется прямо из высот слияний (прирост WCSS = d² / 2).
+        Если refine=True, центры выбранного разреза сохраняются в self.seed_centers
+        и используются как начальные центры K-means в perform_clustering.
+        """
+        if method not in ('ward', 'centroid'):
+            raise ValueError(f"Неподдерживаемый метод связи: {method}")
+
+        data = np.asarray(data, dtype=np.float64)
+        n = len(data)
+        max_k = min(max_k, n - 1)
+        if max_k < 2:
+            raise ValueError("Недостаточно поставщиков для кластеризации")
+
+        Z = linkage(data, method=method)
+        labels_by_k = self._cut_linkage(Z, range(2, max_k + 1))
+
+        if method == 'ward':
+            # WCSS после i слияний = сумма приростов d² / 2 по первым i слияниям
+            merged_wcss = np.concatenate(([0.0], np.cumsum(Z[:, 2] ** 2 / 2.0)))
+
+        wcss = []
+        silhouette_scores = []
+        for k in range(2, max_k + 1):
+            labels = labels_by_k[k]
+            if method == 'ward':
+                wcss.append(float(merged_wcss[n - k]))
+            else:
+                wcss.append(self._wcss(data, labels, k))
+
+            if len(np.unique(labels)) > 1:
+                score = silhouette_score(data, labels, sample_size=min(n, sample_size), random_state=42)
+                silhouette_scores.append(score)
+            else:
+                silhouette_scores.append(0)
+
+        # По умолчанию локоть дает k = 3, но разрезы есть только для k <= max_k
+        optimal_k = min(self._elbow_k(wcss), max_k)
+
+        if refine:
+            labels = labels_by_k[optimal_k]
+            counts = np.bincount(labels, minlength=optimal_k)
+            sums = np.zeros((optimal_k, data.shape[1]))
+            np.add.at(sums, labels, data)
+            self.seed_centers = sums / counts[:, None]
+        else:
+            self.seed_centers = None
+
+        return optimal_k, wcss, silhouette_scores
+
+    @staticmethod
+    def _cut_linkage(Z, k_values):
+        """
+        Разрезы дерева слияний на заданное количество кластеров
+
+        Возвращает словарь {k: метки 0..k-1 для каждого наблюдения}.
+        """
+        n = len(Z) + 1
+        merge_nodes = np.arange(n, 2 * n - 1)
+
+        # parent[узел] - узел, в который он был слит; merge_step[узел] - номер этого слияния
+        parent = np.arange(2 * n - 1)
+        merge_step = np.full(2 * n - 1, n - 1)
+        children = Z[:, :2].astype(np.int64)
+        parent[children[:, 0]] = merge_nodes
+        parent[children[:, 1]] = merge_nodes
+        merge_step[children[:, 0]] = np.arange(n - 1)
+        merge_step[children[:, 1]] = np.arange(n - 1)
+
+        labels_by_k = {}
+        for k in k_values:
+            # Оставляем только первые n - k слияний и поднимаемся к корням удвоением указателей
+            roots = np.where(merge_step < n - k, parent, np.arange(2 * n - 1))
+            while True:
+                next_roots = roots[roots]
+                if np.array_equal(next_roots, roots):
+                    break
+                roots = next_roots
+            _, labels = np.unique(roots[:n], return_inverse=True)
+            labels_by_k[k] = labels
+
+        return labels_by_k
+
+    @staticmethod
+    def _wcss(data, labels, k):
+        """
+        Сумма квадратов внутрикластерных отклонений по меткам
+        """
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros((k, data.shape[1]))
+        np.add.at(sums, labels, data)
+        return float((data ** 2).sum() - ((sums ** 2).sum(axis=1) / counts).sum())
+
+    @staticmethod
+    def _elbow_k(wcss):
+        """
+        Выбор k простым методом локтя по списку WCSS для k = 2, 3, ...
+        """
         optimal_k = 3  # по умолчанию
         if len(wcss) > 2:
             # Ищем "локоть" - точку, где уменьшение WCSS замедляется
@@ -81,55 +232,97 @@ class ClusteringSolver:
             if reductions:
                 optimal_k = np.argmax(np.array(reductions) < np.mean(reductions)) + 2
 
-        return optimal_k, wcss, silhouette_scores
+        return optimal_k
 
-    def perform_clustering(self, df, n_clusters=None):
+    def perform_clustering(self, df, n_clusters=None, k_method='elbow', n_resamples=0):
         """
         Выполнение кластеризации
+
+        k_method: 'elbow' - перебор K-means для каждого k,
+                  'hierarchical' - один проход по дереву Уорда с уточнением K-means
+        n_resamples: количество подвыборок консенсусной кластеризации (0 - не выполнять);
+                     добавляет устойчивость поставщиков и надежность кластеров
         """
-        # Подготовка данных
+        # Подготовка данных: одна матрица float32, которая далее масштабируется на месте
         features = self.prepare_data(df)
+        self.features = features
+        self.supplier_names = df['Название поставщика'].to_numpy()
 
         # Масштабирование признаков
-        scaled_features = self.scaler.fit_transform(features[['delivery_rate', 'price', 'quality']])
+        scaled_features = self.scaler.fit_transform(features)
 
         # Определение оптимального количества кластеров
+        self.seed_centers = None
         if n_clusters is None:
-            n_clusters, wcss, silhouette_scores = self.find_optimal_clusters(scaled_features)
+            if k_method == 'hierarchical':
+                n_clusters, wcss, silhouette_scores = self.find_optimal_clusters_hierarchical(scaled_features)
+            elif k_method == 'elbow':
+                n_clusters, wcss, silhouette_scores = self.find_optimal_clusters(scaled_features)
+            else:
+                raise ValueError(f"Неизвестный метод выбора k: {k_method}")
         else:
             wcss, silhouette_scores = [], []
 
-        # Кластеризация K-means
-        self.model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        # Кластеризация K-means (при наличии - от центров иерархического разреза)
+        if self.seed_centers is not None:
+            self.model = KMeans(n_clusters=n_clusters, init=self.seed_centers, n_init=1, random_state=42)
+        else:
+            self.model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
         cluster_labels = self.model.fit_predict(scaled_features)
+        self.labels = cluster_labels
+
+        # Консенсусная оценка устойчивости назначений
+        if n_resamples > 0:
+            consensus = ConsensusClustering(n_resamples=n_resamples)
+            consensus.fit(scaled_features, cluster_labels, n_clusters)
+
+        # Возвращаем матрицу к исходным единицам на месте
+        self.scaler.inverse_transform(scaled_features, copy=False)
+
+        # Характеристики кластеров - в float64 по исходным колонкам
+        values = self.feature_columns(df)
+        cluster_stats = self.calculate_cluster_stats(values, cluster_labels)
+
+        # Тонкое представление для отображения: колонки исходной таблицы и признаков без копирования
+        columns = {column: df[column] for column in df.columns}
+        columns['cluster'] = cluster_labels
+        columns.update(values)
+        columns['supplier_type'] = self.interpret_suppliers(values)
 
-        # Добавляем метки кластеров к исходным данным
-        result_df = df.copy()
-        result_df['cluster'] = cluster_labels
-        result_df['delivery_rate'] = features['delivery_rate']
-        result_df['price'] = features['price']
-        result_df['quality'] = features['quality']
+        if n_resamples > 0:
+            columns['stability'] = consensus.stability.round(2)
+            cluster_stats['robustness'] = consensus.robustness[cluster_stats.index].round(2)
 
-        # Рассчитываем характеристики кластеров
-        cluster_stats = self.calculate_cluster_stats(result_df)
+        result_df = pd.DataFrame(columns, index=df.index, copy=False)
 
         return result_df, cluster_stats, (wcss, silhouette_scores)
 
-    def calculate_cluster_stats(self, df):
+    def calculate_cluster_stats(self, features, labels):
         """
-        Расчет статистики по кластерам
+        Расчет статистики по кластерам по признакам ({колонка: массив} или матрица) и меткам
         """
-        stats = df.groupby('cluster').agg({
-            'delivery_rate': ['mean', 'std'],
-            'price': ['mean', 'std'],
-            'quality': ['mean', 'std'],
-            'Название поставщика': 'count'
-        }).round(2)
+        k = labels.max() + 1
+        counts = np.bincount(labels, minlength=k).astype(np.float64)
+        present = counts > 0
 
-        stats.columns = ['delivery_rate_mean', 'delivery_rate_std',
-                         'price_mean', 'price_std',
-                         'quality_mean', 'quality_std',
-                         'suppliers_count']
+        stats_data = {}
+        for i, column in enumerate(FEATURE_COLUMNS):
+            values = np.asarray(features[column] if isinstance(features, dict) else features[:, i],
+                                dtype=np.float64)
+            sums = np.bincount(labels, weights=values, minlength=k)
+            means = sums / np.where(present, counts, 1)
+            # Выборочное стандартное отклонение (ddof=1) через суммы отклонений от среднего
+            squares = np.bincount(labels, weights=(values - means[labels]) ** 2, minlength=k)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                stds = np.sqrt(squares / (counts - 1))
+            stds[counts < 2] = np.nan
+
+            stats_data[f'{column}_mean'] = means[present]
+            stats_data[f'{column}_std'] = stds[present]
+
+        stats_data['suppliers_count'] = counts[present].astype(int)
+
+        stats = pd.DataFrame(stats_data, index=pd.Index(np.flatnonzero(present), name='cluster')).round(2)
 
         # Добавляем интерпретацию кластеров
         stats['cluster_type'] = self.interpret_clusters(stats)
@@ -140,28 +333,15 @@ class ClusteringSolver:
         """
         Интерпретация кластеров на основе характеристик
         """
-        interpretations = []
-
-        for idx, row in stats.iterrows():
-            delivery = row['delivery_rate_mean']
-            price = row['price_mean']
-            quality = row['quality_mean']
-
-            if delivery > 0.90 and quality > 0.75:
-                if price > stats['price_mean'].mean():
-                    interpretations.append("Премиум-поставщики")
-                else:
-                    interpretations.append("Оптимальные поставщики")
-            elif delivery < 0.7:
-                interpretations.append("Ненадежные поставщики")
-            elif price < stats['price_mean'].mean() * 0.85:
-                interpretations.append("Бюджетные поставщики")
-            elif quality < 0.5:
-                interpretations.append("Поставщики с низким качеством")
-            else:
-                interpretations.append("Стандартные поставщики")
+        return self.rule_engine.label_clusters(stats).tolist()
 
-        return interpretations
+    def interpret_suppliers(self, features, reference=None):
+        """
+        Интерпретация отдельных поставщиков по тем же правилам, что и кластеров
+
+        reference - средние значения признаков для относительных порогов (по умолчанию - по таблице)
+        """
+        return self.rule_engine.label_suppliers(features, reference=reference)
 
 
 # Создаем глобальный экземпляр solver
@@ -1,126 +1,769 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 from pulp import *
 
+from autoTasks.profiling_3 import finish_profile, new_profile, parse_cbc_log, profile_phase
+from autoTasks.simplex_3 import TransportationSimplex
+
+try:
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+
+    HIGHS_AVAILABLE = True
+except ImportError:
+    HIGHS_AVAILABLE = False
+
+BACKENDS = ('pulp', 'highs', 'simplex', 'vogel')
+
+# Фоновые решения для прогрессивного режима страницы плана закупок
+_background_executor = ThreadPoolExecutor(max_workers=2)
+
+# Коды завершения scipy.optimize.linprog в терминах статусов PuLP
+HIGHS_STATUS = {0: 'Optimal', 1: 'Not Solved', 2: 'Infeasible', 3: 'Unbounded', 4: 'Not Solved'}
+
+
+TYPE_COLUMN = 'Тип'
+NAME_COLUMN = 'Поставщик/Производство'
+AMOUNT_COLUMN = 'Мощность/Потребность'
+ROW_TYPES = ('Стоимость', 'Мощность', 'Спрос')
+
+# Длинный формат (список маршрутов): тип, поставщик, производство, значение
+SUPPLIER_COLUMN = 'Поставщик'
+PLANT_COLUMN = 'Производство'
+VALUE_COLUMN = 'Значение'
+ROUTE_ROW_TYPES = ('Маршрут', 'Мощность', 'Спрос')
+
+# Сколько некорректных ячеек перечислять в сообщении об ошибке
+MAX_REPORTED_CELLS = 20
+
+
+def _to_numeric_block(block):
+    """
+    Векторное преобразование блока ячеек в числа (NaN - пустые и некорректные значения)
+    """
+    values = block.to_numpy()
+    if values.dtype.kind in 'iuf':
+        return values.astype(np.float64)
+
+    flat = pd.Series(values.ravel()).astype(str).str.strip().str.replace(',', '.', regex=False)
+    numeric = pd.to_numeric(flat.where(flat.ne('') & flat.ne('nan')), errors='coerce')
+    return numeric.to_numpy(dtype=np.float64).reshape(values.shape)
+
+
+def _bad_cells(df, row_labels, columns, numeric):
+    """
+    Описание некорректных ячеек: номер строки файла, название, столбец и значение
+    """
+    bad_rows, bad_cols = np.nonzero(np.isnan(numeric) | (numeric < 0))
+    cells = []
+    for r, c in zip(bad_rows[:MAX_REPORTED_CELLS], bad_cols[:MAX_REPORTED_CELLS]):
+        label = row_labels[r]
+        value = df.at[label, columns[c]]
+        cells.append(f"строка {df.index.get_loc(label) + 2} ({df.at[label, NAME_COLUMN]}), "
+                     f"столбец '{columns[c]}': '{'' if pd.isna(value) else value}'")
+    if len(bad_rows) > MAX_REPORTED_CELLS:
+        cells.append(f"... и еще {len(bad_rows) - MAX_REPORTED_CELLS}")
+    return cells
+
+
+def _as_integers(values):
+    """
+    Целочисленный массив, если все значения целые (как в исходном формате файла)
+    """
+    if np.all(np.isfinite(values)) and np.all(values == np.round(values)):
+        return values.astype(np.int64)
+    return values
+
+
+def parse_transportation_dataframe(df):
+    """
+    Разбор и проверка данных транспортной задачи из DataFrame
+
+    Таблица делится по столбцу 'Тип' один раз; все столбцы между названием и
+    'Мощность/Потребность' считаются производствами, их количество не ограничено.
+    Мощности и потребности сопоставляются по названиям, а не по порядку строк.
+    Возвращает словарь с матрицей затрат, векторами мощностей и потребностей,
+    названиями и списком ошибок (пустым, если данные корректны).
+    """
+    errors = []
+
+    missing_columns = [col for col in (TYPE_COLUMN, NAME_COLUMN, AMOUNT_COLUMN) if col not in df.columns]
+    if missing_columns:
+        return {'errors': [f"Отсутствуют обязательные колонки: {missing_columns}"]}
+
+    demand_names = [col for col in df.columns if col not in (TYPE_COLUMN, NAME_COLUMN, AMOUNT_COLUMN)]
+    if not demand_names:
+        return {'errors': ["В файле нет столбцов производств"]}
+
+    # Делим таблицу по типу строк за один проход
+    types = df[TYPE_COLUMN].astype(str).str.strip()
+    type_codes = pd.Categorical(types, categories=ROW_TYPES).codes
+    names = df[NAME_COLUMN].astype(str).str.strip().to_numpy()
+
+    unknown = np.flatnonzero(type_codes < 0)
+    if len(unknown):
+        rows = ', '.join(str(i + 2) for i in unknown[:MAX_REPORTED_CELLS])
+        errors.append(f"Неизвестный тип строки (ожидается {', '.join(ROW_TYPES)}) в строках: {rows}")
+
+    cost_rows = np.flatnonzero(type_codes == 0)
+    amount_rows = np.flatnonzero(type_codes > 0)
+    supply_rows = np.flatnonzero(type_codes == 1)
+    demand_rows = np.flatnonzero(type_codes == 2)
+
+    # Матрица затрат и столбец мощностей/потребностей - векторное преобразование в числа
+    costs = _to_numeric_block(df.iloc[cost_rows][demand_names])
+    amounts = _to_numeric_block(df.iloc[amount_rows][[AMOUNT_COLUMN]])[:, 0]
+
+    bad_costs = _bad_cells(df, df.index[cost_rows], demand_names, costs)
+    if bad_costs:
+        errors.append("Некорректные затраты (ожидается неотрицательное число): " + '; '.join(bad_costs))
+    bad_amounts = _bad_cells(df, df.index[amount_rows], [AMOUNT_COLUMN], amounts[:, None])
+    if bad_amounts:
+        errors.append("Некорректные мощности/потребности (ожидается неотрицательное число): "
+                      + '; '.join(bad_amounts))
+
+    supply_names = names[cost_rows]
+    amount_names = names[amount_rows]
+    amount_is_supply = type_codes[amount_rows] == 1
+
+    for label, row_names in (('Стоимость', supply_names), ('Мощность', names[supply_rows]),
+                             ('Спрос', names[demand_rows])):
+        duplicates = pd.unique(row_names[pd.Series(row_names).duplicated().to_numpy()])
+        if len(duplicates):
+            errors.append(f"Повторяющиеся названия в строках типа \"{label}\": {list(duplicates)}")
+
+    # Сопоставление по названиям
+    supply_series = pd.Series(amounts[amount_is_supply], index=amount_names[amount_is_supply])
+    demand_series = pd.Series(amounts[~amount_is_supply], index=amount_names[~amount_is_supply])
+
+    suppliers_cost = set(supply_names)
+    suppliers_power = set(supply_series.index)
+    if suppliers_cost != suppliers_power:
+        errors.append(f"Поставщики: {suppliers_cost - suppliers_power} есть в 'Стоимости', но нет в 'Мощности'.\n"
+                      f"А поставщики: {suppliers_power - suppliers_cost} есть в 'Мощности', но нет в 'Стоимости'")
+
+    productions = set(demand_series.index)
+    production_columns = set(demand_names)
+    if production_columns != productions:
+        errors.append(f"Производства/о:  {production_columns - productions} есть в столбцах, но нет в спросе.\n"
+                      f"А производства/о: {productions - production_columns} есть в спросе, но нет в столбцах")
+
+    if errors:
+        return {'errors': errors}
+
+    supply = supply_series.reindex(supply_names).to_numpy()
+    demand = demand_series.reindex(demand_names).to_numpy()
+
+    return {
+        'costs': _as_integers(costs),
+        'supply_names': supply_names.tolist(),
+        'demand_names': list(demand_names),
+        'supply': _as_integers(supply),
+        'demand': _as_integers(demand),
+        'errors': []
+    }
+
 
 def read_transportation_data_from_dataframe(df):
     """
     Чтение данных транспортной задачи из DataFrame
     """
-    costs = []
-    supply = []
-    demand = []
-    supply_names = []
-    demand_names = []
-
-    # Преобразуем DataFrame в список для обработки
-    data = df.values.tolist()
-    headers = df.columns.tolist()
-
-    # Извлекаем названия потребителей из заголовков (столбцы 2-4)
-    demand_names = headers[2:5]
-
-    for row in data:
-        data_type = row[0]  # Тип данных: Затраты, Мощность, Потребность
-        name = str(row[1])  # Название поставщика/потребителя
-
-        if data_type == 'Стоимость':
-            supply_names.append(name)
-            # Преобразуем затраты в числа, игнорируя пустые значения
-            cost_row = []
-            for x in row[2:5]:
-                try:
-                    cost_row.append(int(float(x)) if pd.notna(x) and x != '' else 0)
-                except (ValueError, TypeError):
-                    cost_row.append(0)
-            costs.append(cost_row)
-
-        elif data_type == 'Мощность':
-            try:
-                supply_value = int(float(row[5])) if pd.notna(row[5]) and row[5] != '' else 0
-                supply.append(supply_value)
-            except (ValueError, TypeError):
-                supply.append(0)
-
-        elif data_type == 'Спрос':
-            try:
-                demand_value = int(float(row[5])) if pd.notna(row[5]) and row[5] != '' else 0
-                demand.append(demand_value)
-            except (ValueError, TypeError):
-                demand.append(0)
-
-    return costs, supply_names, demand_names, supply, demand
-
-
-def solve_transportation_problem(dataframe=None):
-    # Чтение данных из переданного источника
-    if dataframe is not None:
-        costs, supply_names, demand_names, supply, demand = read_transportation_data_from_dataframe(dataframe)
-    else:
-        raise ValueError("Необходимо указать либо csv_filename, либо dataframe")
+    parsed = parse_transportation_dataframe(df)
+    if parsed['errors']:
+        raise ValueError('\n'.join(parsed['errors']))
+
+    return (parsed['costs'].tolist(), parsed['supply_names'], parsed['demand_names'],
+            parsed['supply'].tolist(), parsed['demand'].tolist())
 
+
+def is_route_list(df):
+    """
+    Данные заданы списком маршрутов (длинный формат), а не матрицей затрат
+    """
+    return NAME_COLUMN not in df.columns and all(
+        col in df.columns for col in (TYPE_COLUMN, SUPPLIER_COLUMN, PLANT_COLUMN, VALUE_COLUMN))
+
+
+def parse_route_list_dataframe(df):
+    """
+    Разбор транспортной задачи, заданной списком маршрутов
+
+    Строки 'Маршрут' - поставщик, производство и затраты на тонну; отсутствующий маршрут
+    запрещен. Строки 'Мощность' (поставщик) и 'Спрос' (производство) - объемы.
+    Возвращает маршруты в виде массивов (номер поставщика, номер производства, затраты).
+    """
+    missing_columns = [col for col in (TYPE_COLUMN, SUPPLIER_COLUMN, PLANT_COLUMN, VALUE_COLUMN)
+                       if col not in df.columns]
+    if missing_columns:
+        return {'errors': [f"Отсутствуют обязательные колонки: {missing_columns}"]}
+
+    errors = []
+    type_codes = pd.Categorical(df[TYPE_COLUMN].astype(str).str.strip(), categories=ROUTE_ROW_TYPES).codes
+    values = _to_numeric_block(df[[VALUE_COLUMN]])[:, 0]
+    suppliers = df[SUPPLIER_COLUMN].where(df[SUPPLIER_COLUMN].notna(), '').astype(str).str.strip().to_numpy()
+    plants = df[PLANT_COLUMN].where(df[PLANT_COLUMN].notna(), '').astype(str).str.strip().to_numpy()
+
+    def report(mask, message):
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            listed = ', '.join(str(i + 2) for i in rows[:MAX_REPORTED_CELLS])
+            more = f" ... и еще {len(rows) - MAX_REPORTED_CELLS}" if len(rows) > MAX_REPORTED_CELLS else ''
+            errors.append(f"{message} в строках: {listed}{more}")
+
+    route, power, need = type_codes == 0, type_codes == 1, type_codes == 2
+    report(type_codes < 0, f"Неизвестный тип строки (ожидается {', '.join(ROUTE_ROW_TYPES)})")
+    report(np.isnan(values) | (values < 0), "Некорректное значение (ожидается неотрицательное число)")
+    report((route | power) & (suppliers == ''), "Не указан поставщик")
+    report((route | need) & (plants == ''), "Не указано производство")
+    if errors:
+        return {'errors': errors}
+
+    supply_names = suppliers[power]
+    demand_names = plants[need]
+    for label, row_names in (('Мощность', supply_names), ('Спрос', demand_names)):
+        duplicates = pd.unique(row_names[pd.Series(row_names).duplicated().to_numpy()])
+        if len(duplicates):
+            errors.append(f"Повторяющиеся названия в строках типа \"{label}\": {list(duplicates)}")
+
+    route_rows = pd.Index(supply_names).get_indexer(suppliers[route])
+    route_cols = pd.Index(demand_names).get_indexer(plants[route])
+    unknown = np.flatnonzero((route_rows < 0) | (route_cols < 0))
+    if len(unknown):
+        pairs = [f"{suppliers[route][k]} -> {plants[route][k]}" for k in unknown[:MAX_REPORTED_CELLS]]
+        errors.append(f"Маршруты с поставщиком без мощности или производством без спроса: {pairs}")
+
+    if not errors:
+        route_keys = route_rows.astype(np.int64) * len(demand_names) + route_cols
+        if len(np.unique(route_keys)) != len(route_keys):
+            errors.append("Повторяющиеся маршруты в строках типа \"Маршрут\"")
+    if errors:
+        return {'errors': errors}
+
+    return {
+        'route_rows': route_rows.astype(np.int64),
+        'route_cols': route_cols.astype(np.int64),
+        'route_costs': values[route],
+        'supply_names': supply_names.tolist(),
+        'demand_names': demand_names.tolist(),
+        'supply': _as_integers(values[power]),
+        'demand': _as_integers(values[need]),
+        'errors': []
+    }
+
+
+def _solve_pulp(costs, supply, demand, profile=None):
+    """
+    Решение сбалансированной транспортной задачи через PuLP (CBC)
+    """
+    with profile_phase(profile, 'build'):
+        problem = LpProblem('Transportation_Problem', LpMinimize)
+
+        vars_dict = {}
+        for i in range(len(supply)):
+            for j in range(len(demand)):
+                var_name = f'x_{i}_{j}'
+                vars_dict[(i, j)] = LpVariable(var_name, 0, None, LpContinuous)
+
+        # Целевая функция
+        problem += lpSum(vars_dict[(i, j)] * costs[i][j]
+                         for i in range(len(supply))
+                         for j in range(len(demand))), "Total_Cost"
+
+        # Ограничения
+        for i in range(len(supply)):
+            problem += lpSum(vars_dict[(i, j)] for j in range(len(demand))) == supply[i], f"Supply_{i}"
+
+        for j in range(len(demand)):
+            problem += lpSum(vars_dict[(i, j)] for i in range(len(supply))) == demand[j], f"Demand_{j}"
+
+    iterations, solver_seconds = _run_cbc(problem, profile)
+
+    # Формируем результаты
+    with profile_phase(profile, 'extract'):
+        results = [[0 for _ in range(len(demand))] for _ in range(len(supply))]
+        for i in range(len(supply)):
+            for j in range(len(demand)):
+                results[i][j] = vars_dict[(i, j)].varValue
+
+        # Двойственные оценки ограничений (None, если решатель их не вернул)
+        duals = [problem.constraints[f"Supply_{i}"].pi for i in range(len(supply))] + \
+                [problem.constraints[f"Demand_{j}"].pi for j in range(len(demand))]
+        if any(dual is None for dual in duals):
+            duals = None
+
+    _count_model(profile, len(vars_dict), len(problem.constraints),
+                 sum(len(constraint) for constraint in problem.constraints.values()), iterations, solver_seconds)
+
+    return results, value(problem.objective), LpStatus[problem.status], duals
+
+
+def _run_cbc(problem, profile=None):
+    """
+    Запуск CBC с журналом во временном файле; возвращает итерации и время решателя из журнала
+
+    Остальное время этапа 'solve' - запись входного файла CBC и чтение решения PuLP.
+    """
+    log_file, log_path = tempfile.mkstemp(suffix='.log')
+    os.close(log_file)
+    try:
+        with profile_phase(profile, 'solve'):
+            problem.solve(PULP_CBC_CMD(msg=False, logPath=log_path))
+        with open(log_path, encoding='utf-8', errors='replace') as log:
+            return parse_cbc_log(log.read())
+    finally:
+        os.remove(log_path)
+
+
+def _count_model(profile, variables, constraints, nonzeros, iterations, solver_seconds=None):
+    """
+    Размер модели и итерации решателя в профиле (если он ведется)
+    """
+    if profile is None:
+        return
+    if solver_seconds is None:
+        solver_seconds = profile['phases'].get('solve', {}).get('seconds')
+    profile.update(variables=variables, constraints=constraints, nonzeros=nonzeros,
+                   iterations=iterations, solver_seconds=solver_seconds)
+
+
+def build_transportation_matrices(m, n):
+    """
+    Разреженная матрица ограничений-равенств сбалансированной транспортной задачи
+
+    Переменная x[i, j] имеет номер i * n + j; строки 0..m-1 - мощности поставщиков,
+    строки m..m+n-1 - потребности производств.
+    """
+    variables = np.arange(m * n)
+    rows = np.concatenate([variables // n, m + variables % n])
+    cols = np.concatenate([variables, variables])
+    data = np.ones(2 * m * n)
+
+    return coo_matrix((data, (rows, cols)), shape=(m + n, m * n)).tocsr()
+
+
+def _solve_highs(costs, supply, demand, profile=None):
+    """
+    Решение сбалансированной транспортной задачи через HiGHS (scipy) на разреженных матрицах
+    """
+    with profile_phase(profile, 'build'):
+        c = np.asarray(costs, dtype=np.float64)
+        m, n = c.shape
+
+        A_eq = build_transportation_matrices(m, n)
+        b_eq = np.concatenate([np.asarray(supply, dtype=np.float64), np.asarray(demand, dtype=np.float64)])
+
+    with profile_phase(profile, 'solve'):
+        res = linprog(c.ravel(), A_eq=A_eq, b_eq=b_eq, bounds=(0, None), method='highs')
+    _count_model(profile, m * n, m + n, A_eq.nnz, res.nit)
+
+    status = HIGHS_STATUS.get(res.status, 'Not Solved')
+    if res.x is None:
+        return [[0] * n for _ in range(m)], None, status, None
+
+    with profile_phase(profile, 'extract'):
+        results = res.x.reshape(m, n).tolist()
+    return results, res.fun, status, res.eqlin.marginals
+
+
+def _solve_simplex(costs, supply, demand, profile=None):
+    """
+    Решение транспортным симплекс-методом по исходной (несбалансированной) задаче
+
+    Фиктивный узел в матрицу затрат не добавляется; в результатах его поставки
+    возвращаются отдельной строкой или столбцом, как у остальных решателей.
+    Анализ чувствительности строится по последнему базису без повторных решений.
+    """
+    with profile_phase(profile, 'build'):
+        solver = TransportationSimplex(costs, supply, demand)
+    with profile_phase(profile, 'solve'):
+        solver.solve()
+    _count_model(profile, solver.M * solver.N, solver.M + solver.N, 2 * solver.M * solver.N, solver.iterations)
+
+    with profile_phase(profile, 'extract'):
+        results = solver.flows
+        if solver.dummy_col:
+            results = np.column_stack([results, solver.row_slack])
+        elif solver.dummy_row:
+            results = np.vstack([results, solver.col_shortage])
+        results, sensitivity = results.tolist(), solver.sensitivity()
+
+    return results, solver.total_cost, solver.status, sensitivity
+
+
+def _solve_vogel(costs, supply, demand, profile=None):
+    """
+    Эвристический план методом аппроксимации Фогеля (без итераций симплекс-метода)
+    """
+    with profile_phase(profile, 'build'):
+        solver = TransportationSimplex(costs, supply, demand)
+    with profile_phase(profile, 'solve'):
+        solver.initial_plan()
+    _count_model(profile, solver.M * solver.N, solver.M + solver.N, 2 * solver.M * solver.N, 0)
+
+    with profile_phase(profile, 'extract'):
+        results = solver.flows
+        if solver.dummy_col:
+            results = np.column_stack([results, solver.row_slack])
+        elif solver.dummy_row:
+            results = np.vstack([results, solver.col_shortage])
+        results = results.tolist()
+
+    return results, solver.total_cost, solver.status
+
+
+def _solve_routes_highs(rows, cols, costs, supply, demand, profile=None):
+    """
+    Сбалансированная задача по списку маршрутов через HiGHS: переменные только для маршрутов
+    """
+    with profile_phase(profile, 'build'):
+        m, n = len(supply), len(demand)
+        routes = np.arange(len(rows))
+        A_eq = coo_matrix((np.ones(2 * len(rows)), (np.concatenate([rows, m + cols]), np.concatenate([routes, routes]))),
+                          shape=(m + n, len(rows))).tocsr()
+        b_eq = np.concatenate([np.asarray(supply, dtype=np.float64), np.asarray(demand, dtype=np.float64)])
+
+    with profile_phase(profile, 'solve'):
+        res = linprog(costs, A_eq=A_eq, b_eq=b_eq, bounds=(0, None), method='highs')
+    _count_model(profile, len(rows), m + n, A_eq.nnz, res.nit)
+
+    status = HIGHS_STATUS.get(res.status, 'Not Solved')
+    if res.x is None:
+        return np.zeros(len(rows)), None, status, None
+
+    return res.x, res.fun, status, res.eqlin.marginals
+
+
+def _solve_routes_pulp(rows, cols, costs, supply, demand, profile=None):
+    """
+    Сбалансированная задача по списку маршрутов через PuLP (CBC): переменные только для маршрутов
+    """
+    with profile_phase(profile, 'build'):
+        problem = LpProblem('Transportation_Problem', LpMinimize)
+        variables = [LpVariable(f'x_{i}_{j}', 0, None, LpContinuous) for i, j in zip(rows, cols)]
+        problem += lpSum(x * c for x, c in zip(variables, costs)), "Total_Cost"
+
+        by_supply = pd.Series(range(len(rows))).groupby(rows).agg(list)
+        by_demand = pd.Series(range(len(rows))).groupby(cols).agg(list)
+        for i in range(len(supply)):
+            problem += lpSum(variables[k] for k in by_supply.get(i, [])) == supply[i], f"Supply_{i}"
+        for j in range(len(demand)):
+            problem += lpSum(variables[k] for k in by_demand.get(j, [])) == demand[j], f"Demand_{j}"
+
+    iterations, solver_seconds = _run_cbc(problem, profile)
+
+    with profile_phase(profile, 'extract'):
+        flows = np.array([x.varValue or 0.0 for x in variables])
+        duals = [problem.constraints[f"Supply_{i}"].pi for i in range(len(supply))] + \
+                [problem.constraints[f"Demand_{j}"].pi for j in range(len(demand))]
+        if any(dual is None for dual in duals):
+            duals = None
+
+    _count_model(profile, len(variables), len(problem.constraints),
+                 sum(len(constraint) for constraint in problem.constraints.values()), iterations, solver_seconds)
+
+    return flows, value(problem.objective), LpStatus[problem.status], duals
+
+
+def _solve_route_list(dataframe, backend, trace_memory=False):
+    """
+    Решение задачи, заданной списком маршрутов; результаты - ненулевые поставки в формате COO
+    """
+    if backend not in ('pulp', 'highs'):
+        raise ValueError("Для списка маршрутов доступны решатели 'pulp' и 'highs'")
+
+    profile = new_profile(backend, trace_memory)
+    with profile_phase(profile, 'parse'):
+        parsed = parse_route_list_dataframe(dataframe)
+    if parsed['errors']:
+        raise ValueError('\n'.join(parsed['errors']))
+
+    supply_names, demand_names = parsed['supply_names'], parsed['demand_names']
+    supply, demand = parsed['supply'].tolist(), parsed['demand'].tolist()
+    rows, cols, costs = parsed['route_rows'], parsed['route_cols'], parsed['route_costs']
+    m, n = len(supply), len(demand)
     total_supply = sum(supply)
     total_demand = sum(demand)
+    profile.update(suppliers=m, plants=n)
+
+    # Фиктивный узел - маршруты нулевой стоимости от каждого поставщика или к каждому производству
+    modified_supply, modified_demand = supply[:], demand[:]
+    modified_supply_names, modified_demand_names = supply_names[:], demand_names[:]
+    with profile_phase(profile, 'build'):
+        if total_supply > total_demand:
+            rows, cols = np.concatenate([rows, np.arange(m)]), np.concatenate([cols, np.full(m, n)])
+            costs = np.concatenate([costs, np.zeros(m)])
+            modified_demand.append(total_supply - total_demand)
+            modified_demand_names.append("Фиктивное производство")
+        elif total_supply < total_demand:
+            rows, cols = np.concatenate([rows, np.full(n, m)]), np.concatenate([cols, np.arange(n)])
+            costs = np.concatenate([costs, np.zeros(n)])
+            modified_supply.append(total_demand - total_supply)
+            modified_supply_names.append("Фиктивный поставщик")
+
+    if backend == 'highs' and HIGHS_AVAILABLE:
+        flows, total_cost, status, duals = _solve_routes_highs(rows, cols, costs, modified_supply, modified_demand,
+                                                               profile)
+    else:
+        flows, total_cost, status, duals = _solve_routes_pulp(rows, cols, costs, modified_supply, modified_demand,
+                                                              profile)
+
+    # Двойственные оценки по узлам и оценки только заданных маршрутов
+    with profile_phase(profile, 'extract'):
+        supply_duals, demand_duals = _normalize_duals(duals, m, n, total_supply, total_demand)
+        real = (rows < m) & (cols < n)
+        route_reduced = costs[real] - supply_duals[rows[real]] - demand_duals[cols[real]]
+        used = flows > 1e-9
+    profile['status'] = status
+
+    return {
+        'results': None,
+        'flows': {'rows': rows[used], 'cols': cols[used], 'values': flows[used], 'costs': costs[used]},
+        'supply_names': modified_supply_names,
+        'demand_names': modified_demand_names,
+        'supply': modified_supply,
+        'demand': modified_demand,
+        'total_cost': total_cost,
+        'original_costs': None,
+        'status': status,
+        'total_supply': total_supply,
+        'total_demand': total_demand,
+        'sensitivity': {
+            'supply_duals': supply_duals,
+            'demand_duals': demand_duals,
+            'route_rows': rows[real],
+            'route_cols': cols[real],
+            'route_reduced_costs': route_reduced
+        },
+        # Время и память по этапам, размер модели, итерации решателя (см. profiling_3)
+        'profile': finish_profile(profile)
+    }
 
-    # Создаем копии для модификации
-    modified_costs = [row[:] for row in costs]
-    modified_supply = supply[:]
-    modified_supply_names = supply_names[:]
-    modified_demand = demand[:]
-    modified_demand_names = demand_names[:]
 
-    # Добавляем фиктивного потребителя если нужно
+def _coo_flows(results, costs):
+    """
+    Ненулевые поставки плотной матрицы результатов в формате COO (строки, столбцы, объемы, затраты)
+    """
+    results = np.asarray(results, dtype=np.float64)
+    rows, cols = np.nonzero(results > 1e-9)
+    costs = np.asarray(costs, dtype=np.float64)
+    real = (rows < costs.shape[0]) & (cols < costs.shape[1])
+    route_costs = np.zeros(len(rows))
+    route_costs[real] = costs[rows[real], cols[real]]
+    return {'rows': rows, 'cols': cols, 'values': results[rows, cols], 'costs': route_costs}
+
+
+def _normalize_duals(duals, m, n, total_supply, total_demand):
+    """
+    Теневые цены поставщиков и производств по двойственным оценкам сбалансированной задачи
+
+    Оценки нормируются так же, как в транспортном симплекс-методе: потенциал фиктивного
+    узла равен нулю (для сбалансированной задачи - наибольший потенциал поставщика).
+    """
+    if duals is None:
+        return np.full(m, np.nan), np.full(n, np.nan)
+
+    duals = np.asarray(duals, dtype=np.float64)
+    rows = m + int(total_supply < total_demand)
+    u, v = duals[:rows], duals[rows:]
     if total_supply > total_demand:
-        for i in range(len(modified_costs)):
-            modified_costs[i].append(0)
-        modified_demand.append(total_supply - total_demand)
-        modified_demand_names.append("Фиктивное производство")
+        shift = v[n]
     elif total_supply < total_demand:
-        new_row = [0] * len(modified_costs[0])
-        modified_costs.append(new_row)
-        modified_supply.append(total_demand - total_supply)
-        modified_supply_names.append("Фиктивный поставщик")
+        shift = -u[m]
+    else:
+        shift = -u.max()
+    return u[:m] + shift, v[:n] - shift
 
-    # Создаем и решаем задачу
-    problem = LpProblem('Transportation_Problem', LpMinimize)
 
-    vars_dict = {}
-    for i in range(len(modified_supply)):
-        for j in range(len(modified_demand)):
-            var_name = f'x_{i}_{j}'
-            vars_dict[(i, j)] = LpVariable(var_name, 0, None, LpContinuous)
+def _sensitivity_from_duals(costs, duals, total_supply, total_demand):
+    """
+    Анализ чувствительности по двойственным оценкам сбалансированной задачи (PuLP, HiGHS)
 
-    # Целевая функция
-    problem += lpSum(vars_dict[(i, j)] * modified_costs[i][j]
-                     for i in range(len(modified_supply))
-                     for j in range(len(modified_demand))), "Total_Cost"
+    Диапазоны устойчивости LP-решатели не возвращают - они заполняются NaN.
+    """
+    c = np.asarray(costs, dtype=np.float64)
+    m, n = c.shape
+    u, v = _normalize_duals(duals, m, n, total_supply, total_demand)
 
-    # Ограничения
-    for i in range(len(modified_supply)):
-        problem += lpSum(vars_dict[(i, j)] for j in range(len(modified_demand))) == modified_supply[i], f"Supply_{i}"
+    return {
+        'supply_duals': u,
+        'demand_duals': v,
+        'reduced_costs': c - u[:, None] - v[None, :],
+        'cost_lower': np.full((m, n), np.nan),
+        'cost_upper': np.full((m, n), np.nan),
+        'supply_lower': np.full(m, np.nan),
+        'supply_upper': np.full(m, np.nan),
+        'demand_lower': np.full(n, np.nan),
+        'demand_upper': np.full(n, np.nan)
+    }
 
-    for j in range(len(modified_demand)):
-        problem += lpSum(vars_dict[(i, j)] for i in range(len(modified_supply))) == modified_demand[j], f"Demand_{j}"
 
-    problem.solve()
+def solve_transportation_problem(dataframe=None, backend='pulp', trace_memory=False):
+    """
+    Решение транспортной задачи
 
-    # Формируем результаты
-    results = [[0 for _ in range(len(modified_demand))] for _ in range(len(modified_supply))]
-    for i in range(len(modified_supply)):
-        for j in range(len(modified_demand)):
-            results[i][j] = vars_dict[(i, j)].varValue
+    backend: 'pulp' - модель PuLP и решатель CBC,
+             'highs' - разреженные матрицы NumPy/SciPy и HiGHS в том же процессе,
+             'simplex' - специализированный транспортный симплекс-метод
+                         (также возвращает диапазоны устойчивости),
+             'vogel' - только начальный план Фогеля (быстрое приближенное решение)
+
+    Данные в формате списка маршрутов (см. parse_route_list_dataframe) решаются через
+    'pulp' или 'highs' с переменными только для заданных маршрутов; в этом случае 'results'
+    равен None, а поставки доступны только в разреженном виде 'flows'.
+
+    solution_data['profile'] - время и память этапов (разбор, построение модели, решение,
+    извлечение результатов, отображение), размер модели, статус и итерации решателя;
+    trace_memory включает замер пиковой памяти этапов (см. profiling_3.new_profile).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный решатель: {backend}. Доступны: {', '.join(BACKENDS)}")
+
+    if dataframe is not None and is_route_list(dataframe):
+        return _solve_route_list(dataframe, backend, trace_memory)
+
+    # Чтение данных из переданного источника
+    profile = new_profile(backend, trace_memory)
+    if dataframe is not None:
+        with profile_phase(profile, 'parse'):
+            costs, supply_names, demand_names, supply, demand = read_transportation_data_from_dataframe(dataframe)
+    else:
+        raise ValueError("Необходимо указать либо csv_filename, либо dataframe")
+
+    total_supply = sum(supply)
+    total_demand = sum(demand)
+    profile.update(suppliers=len(supply), plants=len(demand))
+
+    # Создаем копии для модификации
+    with profile_phase(profile, 'build'):
+        modified_costs = [row[:] for row in costs]
+        modified_supply = supply[:]
+        modified_supply_names = supply_names[:]
+        modified_demand = demand[:]
+        modified_demand_names = demand_names[:]
+
+        # Добавляем фиктивного потребителя если нужно
+        if total_supply > total_demand:
+            for i in range(len(modified_costs)):
+                modified_costs[i].append(0)
+            modified_demand.append(total_supply - total_demand)
+            modified_demand_names.append("Фиктивное производство")
+        elif total_supply < total_demand:
+            new_row = [0] * len(modified_costs[0])
+            modified_costs.append(new_row)
+            modified_supply.append(total_demand - total_supply)
+            modified_supply_names.append("Фиктивный поставщик")
+
+    # Решаем задачу (без SciPy с HiGHS используется PuLP)
+    duals = None
+    if backend == 'simplex':
+        results, total_cost, status, sensitivity = _solve_simplex(costs, supply, demand, profile)
+    elif backend == 'vogel':
+        results, total_cost, status = _solve_vogel(costs, supply, demand, profile)
+    elif backend == 'highs' and HIGHS_AVAILABLE:
+        results, total_cost, status, duals = _solve_highs(modified_costs, modified_supply, modified_demand, profile)
+    else:
+        results, total_cost, status, duals = _solve_pulp(modified_costs, modified_supply, modified_demand, profile)
+
+    with profile_phase(profile, 'extract'):
+        if backend != 'simplex':
+            sensitivity = _sensitivity_from_duals(costs, duals, total_supply, total_demand)
+        # Ненулевые поставки: номера строк и столбцов (с фиктивным узлом), объемы и затраты на тонну
+        flows = _coo_flows(results, costs)
+    profile['status'] = status
 
     # Собираем все данные в словарь
     solution_data = {
         'results': results,
+        'flows': flows,
         'supply_names': modified_supply_names,
         'demand_names': modified_demand_names,
         'supply': modified_supply,
         'demand': modified_demand,
-        'total_cost': value(problem.objective),
+        'total_cost': total_cost,
         'original_costs': costs,  # Сохраняем оригинальные затраты для анализа
-        'status': LpStatus[problem.status],
+        'status': status,
         'total_supply': total_supply,
-        'total_demand': total_demand
+        'total_demand': total_demand,
+        # Теневые цены, оценки маршрутов и диапазоны устойчивости (массивы по исходным данным)
+        'sensitivity': sensitivity,
+        # Время и память по этапам, размер модели, итерации решателя (см. profiling_3)
+        'profile': finish_profile(profile)
     }
 
     return solution_data
+
+
+def solve_transportation_problem_async(dataframe, backend='pulp'):
+    """
+    Запуск решения транспортной задачи в фоновом потоке; возвращает Future с solution_data
+    """
+    return _background_executor.submit(solve_transportation_problem, dataframe=dataframe, backend=backend)
+
+
+class TransportationWhatIf:
+    def __init__(self, dataframe):
+        """
+        Анализ «что если» для транспортной задачи с повторной оптимизацией от последнего базиса
+
+        Задача решается транспортным симплекс-методом один раз; каждый следующий сценарий
+        решается от оптимального базиса предыдущего, а результат сравнивается с исходным планом.
+        """
+        parsed = parse_transportation_dataframe(dataframe)
+        if parsed['errors']:
+            raise ValueError('\n'.join(parsed['errors']))
+
+        self.supply_names = parsed['supply_names']
+        self.demand_names = parsed['demand_names']
+        self.base_costs = parsed['costs'].astype(np.float64)
+        self.base_supply = parsed['supply'].astype(np.float64)
+        self.base_demand = parsed['demand'].astype(np.float64)
+
+        self.solver = TransportationSimplex(self.base_costs, self.base_supply, self.base_demand).solve()
+        self.base_flows = self.solver.flows.copy()
+        self.base_cost = self.solver.total_cost
+
+    def evaluate(self, supply=None, demand=None, costs=None):
+        """
+        План при измененных данных (значения задаются по названиям, остальное - как в исходных данных)
+
+        supply - {поставщик: мощность}, demand - {производство: потребность},
+        costs - {(поставщик, производство): затраты на тонну}.
+        """
+        supply_index = {name: i for i, name in enumerate(self.supply_names)}
+        demand_index = {name: j for j, name in enumerate(self.demand_names)}
+
+        target_supply = self.base_supply.copy()
+        target_demand = self.base_demand.copy()
+        target_costs = self.base_costs.copy()
+        for name, amount in (supply or {}).items():
+            target_supply[supply_index[name]] = amount
+        for name, amount in (demand or {}).items():
+            target_demand[demand_index[name]] = amount
+        for (supplier, plant), cost in (costs or {}).items():
+            target_costs[supply_index[supplier], demand_index[plant]] = cost
+
+        # Решение от базиса предыдущего сценария (включая откат прошлых изменений)
+        solver = self.solver
+        report = solver.resolve(target_costs, target_supply, target_demand)
+
+        changed_rows, changed_cols = np.nonzero(np.abs(solver.flows - self.base_flows) > solver.tol)
+        changed_flows = pd.DataFrame({
+            'От поставщика': [self.supply_names[i] for i in changed_rows],
+            'К потребителю': [self.demand_names[j] for j in changed_cols],
+            'Было, т.': self.base_flows[changed_rows, changed_cols],
+            'Стало, т.': solver.flows[changed_rows, changed_cols]
+        })
+
+        return {
+            'status': report['status'],
+            'warm_start': report['warm_start'],
+            'iterations': report['iterations'],
+            'total_cost': solver.total_cost,
+            'base_cost': self.base_cost,
+            'cost_change': solver.total_cost - self.base_cost,
+            'changed_flows': changed_flows
+        }
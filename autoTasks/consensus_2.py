@@ -0,0 +1,163 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from sklearn.cluster import KMeans
+from threadpoolctl import threadpool_limits
+
+
+def _limit_worker_threads(n_threads):
+    """
+    Ограничение потоков OpenMP/BLAS в процессе пула, чтобы процессы не делили ядра
+    """
+    threadpool_limits(limits=n_threads)
+
+
+def _fit_resamples(data, n_clusters, seeds, subsample, bootstrap):
+    """
+    K-means на серии подвыборок; метка -1 означает, что поставщик не попал в подвыборку
+    """
+    n = len(data)
+    size = max(n_clusters, int(round(subsample * n)))
+    labels = np.full((len(seeds), n), -1, dtype=np.int16)
+
+    for row, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        if bootstrap:
+            sample = rng.integers(0, n, size=n)
+            members = np.unique(sample)
+        else:
+            sample = rng.choice(n, size=size, replace=False)
+            members = sample
+
+        model = KMeans(n_clusters=n_clusters, n_init=1, random_state=int(seed % 2 ** 31))
+        model.fit(data[sample])
+        labels[row, members] = model.predict(data[members])
+
+    return labels
+
+
+class ConsensusClustering:
+    def __init__(self, n_resamples=100, subsample=0.8, bootstrap=False, n_jobs=None,
+                 chunk_size=10, max_pending=None, random_state=42, store_labels=False):
+        """
+        Консенсусная кластеризация по серии K-means на подвыборках
+
+        Подвыборки обрабатываются пулом процессов порциями по chunk_size; в работе
+        одновременно не более max_pending порций, а K-means в каждом процессе использует
+        свою долю ядер. Для каждой порции сразу накапливается устойчивость поставщиков
+        относительно эталонных меток, поэтому память не зависит от количества подвыборок. Матрица совместных назначений
+        при store_labels=True доступна по блокам строк через coassignment_blocks.
+        """
+        self.n_resamples = n_resamples
+        self.subsample = subsample
+        self.bootstrap = bootstrap
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * self.n_jobs
+        self.random_state = random_state
+        self.store_labels = store_labels
+
+        self.stability = None
+        self.robustness = None
+        self.resample_labels = None
+
+    def fit(self, data, reference_labels, n_clusters):
+        """
+        Расчет устойчивости поставщиков и кластеров
+
+        Устойчивость поставщика - доля случаев, когда он оказывался в одном кластере с
+        поставщиками своего эталонного кластера (среди подвыборок, содержащих обоих).
+        Надежность кластера - та же доля, усредненная по всем парам внутри кластера.
+        """
+        data = np.ascontiguousarray(data)
+        reference_labels = np.asarray(reference_labels)
+        n = len(data)
+
+        seeds = np.random.SeedSequence(self.random_state).generate_state(self.n_resamples)
+        chunks = [seeds[i:i + self.chunk_size] for i in range(0, self.n_resamples, self.chunk_size)]
+
+        agreements = np.zeros(n)
+        comparisons = np.zeros(n)
+        stored = {} if self.store_labels else None
+
+        def collect(future):
+            labels = future.result()
+            self._accumulate(labels, reference_labels, n_clusters, agreements, comparisons)
+            if stored is not None:
+                stored[starts[future]] = labels
+            del starts[future]
+
+        starts = {}
+        pending = set()
+        n_threads = max(1, (os.cpu_count() or 1) // self.n_jobs)
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_limit_worker_threads,
+                                 initargs=(n_threads,)) as executor:
+            for index, chunk in enumerate(chunks):
+                future = executor.submit(_fit_resamples, data, n_clusters, chunk, self.subsample, self.bootstrap)
+                starts[future] = index
+                pending.add(future)
+
+                if len(pending) >= self.max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+
+            for future in pending:
+                collect(future)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.stability = agreements / comparisons
+
+        cluster_agreements = np.bincount(reference_labels, weights=agreements, minlength=n_clusters)
+        cluster_comparisons = np.bincount(reference_labels, weights=comparisons, minlength=n_clusters)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.robustness = cluster_agreements / cluster_comparisons
+
+        if stored is not None:
+            self.resample_labels = np.concatenate([stored[index] for index in sorted(stored)])
+
+        return self
+
+    @staticmethod
+    def _accumulate(labels, reference_labels, n_clusters, agreements, comparisons):
+        """
+        Накопление совпадений по порции подвыборок без построения попарной матрицы
+        """
+        for row in labels:
+            sampled = row >= 0
+            ref = reference_labels[sampled]
+            own = row[sampled].astype(np.int64)
+
+            # Сколько поставщиков эталонного кластера попало в подвыборку
+            reference_counts = np.bincount(ref, minlength=n_clusters)
+            # Совместное распределение (метка подвыборки, эталонный кластер)
+            joint = np.bincount(own * n_clusters + ref, minlength=(own.max() + 1) * n_clusters)
+
+            agreements[sampled] += joint[own * n_clusters + ref] - 1
+            comparisons[sampled] += reference_counts[ref] - 1
+
+    def coassignment_blocks(self, block_size=1024):
+        """
+        Матрица совместных назначений по блокам строк: (начало блока, блок)
+
+        Элемент блока - доля подвыборок, где пара поставщиков попала в один кластер,
+        среди подвыборок, содержащих обоих.
+        """
+        if self.resample_labels is None:
+            raise ValueError("Метки подвыборок не сохранены: используйте store_labels=True")
+
+        labels = self.resample_labels
+        n = labels.shape[1]
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            together = np.zeros((stop - start, n), dtype=np.float32)
+            sampled = np.zeros((stop - start, n), dtype=np.float32)
+            for row in labels:
+                block = row[start:stop, None]
+                both = (block >= 0) & (row[None, :] >= 0)
+                sampled += both
+                together += both & (block == row[None, :])
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                yield start, together / sampled
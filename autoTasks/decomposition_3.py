@@ -0,0 +1,351 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from autoTasks.Task3 import (HIGHS_AVAILABLE, HIGHS_STATUS, is_route_list, parse_route_list_dataframe,
+                             parse_transportation_dataframe)
+
+if HIGHS_AVAILABLE:
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+
+
+def _solve_region(rows, cols, costs, supply, demand):
+    """
+    Подзадача региона (HiGHS): маршруты к производствам региона с затратами, увеличенными
+    на цены мощностей поставщиков
+
+    rows, cols - локальные номера поставщиков и производств региона; мощность поставщика -
+    полная (локальная копия общего ограничения) и задается неравенством - без фиктивного
+    производства задача решается заметно быстрее. Возвращает (статус, стоимость с ценами, объемы маршрутов).
+    """
+    routes = np.arange(len(rows))
+    A_ub = coo_matrix((np.ones(len(rows)), (rows, routes)), shape=(len(supply), len(rows))).tocsr()
+    A_eq = coo_matrix((np.ones(len(rows)), (cols, routes)), shape=(len(demand), len(rows))).tocsr()
+
+    res = linprog(costs, A_ub=A_ub, b_ub=supply, A_eq=A_eq, b_eq=demand, bounds=(0, None), method='highs')
+    status = HIGHS_STATUS.get(res.status, 'Not Solved')
+    if res.x is None:
+        return status, None, None
+    return status, res.fun, res.x
+
+
+def default_plant_regions(rows, cols, costs, n, n_regions):
+    """
+    Разбиение производств на регионы по умолчанию
+
+    Производства упорядочиваются по самому дешевому поставщику и делятся на n_regions
+    непрерывных групп, так что производства с общими дешевыми поставщиками попадают
+    в один регион.
+    """
+    order = np.lexsort((costs, cols))
+    plants, first = np.unique(cols[order], return_index=True)
+    cheapest = np.full(n, rows.max() + 1 if len(rows) else 0)
+    cheapest[plants] = rows[order][first]
+
+    regions = np.empty(n, dtype=np.int64)
+    for region, members in enumerate(np.array_split(np.argsort(cheapest, kind='stable'), n_regions)):
+        regions[members] = region
+    return regions
+
+
+def greedy_route_plan(rows, cols, costs, supply, demand):
+    """
+    Жадный план по маршрутам в порядке возрастания затрат
+
+    Дает начальные допустимые планы регионов; при разреженной сети часть спроса может
+    остаться непокрытой (возвращается вместе с планом).
+    """
+    remaining_supply = np.asarray(supply, dtype=np.float64).copy()
+    remaining_demand = np.asarray(demand, dtype=np.float64).copy()
+    flows = np.zeros(len(costs))
+    for route in np.argsort(costs, kind='stable'):
+        i, j = rows[route], cols[route]
+        amount = min(remaining_supply[i], remaining_demand[j])
+        if amount > 0:
+            flows[route] = amount
+            remaining_supply[i] -= amount
+            remaining_demand[j] -= amount
+    return flows, remaining_demand
+
+
+class RegionalDecompositionSolver:
+    def __init__(self, rows, cols, costs, supply, demand, plant_regions, n_jobs=None, tol=1e-6, max_iter=200):
+        """
+        Транспортная задача по списку маршрутов, разложенная по регионам производств (Данциг - Вулф)
+
+        Каждый регион - отдельная транспортная задача для своих производств и поставщиков,
+        имеющих к ним маршруты; общими между регионами остаются только мощности поставщиков.
+        Главная задача выбирает для каждого производства выпуклую комбинацию найденных планов
+        его снабжения при общих мощностях, и ее двойственные оценки - цены мощностей -
+        передаются в подзадачи регионов, которые решаются параллельно и возвращают новые планы.
+        Подзадаче передаются только данные ее региона, поэтому память процесса ограничена
+        размером региона.
+
+        Мощность поставщиков должна покрывать спрос (при дефиците добавляется фиктивный
+        поставщик с маршрутами ко всем производствам, как в Task3).
+        """
+        if not HIGHS_AVAILABLE:
+            raise ImportError("Для декомпозиции требуется SciPy (решатель HiGHS)")
+
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.cols = np.asarray(cols, dtype=np.int64)
+        self.costs = np.asarray(costs, dtype=np.float64)
+        self.supply = np.asarray(supply, dtype=np.float64)
+        self.demand = np.asarray(demand, dtype=np.float64)
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.tol = tol
+        self.max_iter = max_iter
+
+        # Штраф за превышение общей мощности: больше любой цены мощности в оптимуме
+        self.penalty = 2 * (np.abs(self.costs).max() if len(self.costs) else 0.0) + 1.0
+
+        region_codes, self.region_labels = pd.factorize(np.asarray(plant_regions))
+        self.regions = []
+        for region in range(len(self.region_labels)):
+            plants = np.flatnonzero(region_codes == region)
+            routes = np.flatnonzero(np.isin(self.cols, plants))
+            suppliers, local_rows = np.unique(self.rows[routes], return_inverse=True)
+            self.regions.append({
+                'plants': plants,
+                'routes': routes,
+                'suppliers': suppliers,
+                'local_rows': local_rows,
+                'local_cols': np.searchsorted(plants, self.cols[routes])
+            })
+
+    def _region_task(self, region, prices):
+        return (region['local_rows'], region['local_cols'],
+                self.costs[region['routes']] + prices[region['suppliers']][region['local_rows']],
+                self.supply[region['suppliers']], self.demand[region['plants']])
+
+    def _price_regions(self, executor, prices):
+        """
+        Решение подзадач всех регионов при заданных ценах мощностей
+        """
+        tasks = [self._region_task(region, prices) for region in self.regions]
+        if executor is not None:
+            return list(executor.map(_solve_region, *zip(*tasks)))
+        return [_solve_region(*task) for task in tasks]
+
+    def _columns(self, routes, flows):
+        """
+        Планы производств как столбцы главной задачи: маршруты и объемы поставок к производству
+        """
+        used = flows > 1e-12
+        routes, flows = routes[used], flows[used]
+        order = np.argsort(self.cols[routes], kind='stable')
+        routes, flows = routes[order], flows[order]
+        plants, starts = np.unique(self.cols[routes], return_index=True)
+        return [{'plant': plant, 'routes': plant_routes, 'flows': plant_flows,
+                 'cost': float(self.costs[plant_routes] @ plant_flows)}
+                for plant, plant_routes, plant_flows in zip(plants, np.split(routes, starts[1:]),
+                                                            np.split(flows, starts[1:]))]
+
+    def _cheapest_columns(self, prices):
+        """
+        Точное ценообразование для производства без учета мощностей: весь спрос - с маршрута
+        с наименьшими затратами с учетом цены мощности поставщика
+        """
+        priced = self.costs + prices[self.rows]
+        order = np.lexsort((priced, self.cols))
+        _, first = np.unique(self.cols[order], return_index=True)
+        routes = order[first]
+        return self._columns(routes, self.demand[self.cols[routes]])
+
+    def _reduced_cost(self, column, prices, plant_duals):
+        return column['cost'] + prices[self.rows[column['routes']]] @ column['flows'] - plant_duals[column['plant']]
+
+    def _solve_master(self, columns):
+        """
+        Главная задача: веса планов производств (сумма по производству - 1) при общих мощностях
+
+        Превышение мощностей допускается со штрафом, чтобы задача была разрешима с первых
+        итераций. Возвращает (статус, стоимость, веса, превышение, цены мощностей, оценки производств).
+        """
+        m, n, K = len(self.supply), len(self.demand), len(columns)
+        rows = np.concatenate([self.rows[column['routes']] for column in columns] + [np.arange(m)])
+        cols = np.concatenate([np.full(len(column['routes']), k) for k, column in enumerate(columns)]
+                              + [K + np.arange(m)])
+        data = np.concatenate([column['flows'] for column in columns] + [-np.ones(m)])
+        A_ub = coo_matrix((data, (rows, cols)), shape=(m, K + m)).tocsr()
+
+        plant_of = np.array([column['plant'] for column in columns])
+        A_eq = coo_matrix((np.ones(K), (plant_of, np.arange(K))), shape=(n, K + m)).tocsr()
+
+        c = np.concatenate([[column['cost'] for column in columns], np.full(m, self.penalty)])
+        res = linprog(c, A_ub=A_ub, b_ub=self.supply, A_eq=A_eq, b_eq=np.ones(n), bounds=(0, None), method='highs')
+        if res.x is None:
+            return HIGHS_STATUS.get(res.status, 'Not Solved'), None, None, None, None, None
+
+        return 'Optimal', res.fun, res.x[:K], res.x[K:], -res.ineqlin.marginals, res.eqlin.marginals
+
+    def solve(self, on_iteration=None):
+        """
+        Итерации согласования цен до сходимости нижней и верхней оценок
+
+        Верхняя оценка - стоимость главной задачи (допустимый план, если мощности не превышены),
+        нижняя - лагранжева оценка по ценам мощностей: сумма стоимостей подзадач регионов минус
+        стоимость всех мощностей по ценам. Кроме планов регионов, в главную задачу добавляются
+        планы производств из самого дешевого маршрута по ценам - это гарантирует сходимость
+        к оптимуму. on_iteration(запись) вызывается на каждой итерации.
+        """
+        m = len(self.supply)
+        executor = ProcessPoolExecutor(max_workers=min(self.n_jobs, len(self.regions))) \
+            if self.n_jobs > 1 and len(self.regions) > 1 else None
+
+        history = []
+        status = 'Not Solved'
+        weights = None
+        try:
+            outcomes = self._price_regions(executor, np.zeros(m))
+            if any(outcome[0] != 'Optimal' for outcome in outcomes):
+                return self._result('Infeasible', None, [], history)
+
+            columns = [column for region, (_, _, flows) in zip(self.regions, outcomes)
+                       for column in self._columns(region['routes'], flows)]
+            # Жадный общий план - допустимые столбцы с первой итерации
+            greedy, uncovered = greedy_route_plan(self.rows, self.cols, self.costs, self.supply, self.demand)
+            if not (uncovered > self.tol).any():
+                columns += self._columns(np.arange(len(self.costs)), greedy)
+            best_lower = sum(value for _, value, _ in outcomes)
+
+            feasible, weights = False, None
+            for iteration in range(1, self.max_iter + 1):
+                master_status, upper, weights, excess, prices, plant_duals = self._solve_master(columns)
+                if master_status != 'Optimal':
+                    status = master_status
+                    break
+
+                outcomes = self._price_regions(executor, prices)
+                best_lower = max(best_lower, sum(value for _, value, _ in outcomes) - prices @ self.supply)
+
+                candidates = self._cheapest_columns(prices) + [
+                    column for region, (_, _, flows) in zip(self.regions, outcomes)
+                    for column in self._columns(region['routes'], flows)
+                ]
+                threshold = -self.tol * max(abs(upper), 1.0) / len(self.demand)
+                new_columns = [column for column in candidates
+                               if self._reduced_cost(column, prices, plant_duals) < threshold]
+
+                feasible = excess.sum() <= self.tol * max(self.supply.sum(), 1.0)
+                gap = (upper - best_lower) / max(abs(upper), 1.0)
+
+                record = {
+                    'iteration': iteration,
+                    'upper_bound': float(upper) if feasible else np.inf,
+                    'lower_bound': float(best_lower),
+                    'gap': max(float(gap), 0.0) if feasible else np.inf,
+                    'columns': len(columns)
+                }
+                history.append(record)
+                if on_iteration is not None:
+                    on_iteration(record)
+
+                if gap <= self.tol or not new_columns:
+                    status = 'Optimal' if feasible else 'Infeasible'
+                    break
+                columns.extend(new_columns)
+            else:
+                status = 'Feasible' if feasible else 'Not Solved'
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return self._result(status, weights if status in ('Optimal', 'Feasible') else None, columns, history)
+
+    def _result(self, status, weights, columns, history):
+        """
+        План по маршрутам - сумма планов производств с весами главной задачи
+        """
+        flows = np.zeros(len(self.costs))
+        if weights is not None:
+            for weight, column in zip(weights, columns):
+                if weight > 1e-12:
+                    np.add.at(flows, column['routes'], weight * column['flows'])
+
+        return {
+            'status': status,
+            'flows': flows,
+            'total_cost': float(self.costs @ flows) if weights is not None else None,
+            'history': pd.DataFrame(history, columns=['iteration', 'upper_bound', 'lower_bound', 'gap', 'columns']),
+            'n_regions': len(self.regions),
+            'max_region_routes': max((len(region['routes']) for region in self.regions), default=0)
+        }
+
+
+def solve_decomposed_problem(dataframe, plant_regions=None, n_regions=8, n_jobs=None, tol=1e-6, max_iter=200,
+                             on_iteration=None):
+    """
+    Решение транспортной задачи декомпозицией по регионам
+
+    Данные - матрица затрат (как Task3Csv.csv) или список маршрутов. plant_regions - регион
+    каждого производства (словарь {производство: регион} или список в порядке производств);
+    без него производства делятся на n_regions групп (default_plant_regions).
+    Результат совместим с solve_transportation_problem (поставки в формате COO) и
+    дополнительно содержит историю сходимости 'history'.
+    """
+    if is_route_list(dataframe):
+        parsed = parse_route_list_dataframe(dataframe)
+        if parsed['errors']:
+            raise ValueError('\n'.join(parsed['errors']))
+        rows, cols, costs = parsed['route_rows'], parsed['route_cols'], parsed['route_costs']
+    else:
+        parsed = parse_transportation_dataframe(dataframe)
+        if parsed['errors']:
+            raise ValueError('\n'.join(parsed['errors']))
+        m, n = parsed['costs'].shape
+        rows, cols = np.repeat(np.arange(m), n), np.tile(np.arange(n), m)
+        costs = parsed['costs'].ravel().astype(np.float64)
+
+    supply_names, demand_names = parsed['supply_names'][:], parsed['demand_names'][:]
+    supply = np.asarray(parsed['supply'], dtype=np.float64)
+    demand = np.asarray(parsed['demand'], dtype=np.float64)
+    m, n = len(supply), len(demand)
+    total_supply, total_demand = supply.sum(), demand.sum()
+
+    if plant_regions is None:
+        plant_regions = default_plant_regions(rows, cols, costs, n, min(n_regions, n))
+    elif isinstance(plant_regions, dict):
+        plant_regions = [plant_regions[name] for name in demand_names]
+
+    # Дефицит мощностей - фиктивный поставщик с маршрутами ко всем производствам (общий для регионов)
+    if total_supply < total_demand:
+        rows, cols = np.concatenate([rows, np.full(n, m)]), np.concatenate([cols, np.arange(n)])
+        costs = np.concatenate([costs, np.zeros(n)])
+        supply = np.append(supply, total_demand - total_supply)
+        supply_names.append("Фиктивный поставщик")
+
+    solver = RegionalDecompositionSolver(rows, cols, costs, supply, demand, plant_regions,
+                                         n_jobs=n_jobs, tol=tol, max_iter=max_iter)
+    result = solver.solve(on_iteration=on_iteration)
+    flows = result['flows']
+
+    # Избыток мощностей - остатки поставщиков в фиктивное производство, как в Task3
+    if total_supply > total_demand:
+        slack = supply - np.bincount(rows, flows, minlength=m)
+        rows, cols = np.concatenate([rows, np.arange(m)]), np.concatenate([cols, np.full(m, n)])
+        costs = np.concatenate([costs, np.zeros(m)])
+        flows = np.concatenate([flows, np.maximum(slack, 0.0) if result['total_cost'] is not None else np.zeros(m)])
+        demand = np.append(demand, total_supply - total_demand)
+        demand_names.append("Фиктивное производство")
+
+    used = flows > 1e-9
+    return {
+        'results': None,
+        'flows': {'rows': rows[used], 'cols': cols[used], 'values': flows[used], 'costs': costs[used]},
+        'supply_names': supply_names,
+        'demand_names': demand_names,
+        'supply': supply.tolist(),
+        'demand': demand.tolist(),
+        'total_cost': result['total_cost'],
+        'original_costs': None,
+        'status': result['status'],
+        'total_supply': total_supply,
+        'total_demand': total_demand,
+        'history': result['history'],
+        'n_regions': result['n_regions'],
+        'max_region_routes': result['max_region_routes']
+    }
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial.distance import cdist
+
+from autoTasks.Task2 import FEATURE_COLUMNS
+
+
+class ClusterDriftMonitor:
+    def __init__(self, centroid_threshold=0.5, scaler_threshold=0.5, migration_threshold=0.2, history_size=24):
+        """
+        Контроль дрейфа кластеров между последовательными запусками кластеризации
+
+        Для каждого запуска сохраняются статистики scaler, центры и метки кластеров.
+        Новые кластеры сопоставляются с предыдущими венгерским алгоритмом по расстоянию
+        между центрами, поэтому номера треков кластеров сохраняются между запусками.
+        Пороги заданы в единицах стандартного отклонения признаков предыдущего запуска
+        (для миграции - доля сменивших кластер поставщиков).
+        """
+        self.centroid_threshold = centroid_threshold
+        self.scaler_threshold = scaler_threshold
+        self.migration_threshold = migration_threshold
+        self.history_size = history_size
+
+        self.history = []
+        self.tracks = {}
+        self._next_track = 0
+
+    @staticmethod
+    def snapshot(solver):
+        """
+        Состояние обученной кластеризации: scaler, центры (в исходных единицах), метки, признаки
+        """
+        if solver.model is None:
+            raise ValueError("Сначала необходимо выполнить кластеризацию")
+
+        centers = solver.scaler.inverse_transform(solver.model.cluster_centers_, copy=True)
+        return {
+            'scaler_mean': solver.scaler.mean_.copy(),
+            'scaler_scale': solver.scaler.scale_.copy(),
+            'centroids': centers.astype(np.float64),
+            'labels': np.asarray(solver.labels).copy(),
+            'names': np.asarray(solver.supplier_names, dtype=str),
+            'features': np.asarray(solver.features, dtype=np.float32).copy()
+        }
+
+    def record(self, solver):
+        """
+        Сохранение нового запуска и отчет о дрейфе относительно предыдущего
+
+        Для первого запуска возвращается None.
+        """
+        current = self.snapshot(solver)
+
+        if not self.history:
+            current['track_ids'] = np.array([self._new_track() for _ in range(len(current['centroids']))])
+            report = None
+        else:
+            report = self.compare(self.history[-1], current)
+            current['track_ids'] = report['track_ids']
+
+        for cluster, track in enumerate(current['track_ids']):
+            self.tracks.setdefault(int(track), []).append(current['centroids'][cluster])
+
+        self.history.append(current)
+        if len(self.history) > self.history_size:
+            self.history.pop(0)
+
+        return report
+
+    def _new_track(self):
+        track = self._next_track
+        self._next_track += 1
+        return track
+
+    def compare(self, previous, current):
+        """
+        Сравнение двух запусков: сдвиг центров, матрица миграции, движение поставщиков
+        """
+        prev_mean, prev_scale = previous['scaler_mean'], previous['scaler_scale']
+
+        # Все расстояния - в масштабе предыдущего запуска
+        prev_centers = (previous['centroids'] - prev_mean) / prev_scale
+        new_centers = (current['centroids'] - prev_mean) / prev_scale
+
+        distances = cdist(new_centers, prev_centers)
+        new_idx, prev_idx = linear_sum_assignment(distances)
+
+        # Сопоставление новых кластеров с треками; несопоставленные открывают новые треки
+        matched = np.full(len(new_centers), -1)
+        matched[new_idx] = prev_idx
+        track_ids = np.array([
+            previous['track_ids'][p] if p >= 0 else self._new_track() for p in matched
+        ])
+
+        centroid_shift = pd.DataFrame({
+            'track': track_ids[new_idx],
+            'previous_cluster': prev_idx,
+            'cluster': new_idx,
+            'shift': distances[new_idx, prev_idx]
+        })
+
+        scaler_shift = pd.Series(np.abs(current['scaler_mean'] - prev_mean) / prev_scale, index=FEATURE_COLUMNS)
+
+        # Поставщики, присутствующие в обоих запусках
+        prev_positions = pd.Index(previous['names']).get_indexer(current['names'])
+        common = np.flatnonzero(prev_positions >= 0)
+        prev_common = prev_positions[common]
+
+        prev_tracks = previous['track_ids'][previous['labels'][prev_common]]
+        new_tracks = track_ids[current['labels'][common]]
+        migrated = prev_tracks != new_tracks
+
+        movement = np.sqrt((((current['features'][common].astype(np.float64)
+                              - previous['features'][prev_common]) / prev_scale) ** 2).sum(axis=1))
+        supplier_movement = pd.DataFrame({
+            'supplier_name': current['names'][common],
+            'previous_track': prev_tracks,
+            'track': new_tracks,
+            'distance': movement,
+            'migrated': migrated
+        })
+
+        all_tracks = np.union1d(prev_tracks, new_tracks)
+        prev_codes = np.searchsorted(all_tracks, prev_tracks)
+        new_codes = np.searchsorted(all_tracks, new_tracks)
+        size = len(all_tracks)
+        migration = np.bincount(prev_codes * size + new_codes, minlength=size * size).reshape(size, size)
+        migration_matrix = pd.DataFrame(migration, index=pd.Index(all_tracks, name='previous_track'),
+                                        columns=pd.Index(all_tracks, name='track'))
+
+        migration_rate = float(migrated.mean()) if len(common) else 0.0
+
+        alerts = []
+        for _, row in centroid_shift[centroid_shift['shift'] > self.centroid_threshold].iterrows():
+            alerts.append(f"Центр кластера {int(row['track'])} сместился на {row['shift']:.2f} ст. откл.")
+        for feature, shift in scaler_shift[scaler_shift > self.scaler_threshold].items():
+            alerts.append(f"Среднее признака '{feature}' сместилось на {shift:.2f} ст. откл.")
+        if migration_rate > self.migration_threshold:
+            alerts.append(f"Кластер сменили {migration_rate:.0%} поставщиков")
+        if len(new_centers) != len(prev_centers):
+            alerts.append(f"Количество кластеров изменилось: {len(prev_centers)} -> {len(new_centers)}")
+
+        return {
+            'track_ids': track_ids,
+            'centroid_shift': centroid_shift,
+            'scaler_shift': scaler_shift,
+            'migration_matrix': migration_matrix,
+            'migration_rate': migration_rate,
+            'supplier_movement': supplier_movement,
+            'alerts': alerts,
+            'needs_refit': bool(alerts)
+        }
+
+    def check_predict_only(self, solver, df):
+        """
+        Проверка, допустимо ли отнести новые данные к кластерам без переобучения
+
+        Новые данные масштабируются обученным scaler; если их средние смещены больше
+        порога или ближайшие центры слишком далеки, требуется полная кластеризация.
+        """
+        scaled, names = solver.transform_features(df)
+        labels = solver.model.predict(scaled)
+
+        # В масштабированном пространстве среднее обучающей выборки равно 0, а отклонение - 1
+        scaler_shift = pd.Series(np.abs(scaled.mean(axis=0)), index=FEATURE_COLUMNS)
+        center_distance = np.sqrt(((scaled - solver.model.cluster_centers_[labels]) ** 2).sum(axis=1))
+        train_distance = np.sqrt(solver.model.inertia_ / len(solver.labels))
+
+        needs_refit = bool((scaler_shift > self.scaler_threshold).any()
+                           or center_distance.mean() > (1 + self.centroid_threshold) * train_distance)
+
+        return {
+            'labels': labels,
+            'supplier_names': names,
+            'scaler_shift': scaler_shift,
+            'mean_center_distance': float(center_distance.mean()),
+            'train_center_distance': float(train_distance),
+            'needs_refit': needs_refit
+        }
+
+    def centroid_track(self, track):
+        """
+        История центра кластера (в исходных единицах) по всем запускам
+        """
+        return pd.DataFrame(self.tracks[track], columns=FEATURE_COLUMNS)
+
+    def save(self, path):
+        """
+        Сохранение истории запусков в файл .npz
+        """
+        arrays = {'next_track': np.array(self._next_track)}
+        for i, run in enumerate(self.history):
+            for key, value in run.items():
+                arrays[f'run{i}_{key}'] = value
+        for track, centers in self.tracks.items():
+            arrays[f'track{track}'] = np.array(centers)
+        np.savez_compressed(path, **arrays)
+
+    def load(self, path):
+        """
+        Загрузка истории запусков из файла .npz
+        """
+        with np.load(path) as data:
+            self._next_track = int(data['next_track'])
+            runs = {}
+            self.tracks = {}
+            for key in data.files:
+                if key.startswith('run'):
+                    index, name = key[3:].split('_', 1)
+                    runs.setdefault(int(index), {})[name] = data[key]
+                elif key.startswith('track'):
+                    self.tracks[int(key[5:])] = list(data[key])
+            self.history = [runs[i] for i in sorted(runs)]
+
+        return self
@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = [
+    'on_time_rate',
+    'price_mean',
+    'price_weighted',
+    'impurity_mean',
+    'impurity_std',
+    'impurity_max',
+    'delay_mean',
+    'delay_var',
+    'deliveries_count'
+]
+
+SUPPLIER_COLUMN = 'Поставщик'
+PLAN_DATE_COLUMN = 'Плановая_дата'
+FACT_DATE_COLUMN = 'Фактическая_дата'
+PRICE_COLUMN = 'Цена (руб/т)'
+VOLUME_COLUMN = 'Объем (т)'
+IMPURITY_COLUMN = 'Содержание примесей (%)'
+
+
+class SupplierFeatureBuilder:
+    def __init__(self, date_format='%d.%m.%Y'):
+        """
+        Накопление признаков поставщиков из сырых журналов поставок, цен и лабораторных анализов
+
+        Записи можно подавать порциями: для каждой порции поставщики кодируются через
+        категории, а суммы накапливаются в массивах по коду поставщика (np.bincount).
+        Записи без поставщика (пустое значение) пропускаются; их число - skipped_records.
+        """
+        self.date_format = date_format
+        self._codes = {}
+        self._names = []
+        self._sums = {}
+        self.skipped_records = 0
+
+    def _with_supplier(self, chunk):
+        """
+        Записи порции с указанным поставщиком
+        """
+        suppliers = chunk[SUPPLIER_COLUMN]
+        present = suppliers.notna().to_numpy() & (suppliers.astype(str).str.strip() != '').to_numpy()
+        self.skipped_records += int((~present).sum())
+        return chunk if present.all() else chunk[present]
+
+    def _encode(self, suppliers):
+        """
+        Глобальные коды поставщиков для порции записей (все поставщики должны быть указаны)
+        """
+        categorical = pd.Categorical(suppliers)
+        if (categorical.codes < 0).any():
+            raise ValueError("В записях есть пустые значения поставщика")
+        mapping = np.empty(len(categorical.categories), dtype=np.int64)
+        for i, name in enumerate(categorical.categories):
+            if name not in self._codes:
+                self._codes[name] = len(self._names)
+                self._names.append(name)
+            mapping[i] = self._codes[name]
+
+        return mapping[categorical.codes]
+
+    def _add(self, key, codes, weights=None):
+        """
+        Добавление сумм по поставщикам к накопителю key
+        """
+        values = np.bincount(codes, weights=weights, minlength=len(self._names))
+        current = self._sums.get(key)
+        if current is None:
+            self._sums[key] = values
+        else:
+            if len(current) < len(values):
+                current = np.concatenate([current, np.zeros(len(values) - len(current))])
+            current[:len(values)] += values
+            self._sums[key] = current
+
+    def _add_max(self, key, codes, values):
+        """
+        Обновление максимума по поставщикам
+        """
+        current = self._sums.get(key)
+        size = len(self._names)
+        if current is None:
+            current = np.full(size, -np.inf)
+        elif len(current) < size:
+            current = np.concatenate([current, np.full(size - len(current), -np.inf)])
+        np.maximum.at(current, codes, values)
+        self._sums[key] = current
+
+    def add_deliveries(self, chunk):
+        """
+        Порция журнала поставок: поставщик, плановая и фактическая даты
+        """
+        chunk = self._with_supplier(chunk)
+        codes = self._encode(chunk[SUPPLIER_COLUMN])
+        plan = pd.to_datetime(chunk[PLAN_DATE_COLUMN], format=self.date_format, errors='coerce')
+        fact = pd.to_datetime(chunk[FACT_DATE_COLUMN], format=self.date_format, errors='coerce')
+        delays = (fact - plan).dt.days.to_numpy(dtype=np.float64)
+
+        if np.isnan(delays).any():
+            raise ValueError(f"Некорректный формат дат. Ожидается формат: {self.date_format}")
+
+        self._add('deliveries', codes)
+        self._add('on_time', codes, (delays <= 0).astype(np.float64))
+        self._add('delay_sum', codes, delays)
+        self._add('delay_sumsq', codes, delays ** 2)
+
+    def add_prices(self, chunk):
+        """
+        Порция закупочных цен: поставщик, цена за тонну и (необязательно) объем партии
+        """
+        chunk = self._with_supplier(chunk)
+        codes = self._encode(chunk[SUPPLIER_COLUMN])
+        prices = chunk[PRICE_COLUMN].to_numpy(dtype=np.float64)
+        if VOLUME_COLUMN in chunk.columns:
+            volumes = chunk[VOLUME_COLUMN].to_numpy(dtype=np.float64)
+        else:
+            volumes = np.ones(len(prices))
+
+        self._add('price_count', codes)
+        self._add('price_sum', codes, prices)
+        self._add('volume_sum', codes, volumes)
+        self._add('price_volume_sum', codes, prices * volumes)
+
+    def add_lab(self, chunk):
+        """
+        Порция лабораторных анализов: поставщик и содержание примесей
+        """
+        chunk = self._with_supplier(chunk)
+        codes = self._encode(chunk[SUPPLIER_COLUMN])
+        impurity = chunk[IMPURITY_COLUMN].to_numpy(dtype=np.float64)
+
+        self._add('lab_count', codes)
+        self._add('impurity_sum', codes, impurity)
+        self._add('impurity_sumsq', codes, impurity ** 2)
+        self._add_max('impurity_max', codes, impurity)
+
+    def _get(self, key, fill=0.0):
+        """
+        Накопитель, дополненный до текущего количества поставщиков
+        """
+        size = len(self._names)
+        values = self._sums.get(key, np.zeros(0))
+        if len(values) < size:
+            values = np.concatenate([values, np.full(size - len(values), fill)])
+        return values
+
+    def build(self):
+        """
+        Итоговая матрица признаков (C-порядок, float64) и названия поставщиков
+
+        Колонки матрицы - FEATURE_COLUMNS. Для поставщиков без данных в одном из
+        журналов соответствующие признаки равны NaN.
+        """
+        size = len(self._names)
+        matrix = np.empty((size, len(FEATURE_COLUMNS)), dtype=np.float64)
+
+        deliveries = self._get('deliveries')
+        price_count = self._get('price_count')
+        volume_sum = self._get('volume_sum')
+        lab_count = self._get('lab_count')
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delay_mean = self._get('delay_sum') / deliveries
+            matrix[:, 0] = self._get('on_time') / deliveries * 100.0
+            matrix[:, 1] = self._get('price_sum') / price_count
+            matrix[:, 2] = self._get('price_volume_sum') / volume_sum
+            impurity_mean = self._get('impurity_sum') / lab_count
+            matrix[:, 3] = impurity_mean
+            matrix[:, 4] = np.sqrt(np.maximum(
+                (self._get('impurity_sumsq') - lab_count * impurity_mean ** 2) / (lab_count - 1), 0))
+            matrix[:, 6] = delay_mean
+            matrix[:, 7] = np.maximum(
+                (self._get('delay_sumsq') - deliveries * delay_mean ** 2) / (deliveries - 1), 0)
+
+        impurity_max = self._get('impurity_max', fill=-np.inf)
+        matrix[:, 5] = np.where(np.isfinite(impurity_max), impurity_max, np.nan)
+        matrix[:, 8] = deliveries
+
+        # Выборочная дисперсия не определена при одной записи
+        matrix[lab_count < 2, 4] = np.nan
+        matrix[deliveries < 2, 7] = np.nan
+
+        return np.array(self._names, dtype=object), matrix
+
+
+def _read(source, columns, chunksize):
+    """
+    Порции записей из DataFrame или CSV-файла (разделитель ';')
+    """
+    if isinstance(source, pd.DataFrame):
+        yield source
+    else:
+        header = pd.read_csv(source, sep=';', encoding='utf-8-sig', nrows=0).columns
+        usecols = [column for column in columns if column in header]
+        yield from pd.read_csv(source, sep=';', encoding='utf-8-sig', usecols=usecols, chunksize=chunksize)
+
+
+def build_supplier_features(deliveries, prices=None, lab=None, chunksize=100_000):
+    """
+    Признаки поставщиков по сырым журналам за один проход по каждому источнику
+
+    Источники - DataFrame или пути к CSV-файлам; файлы читаются порциями по chunksize строк.
+    Возвращает названия поставщиков и матрицу признаков FEATURE_COLUMNS.
+    """
+    builder = SupplierFeatureBuilder()
+
+    for chunk in _read(deliveries, [SUPPLIER_COLUMN, PLAN_DATE_COLUMN, FACT_DATE_COLUMN], chunksize):
+        builder.add_deliveries(chunk)
+    if prices is not None:
+        for chunk in _read(prices, [SUPPLIER_COLUMN, PRICE_COLUMN, VOLUME_COLUMN], chunksize):
+            builder.add_prices(chunk)
+    if lab is not None:
+        for chunk in _read(lab, [SUPPLIER_COLUMN, IMPURITY_COLUMN], chunksize):
+            builder.add_lab(chunk)
+
+    return builder.build()
+
+
+def to_clustering_frame(names, matrix, dropna=True):
+    """
+    Таблица с колонками, которые ожидает ClusteringSolver.perform_clustering
+
+    Цена берется средневзвешенной по объему, примеси - средние по анализам.
+    При dropna=True поставщики без полного набора данных исключаются.
+    """
+    frame = pd.DataFrame({
+        'Название поставщика': names,
+        'Коэффициент выполнения поставок в срок (%)': matrix[:, 0],
+        'Стоимость 1 тонны песка (руб)': matrix[:, 2],
+        'Содержание примесей (%)': matrix[:, 3]
+    })
+
+    if dropna:
+        frame = frame.dropna().reset_index(drop=True)
+
+    return frame
@@ -0,0 +1,275 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from autoTasks.Task3 import (HIGHS_AVAILABLE, HIGHS_STATUS, MAX_REPORTED_CELLS, NAME_COLUMN, TYPE_COLUMN,
+                             _bad_cells, _to_numeric_block, parse_transportation_dataframe)
+
+if HIGHS_AVAILABLE:
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+
+COMMODITY_COLUMN = 'Материал'
+# Строки общей пропускной способности маршрутов (по всем материалам) в формате строк 'Стоимость'
+CAPACITY_TYPE = 'Пропускная способность'
+
+
+def parse_multicommodity_dataframe(df):
+    """
+    Разбор данных по нескольким материалам: исходный формат с дополнительным столбцом 'Материал'
+
+    Строки каждого материала разбираются как обычная транспортная задача; поставщики и
+    производства объединяются, отсутствующие у материала маршруты недоступны (NaN),
+    а мощности - нулевые. Строки типа 'Пропускная способность' (без материала) задают
+    общую для всех материалов пропускную способность маршрутов; пустая ячейка - маршрут
+    без ограничения, нечисловые и отрицательные значения и неизвестные поставщики - ошибки.
+    """
+    if COMMODITY_COLUMN not in df.columns:
+        return {'errors': [f"Отсутствует колонка '{COMMODITY_COLUMN}'"]}
+
+    types = df[TYPE_COLUMN].astype(str).str.strip()
+    capacity_rows = df[types == CAPACITY_TYPE].drop(columns=COMMODITY_COLUMN)
+    commodity_rows = df[types != CAPACITY_TYPE]
+    commodity_labels = commodity_rows[COMMODITY_COLUMN].astype(str).str.strip()
+    commodity_names = pd.unique(commodity_labels).tolist()
+
+    errors = []
+    parsed = {}
+    for name in commodity_names:
+        part = commodity_rows[commodity_labels == name].drop(columns=COMMODITY_COLUMN)
+        parsed[name] = parse_transportation_dataframe(part.reset_index(drop=True))
+        errors.extend(f"{name}: {error}" for error in parsed[name]['errors'])
+    if errors:
+        return {'errors': errors}
+
+    supply_names = pd.unique(np.concatenate([parsed[k]['supply_names'] for k in commodity_names])).tolist()
+    demand_names = pd.unique(np.concatenate([parsed[k]['demand_names'] for k in commodity_names])).tolist()
+    K, m, n = len(commodity_names), len(supply_names), len(demand_names)
+
+    costs = np.full((K, m, n), np.nan)
+    supply = np.zeros((K, m))
+    demand = np.zeros((K, n))
+    for k, name in enumerate(commodity_names):
+        rows = pd.Index(supply_names).get_indexer(parsed[name]['supply_names'])
+        cols = pd.Index(demand_names).get_indexer(parsed[name]['demand_names'])
+        costs[k][np.ix_(rows, cols)] = parsed[name]['costs']
+        supply[k, rows] = parsed[name]['supply']
+        demand[k, cols] = parsed[name]['demand']
+
+    arc_capacity = None
+    if len(capacity_rows):
+        capacity_names = capacity_rows[NAME_COLUMN].astype(str).str.strip()
+        duplicated = capacity_names[capacity_names.duplicated()]
+        if len(duplicated):
+            return {'errors': [f"Повторяющиеся поставщики в строках типа \"{CAPACITY_TYPE}\": "
+                               f"{list(pd.unique(duplicated))}"]}
+
+        unknown = ~capacity_names.isin(supply_names)
+        if unknown.any():
+            rows = ', '.join(f"{df.index.get_loc(label) + 2} ({name})"
+                             for label, name in capacity_names[unknown].iloc[:MAX_REPORTED_CELLS].items())
+            errors.append(f"Неизвестные поставщики в строках типа \"{CAPACITY_TYPE}\": {rows}")
+
+        # Пустая ячейка - маршрут без ограничения; остальные значения должны быть неотрицательными числами
+        block = capacity_rows[demand_names]
+        raw = pd.DataFrame(block.to_numpy(dtype=object)).astype(str).apply(lambda col: col.str.strip())
+        empty = (block.isna().to_numpy() | raw.isin(['', 'nan']).to_numpy())
+        numeric = _to_numeric_block(block)
+        bad_cells = _bad_cells(df, capacity_rows.index, demand_names, np.where(empty, 0.0, numeric))
+        if bad_cells:
+            errors.append("Некорректная пропускная способность (ожидается неотрицательное число "
+                          "или пустая ячейка): " + '; '.join(bad_cells))
+        if errors:
+            return {'errors': errors}
+
+        arc_capacity = np.full((m, n), np.inf)
+        rows = pd.Index(supply_names).get_indexer(capacity_names)
+        arc_capacity[rows] = np.where(empty, np.inf, numeric)
+
+    return {
+        'costs': costs,
+        'supply': supply,
+        'demand': demand,
+        'arc_capacity': arc_capacity,
+        'commodity_names': commodity_names,
+        'supply_names': supply_names,
+        'demand_names': demand_names,
+        'errors': []
+    }
+
+
+def commodity_groups(costs, arc_capacity=None):
+    """
+    Группы материалов, связанных общими ограниченными маршрутами
+
+    Материалы объединяются, если оба могут идти по одному маршруту с конечной пропускной
+    способностью. Материалы разных групп решаются независимо.
+    """
+    K = costs.shape[0]
+    if arc_capacity is None:
+        return [[k] for k in range(K)]
+
+    capacitated = np.isfinite(arc_capacity)
+    # Материалы x ограниченные маршруты, по которым материал может идти
+    uses = (~np.isnan(costs))[:, capacitated]
+
+    parent = list(range(K))
+
+    def find(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    for arc in np.flatnonzero(uses.sum(axis=0) > 1):
+        members = np.flatnonzero(uses[:, arc])
+        root = find(members[0])
+        for k in members[1:]:
+            parent[find(k)] = root
+
+    groups = {}
+    for k in range(K):
+        groups.setdefault(find(k), []).append(k)
+    return list(groups.values())
+
+
+def _solve_commodity_group(costs, supply, demand, arc_capacity, shortage_cost):
+    """
+    Совместная задача для группы материалов (HiGHS, разреженные матрицы)
+
+    Переменные x[g, i, j] с номером (g * m + i) * n + j, затем недопоставки s[g, j]
+    (только при заданной стоимости недопоставки). Ограничения: мощности (строка g * m + i)
+    и пропускная способность ограниченных маршрутов - неравенства, спрос (строка g * n + j) - равенство.
+    """
+    G, m, n = costs.shape
+    n_flows = G * m * n
+    flows = np.arange(n_flows)
+    arc = flows % (m * n)
+
+    # Мощности поставщиков
+    rows = [flows // n]
+    cols = [flows]
+    n_ub = G * m
+    b_ub = [supply.ravel()]
+
+    # Общая пропускная способность ограниченных маршрутов
+    if arc_capacity is not None:
+        capacitated = np.flatnonzero(np.isfinite(arc_capacity).ravel())
+        arc_row = np.full(m * n, -1)
+        arc_row[capacitated] = np.arange(len(capacitated))
+        shared = arc_row[arc] >= 0
+        rows.append(n_ub + arc_row[arc[shared]])
+        cols.append(flows[shared])
+        n_ub += len(capacitated)
+        b_ub.append(arc_capacity.ravel()[capacitated])
+
+    n_shortage = G * n if shortage_cost is not None else 0
+    n_vars = n_flows + n_shortage
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    A_ub = coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_ub, n_vars)).tocsr()
+
+    eq_rows = [(flows // (m * n)) * n + flows % n]
+    eq_cols = [flows]
+    if n_shortage:
+        eq_rows.append(np.arange(n_shortage))
+        eq_cols.append(n_flows + np.arange(n_shortage))
+    eq_rows, eq_cols = np.concatenate(eq_rows), np.concatenate(eq_cols)
+    A_eq = coo_matrix((np.ones(len(eq_rows)), (eq_rows, eq_cols)), shape=(G * n, n_vars)).tocsr()
+
+    available = ~np.isnan(costs).ravel()
+    c = np.concatenate([np.where(available, np.nan_to_num(costs).ravel(), 0.0),
+                        np.full(n_shortage, shortage_cost if n_shortage else 0.0)])
+    bounds = np.zeros((n_vars, 2))
+    bounds[:, 1] = np.inf
+    bounds[:n_flows, 1] = np.where(available, np.inf, 0.0)
+
+    res = linprog(c, A_ub=A_ub, b_ub=np.concatenate(b_ub), A_eq=A_eq, b_eq=demand.ravel(),
+                  bounds=bounds, method='highs')
+    status = HIGHS_STATUS.get(res.status, 'Not Solved')
+    if res.x is None:
+        return status, None, None
+
+    shortage = res.x[n_flows:].reshape(G, n) if n_shortage else np.zeros((G, n))
+    return status, res.x[:n_flows].reshape(G, m, n), shortage
+
+
+def solve_multicommodity_problem(costs, supply, demand, arc_capacity=None, shortage_cost=None, n_jobs=None,
+                                 commodity_names=None, supply_names=None, demand_names=None):
+    """
+    Транспортная задача для нескольких материалов с общей пропускной способностью маршрутов
+
+    costs - тензор затрат (материалы x поставщики x производства, NaN - маршрут недоступен),
+    supply - мощности (материалы x поставщики), demand - потребности (материалы x производства),
+    arc_capacity - общая пропускная способность маршрутов (inf - без ограничения),
+    shortage_cost - стоимость тонны недопоставки (None - спрос должен быть покрыт полностью).
+    Независимые группы материалов решаются параллельно в пуле процессов.
+    """
+    if not HIGHS_AVAILABLE:
+        raise ImportError("Для задачи с несколькими материалами требуется SciPy (решатель HiGHS)")
+
+    costs = np.asarray(costs, dtype=np.float64)
+    supply = np.asarray(supply, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+    if arc_capacity is not None:
+        arc_capacity = np.asarray(arc_capacity, dtype=np.float64)
+
+    K, m, n = costs.shape
+    if supply.shape != (K, m) or demand.shape != (K, n):
+        raise ValueError("Размеры мощностей и потребностей не совпадают с тензором затрат")
+
+    groups = commodity_groups(costs, arc_capacity)
+    tasks = [(costs[group], supply[group], demand[group], arc_capacity, shortage_cost) for group in groups]
+
+    n_jobs = min(n_jobs or os.cpu_count(), len(groups))
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            outcomes = list(executor.map(_solve_commodity_group, *zip(*tasks)))
+    else:
+        outcomes = [_solve_commodity_group(*task) for task in tasks]
+
+    flows = np.zeros((K, m, n))
+    shortage = np.zeros((K, n))
+    statuses = [None] * K
+    for group, (status, group_flows, group_shortage) in zip(groups, outcomes):
+        for position, k in enumerate(group):
+            statuses[k] = status
+            if group_flows is not None:
+                flows[k] = group_flows[position]
+                shortage[k] = group_shortage[position]
+
+    commodity_costs = (np.nan_to_num(costs) * flows).sum(axis=(1, 2))
+    arc_usage = flows.sum(axis=0)
+
+    failed = [status for status in statuses if status != 'Optimal']
+
+    return {
+        'flows': flows,
+        'shortage': shortage,
+        'commodity_costs': commodity_costs,
+        'total_cost': float(commodity_costs.sum()),
+        'statuses': statuses,
+        'status': failed[0] if failed else 'Optimal',
+        'groups': groups,
+        'arc_usage': arc_usage,
+        'arc_capacity': arc_capacity,
+        'commodity_names': commodity_names or [f"Материал {k + 1}" for k in range(K)],
+        'supply_names': supply_names,
+        'demand_names': demand_names
+    }
+
+
+def solve_multicommodity_from_dataframe(dataframe, shortage_cost=None, n_jobs=None):
+    """
+    Решение задачи с несколькими материалами по данным из DataFrame
+    """
+    parsed = parse_multicommodity_dataframe(dataframe)
+    if parsed['errors']:
+        raise ValueError('\n'.join(parsed['errors']))
+
+    return solve_multicommodity_problem(
+        parsed['costs'], parsed['supply'], parsed['demand'], parsed['arc_capacity'],
+        shortage_cost=shortage_cost, n_jobs=n_jobs, commodity_names=parsed['commodity_names'],
+        supply_names=parsed['supply_names'], demand_names=parsed['demand_names']
+    )
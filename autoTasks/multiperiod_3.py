@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+from autoTasks.Task3 import (HIGHS_AVAILABLE, HIGHS_STATUS, MAX_REPORTED_CELLS, PLANT_COLUMN, SUPPLIER_COLUMN,
+                             TYPE_COLUMN, VALUE_COLUMN)
+
+if HIGHS_AVAILABLE:
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+
+WEEK_COLUMN = 'Неделя'
+
+# Стоимость: поставщик, производство (неделя - необязательно, без нее - на весь горизонт)
+# Мощность: поставщик (неделя - необязательно); Спрос: производство, неделя
+# Склад, Запас, Хранение: производство - вместимость силоса, начальный запас, стоимость хранения т/нед.
+MULTIPERIOD_ROW_TYPES = ('Стоимость', 'Мощность', 'Спрос', 'Склад', 'Запас', 'Хранение')
+
+
+def parse_multiperiod_dataframe(df):
+    """
+    Разбор данных многопериодной транспортной задачи в длинном формате
+
+    Каждая строка - одно значение: тип, неделя, поставщик, производство, значение.
+    Значения без недели действуют на всех неделях (недельные значения их переопределяют).
+    Маршрут без стоимости считается недоступным, неделя без мощности или спроса - нулевой,
+    производство без строки 'Склад' - без ограничения вместимости.
+    Возвращает словарь с массивами (недели x поставщики x производства) и списком ошибок.
+    """
+    required = (TYPE_COLUMN, WEEK_COLUMN, SUPPLIER_COLUMN, PLANT_COLUMN, VALUE_COLUMN)
+    missing_columns = [col for col in required if col not in df.columns]
+    if missing_columns:
+        return {'errors': [f"Отсутствуют обязательные колонки: {missing_columns}"]}
+
+    errors = []
+    type_codes = pd.Categorical(df[TYPE_COLUMN].astype(str).str.strip(), categories=MULTIPERIOD_ROW_TYPES).codes
+    values = pd.to_numeric(df[VALUE_COLUMN].astype(str).str.strip().str.replace(',', '.', regex=False),
+                           errors='coerce').to_numpy(dtype=np.float64)
+    weeks_raw = pd.to_numeric(df[WEEK_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+    suppliers_raw = df[SUPPLIER_COLUMN].where(df[SUPPLIER_COLUMN].notna(), '').astype(str).str.strip().to_numpy()
+    plants_raw = df[PLANT_COLUMN].where(df[PLANT_COLUMN].notna(), '').astype(str).str.strip().to_numpy()
+
+    def report(mask, message):
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            listed = ', '.join(str(i + 2) for i in rows[:MAX_REPORTED_CELLS])
+            more = f" ... и еще {len(rows) - MAX_REPORTED_CELLS}" if len(rows) > MAX_REPORTED_CELLS else ''
+            errors.append(f"{message} в строках: {listed}{more}")
+
+    has_supplier = suppliers_raw != ''
+    has_plant = plants_raw != ''
+    has_week = ~np.isnan(weeks_raw)
+    needs_supplier = np.isin(type_codes, (0, 1))
+    needs_plant = np.isin(type_codes, (0, 2, 3, 4, 5))
+
+    report(type_codes < 0, f"Неизвестный тип строки (ожидается {', '.join(MULTIPERIOD_ROW_TYPES)})")
+    report(np.isnan(values) | (values < 0), "Некорректное значение (ожидается неотрицательное число)")
+    report(needs_supplier & ~has_supplier, "Не указан поставщик")
+    report(needs_plant & ~has_plant, "Не указано производство")
+    report((type_codes == 2) & ~has_week, "Не указана неделя спроса")
+    report(has_week & ((weeks_raw != np.round(weeks_raw)) | (weeks_raw < 0)), "Некорректный номер недели")
+
+    if errors:
+        return {'errors': errors}
+
+    # Справочники в порядке первого появления, недели - по возрастанию
+    supplier_names = pd.unique(suppliers_raw[needs_supplier]).tolist()
+    plant_names = pd.unique(plants_raw[needs_plant]).tolist()
+    week_numbers = np.unique(weeks_raw[has_week]).astype(np.int64)
+    if not supplier_names or not plant_names or not len(week_numbers):
+        return {'errors': ["Нужны хотя бы один поставщик, одно производство и одна неделя"]}
+
+    T, m, n = len(week_numbers), len(supplier_names), len(plant_names)
+    i = pd.Categorical(suppliers_raw, categories=supplier_names).codes
+    j = pd.Categorical(plants_raw, categories=plant_names).codes
+    t = np.searchsorted(week_numbers, np.nan_to_num(weeks_raw))
+
+    def weekly(code, shape, index):
+        """Значения по неделям: сначала строки без недели на весь горизонт, затем недельные"""
+        table = np.full((T,) + shape, np.nan)
+        rows = type_codes == code
+        static, timed = rows & ~has_week, rows & has_week
+        table[(slice(None),) + tuple(ix[static] for ix in index)] = values[static]
+        table[(t[timed],) + tuple(ix[timed] for ix in index)] = values[timed]
+        return table
+
+    costs = weekly(0, (m, n), (i, j))
+    supply = np.nan_to_num(weekly(1, (m,), (i,)))
+    demand = np.nan_to_num(weekly(2, (n,), (j,)))
+
+    def per_plant(code, default):
+        table = np.full(n, default, dtype=np.float64)
+        rows = type_codes == code
+        table[j[rows]] = values[rows]
+        return table
+
+    return {
+        'costs': costs,
+        'supply': supply,
+        'demand': demand,
+        'silo_capacity': per_plant(3, np.inf),
+        'initial_stock': per_plant(4, 0.0),
+        'holding_cost': per_plant(5, 0.0),
+        'weeks': week_numbers.tolist(),
+        'supply_names': supplier_names,
+        'demand_names': plant_names,
+        'errors': []
+    }
+
+
+def build_multiperiod_matrices(T, m, n):
+    """
+    Разреженные матрицы ограничений развернутой во времени сети
+
+    Переменные: поставки x[t, i, j] с номером (t * m + i) * n + j, затем запасы на конец
+    недели I[t, j] с номером T * m * n + t * n + j. A_ub - мощности поставщиков по неделям
+    (строка t * m + i), A_eq - баланс производств (строка t * n + j):
+    поставки + запас прошлой недели - запас этой недели = спрос.
+    """
+    n_flows = T * m * n
+    flows = np.arange(n_flows)
+    stocks = np.arange(T * n)
+    stock_week = stocks // n
+
+    A_ub = coo_matrix((np.ones(n_flows), (flows // n, flows)), shape=(T * m, n_flows + T * n)).tocsr()
+
+    # Поставки в баланс своей недели и производства
+    flow_rows = (flows // (m * n)) * n + flows % n
+    # Запас уходит из баланса своей недели и приходит в баланс следующей
+    carried = stocks[stock_week < T - 1]
+    rows = np.concatenate([flow_rows, stocks, carried + n])
+    cols = np.concatenate([flows, n_flows + stocks, n_flows + carried])
+    data = np.concatenate([np.ones(n_flows), -np.ones(T * n), np.ones(len(carried))])
+    A_eq = coo_matrix((data, (rows, cols)), shape=(T * n, n_flows + T * n)).tocsr()
+
+    return A_ub, A_eq
+
+
+def solve_multiperiod_problem(dataframe):
+    """
+    Многопериодное планирование поставок с запасами на производствах (HiGHS, разреженные матрицы)
+
+    Возвращает поставки (недели x поставщики x производства), запасы на конец недель,
+    стоимость перевозки и хранения и таблицу ненулевых поставок в длинном формате.
+    """
+    if not HIGHS_AVAILABLE:
+        raise ImportError("Для многопериодного планирования требуется SciPy (решатель HiGHS)")
+
+    parsed = parse_multiperiod_dataframe(dataframe)
+    if parsed['errors']:
+        raise ValueError('\n'.join(parsed['errors']))
+
+    costs = parsed['costs']
+    T, m, n = costs.shape
+    n_flows = T * m * n
+
+    A_ub, A_eq = build_multiperiod_matrices(T, m, n)
+    b_ub = parsed['supply'].ravel()
+    b_eq = parsed['demand'].ravel().copy()
+    b_eq[:n] -= parsed['initial_stock']
+
+    # Недоступные маршруты - переменные с верхней границей 0
+    available = ~np.isnan(costs).ravel()
+    c = np.concatenate([np.where(available, np.nan_to_num(costs).ravel(), 0.0),
+                        np.tile(parsed['holding_cost'], T)])
+    bounds = np.zeros((n_flows + T * n, 2))
+    bounds[:n_flows, 1] = np.where(available, np.inf, 0.0)
+    bounds[n_flows:, 1] = np.tile(parsed['silo_capacity'], T)
+
+    res = linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
+    status = HIGHS_STATUS.get(res.status, 'Not Solved')
+
+    solution_data = {
+        'weeks': parsed['weeks'],
+        'supply_names': parsed['supply_names'],
+        'demand_names': parsed['demand_names'],
+        'supply': parsed['supply'],
+        'demand': parsed['demand'],
+        'status': status,
+        'flows': None,
+        'stock': None,
+        'total_cost': None,
+        'transport_cost': None,
+        'holding_cost': None,
+        'deliveries': None
+    }
+    if res.x is None:
+        return solution_data
+
+    flows = res.x[:n_flows].reshape(T, m, n)
+    stock = res.x[n_flows:].reshape(T, n)
+    t, i, j = np.nonzero(flows > 1e-9)
+    weeks = np.asarray(parsed['weeks'])
+
+    solution_data.update({
+        'flows': flows,
+        'stock': stock,
+        'total_cost': res.fun,
+        'transport_cost': float(c[:n_flows] @ res.x[:n_flows]),
+        'holding_cost': float(c[n_flows:] @ res.x[n_flows:]),
+        'deliveries': pd.DataFrame({
+            WEEK_COLUMN: weeks[t],
+            SUPPLIER_COLUMN: np.asarray(parsed['supply_names'], dtype=object)[i],
+            PLANT_COLUMN: np.asarray(parsed['demand_names'], dtype=object)[j],
+            'Объем, т.': flows[t, i, j]
+        })
+    })
+
+    return solution_data
@@ -0,0 +1,226 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from autoTasks.Task3 import parse_transportation_dataframe
+from autoTasks.simplex_3 import TransportationSimplex
+
+# Доля второго критерия в крайних точках, чтобы из равных по основному критерию планов
+# выбирался недоминируемый
+TIE_BREAK = 1e-6
+
+
+def delay_risk_from_model(model, supplier_names, default=1.0):
+    """
+    Риск задержки поставщиков по модели Task1: 1 - оценка надежности / 100
+
+    Поставщики без истории поставок получают риск default.
+    """
+    risk = np.full(len(supplier_names), default, dtype=np.float64)
+    for i, name in enumerate(supplier_names):
+        statistics = model.get_supplier_statistics(name)
+        if statistics:
+            risk[i] = 1.0 - statistics['reliability_score'] / 100
+    return risk
+
+
+def impurity_risk_from_dataframe(df, supplier_names, default=None):
+    """
+    Доля примесей поставщиков по данным Task2 ('Название поставщика', 'Содержание примесей (%)')
+
+    Поставщики без данных получают default (по умолчанию - наибольшую долю примесей по данным).
+    """
+    impurity = (pd.to_numeric(df['Содержание примесей (%)'], errors='coerce') / 100).groupby(
+        df['Название поставщика'].astype(str).str.strip()).mean()
+    risk = impurity.reindex(supplier_names).to_numpy(dtype=np.float64)
+    return np.where(np.isnan(risk), impurity.max() if default is None else default, risk)
+
+
+def _solve_weight_chunk(costs, risk, supply, demand, cost_scale, risk_scale, weights):
+    """
+    Порция весов по возрастанию: каждая точка решается от базиса соседней
+
+    Целевая функция точки: (1 - w) * стоимость / cost_scale + w * риск / risk_scale.
+    Если пересчет от базиса не дал оптимума, точка решается заново с начального плана.
+    """
+    solver = None
+    points = []
+    for weight in weights:
+        combined = (1 - weight) / cost_scale * costs + weight / risk_scale * risk
+        if solver is not None:
+            solver.resolve(combined)
+        if solver is None or solver.status != 'Optimal':
+            solver = TransportationSimplex(combined, supply, demand).solve()
+        flows = solver.flows.copy()
+        points.append((weight, solver.status, float((costs * flows).sum()), float((risk * flows).sum()), flows))
+    return points
+
+
+class ParetoFrontierSolver:
+    def __init__(self, costs, supply, demand, supplier_risk, n_jobs=None, tol=1e-6):
+        """
+        Фронт Парето «стоимость - надежность» для транспортной задачи
+
+        supplier_risk - штраф на тонну груза поставщика (риск задержки, доля примесей) или
+        матрица штрафов по маршрутам. Риск плана - сумма штрафов по всем поставкам.
+        Задача с суммой критериев с весом остается транспортной, поэтому точки решаются
+        симплекс-методом, и каждая следующая точка порции стартует от базиса соседней.
+        """
+        self.costs = np.asarray(costs, dtype=np.float64)
+        self.supply = np.asarray(supply, dtype=np.float64)
+        self.demand = np.asarray(demand, dtype=np.float64)
+        supplier_risk = np.asarray(supplier_risk, dtype=np.float64)
+        if supplier_risk.ndim == 1:
+            supplier_risk = supplier_risk[:, None]
+        self.risk = np.ascontiguousarray(np.broadcast_to(supplier_risk, self.costs.shape))
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.tol = tol
+
+    def _extremes(self):
+        """
+        Планы наименьшей стоимости и наименьшего риска (с малым весом второго критерия)
+        """
+        cost_scale = max(np.abs(self.costs).max(), 1.0)
+        risk_scale = max(np.abs(self.risk).max(), 1e-12)
+        cheapest = _solve_weight_chunk(self.costs, self.risk, self.supply, self.demand,
+                                       cost_scale, risk_scale, [TIE_BREAK])[0]
+        safest = _solve_weight_chunk(self.costs, self.risk, self.supply, self.demand,
+                                     cost_scale, risk_scale, [1 - TIE_BREAK])[0]
+        return cheapest, safest
+
+    def _solve_weights(self, weights, cost_scale, risk_scale):
+        """
+        Веса делятся на непрерывные порции по числу процессов; порции решаются параллельно
+        """
+        chunks = [chunk for chunk in np.array_split(np.sort(weights), self.n_jobs) if len(chunk)]
+        tasks = [(self.costs, self.risk, self.supply, self.demand, cost_scale, risk_scale, chunk)
+                 for chunk in chunks]
+        if len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+                outcomes = list(executor.map(_solve_weight_chunk, *zip(*tasks)))
+        else:
+            outcomes = [_solve_weight_chunk(*task) for task in tasks]
+        return [point for outcome in outcomes for point in outcome]
+
+    def _pareto_filter(self, points):
+        """
+        Недоминируемые точки по возрастанию стоимости (совпадающие точки объединяются)
+
+        Точки без оптимального решения отбрасываются и учитываются в self.n_failed.
+        """
+        self.n_failed += sum(point[1] != 'Optimal' for point in points)
+        points = sorted((point for point in points if point[1] == 'Optimal'), key=lambda p: (p[2], p[3]))
+        frontier = []
+        for point in points:
+            if not frontier or point[3] < frontier[-1][3] - self.tol * max(abs(frontier[-1][3]), 1.0):
+                frontier.append(point)
+        return frontier
+
+    def solve(self, n_points=21, refine_rounds=0):
+        """
+        Построение фронта перебором весов от 0 до 1
+
+        refine_rounds - раунды уточнения: для каждой пары соседних точек решается задача
+        с весом, при котором обе точки равноценны; новые вершины фронта добавляются, пока
+        они находятся. Фронт линейной задачи кусочно-линейный, поэтому после сходимости
+        уточнения найдены все его вершины, и plan_for_risk дает точный ответ для любого
+        ограничения на риск. 'n_failed' - число точек без оптимального решения; если оно
+        не равно нулю, часть вершин могла быть пропущена.
+        """
+        self.n_failed = 0
+        cheapest, safest = self._extremes()
+        if cheapest[1] != 'Optimal' or safest[1] != 'Optimal':
+            raise ValueError(f"Не удалось найти крайние точки фронта: {cheapest[1]}, {safest[1]}")
+        cost_scale = max(safest[2] - cheapest[2], self.tol)
+        risk_scale = max(cheapest[3] - safest[3], self.tol)
+
+        points = [cheapest, safest]
+        if risk_scale > self.tol and n_points > 2:
+            points += self._solve_weights(np.linspace(0, 1, n_points)[1:-1], cost_scale, risk_scale)
+        frontier = self._pareto_filter(points)
+
+        for _ in range(refine_rounds):
+            # Вес, при котором соседние точки имеют одинаковое значение целевой функции
+            weights = []
+            for left, right in zip(frontier[:-1], frontier[1:]):
+                slope = (right[2] - left[2]) / cost_scale / ((left[3] - right[3]) / risk_scale)
+                weights.append(slope / (1 + slope))
+            if not weights:
+                break
+            refined = self._pareto_filter(frontier + self._solve_weights(np.array(weights), cost_scale, risk_scale))
+            if len(refined) == len(frontier):
+                break
+            frontier = refined
+
+        self.frontier = frontier
+        return {
+            'points': pd.DataFrame({
+                'Вес надежности': [point[0] for point in frontier],
+                'Стоимость, руб.': [point[2] for point in frontier],
+                'Риск': [point[3] for point in frontier]
+            }),
+            'plans': [point[4] for point in frontier],
+            'cheapest_cost': cheapest[2],
+            'safest_risk': safest[3],
+            'n_failed': self.n_failed
+        }
+
+    def plan_for_risk(self, max_risk):
+        """
+        Самый дешевый план с риском не больше max_risk (ограничение epsilon)
+
+        Для линейной задачи это выпуклая комбинация соседних вершин фронта; точно,
+        если фронт построен с уточнением до сходимости.
+        """
+        frontier = self.frontier
+        if max_risk >= frontier[0][3]:
+            return frontier[0][4].copy()
+        if max_risk < frontier[-1][3] - self.tol:
+            raise ValueError(f"Риск меньше {frontier[-1][3]:.4g} недостижим")
+
+        for left, right in zip(frontier[:-1], frontier[1:]):
+            if right[3] <= max_risk:
+                share = (left[3] - max_risk) / (left[3] - right[3])
+                return (1 - share) * left[4] + share * right[4]
+        return frontier[-1][4].copy()
+
+
+def solve_pareto_frontier(dataframe, supplier_risk, n_points=21, refine_rounds=0, n_jobs=None):
+    """
+    Фронт Парето «стоимость - надежность» по данным транспортной задачи
+
+    supplier_risk - словарь {поставщик: штраф на тонну} или массив в порядке поставщиков
+    (см. delay_risk_from_model и impurity_risk_from_dataframe). Риск должен быть
+    неотрицательным числом для каждого поставщика.
+    """
+    parsed = parse_transportation_dataframe(dataframe)
+    if parsed['errors']:
+        raise ValueError('\n'.join(parsed['errors']))
+
+    if isinstance(supplier_risk, dict):
+        missing = [name for name in parsed['supply_names'] if name not in supplier_risk]
+        if missing:
+            raise ValueError(f"Нет оценки риска для поставщиков: {missing}")
+        supplier_risk = [supplier_risk[name] for name in parsed['supply_names']]
+
+    shape = np.shape(supplier_risk)
+    risk = pd.to_numeric(pd.Series(np.ravel(supplier_risk), dtype=object), errors='coerce').to_numpy(np.float64)
+    risk = risk.reshape(shape)
+    if not shape or shape[0] != len(parsed['supply_names']):
+        raise ValueError(f"Оценки риска должны быть заданы для {len(parsed['supply_names'])} поставщиков")
+    invalid = (~np.isfinite(risk) | (risk < 0)).reshape(shape[0], -1).any(axis=1)
+    if invalid.any():
+        names = [name for name, bad in zip(parsed['supply_names'], invalid) if bad]
+        raise ValueError(f"Риск должен быть неотрицательным числом, ошибка для поставщиков: {names}")
+    supplier_risk = risk
+
+    solver = ParetoFrontierSolver(parsed['costs'], parsed['supply'], parsed['demand'], supplier_risk, n_jobs=n_jobs)
+    frontier = solver.solve(n_points=n_points, refine_rounds=refine_rounds)
+    frontier.update({
+        'solver': solver,
+        'supply_names': parsed['supply_names'],
+        'demand_names': parsed['demand_names']
+    })
+    return frontier
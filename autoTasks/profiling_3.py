@@ -0,0 +1,193 @@
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Сколько последних решений хранить для сводки по запускам
+PROFILE_LOG_SIZE = 1000
+_profile_log = deque(maxlen=PROFILE_LOG_SIZE)
+
+# tracemalloc общий для процесса: он включается первым замеряемым этапом и выключается
+# последним (если был включен здесь), а пик сбрасывается, только когда других этапов нет
+_tracing_lock = threading.Lock()
+_tracing_phases = 0
+_tracing_owned = False
+
+# Итерации и время решателя из журнала CBC
+CBC_ITERATIONS_PATTERN = re.compile(r"-\s+(\d+) iterations")
+CBC_WALLCLOCK_PATTERN = re.compile(r"Wallclock seconds\):\s+([\d.]+)")
+
+
+def _rss_mb():
+    """
+    Текущий объем памяти процесса (МБ); без /proc - пиковый объем из resource
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+        except ImportError:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def new_profile(backend, trace_memory=False):
+    """
+    Запись профиля одного решения: этапы, размер модели, статус и итерации решателя
+
+    trace_memory - измерять пиковый объем выделенной Python-памяти по этапам (tracemalloc;
+    заметно замедляет построение модели PuLP). Без него по этапам записывается только
+    объем памяти процесса после этапа.
+    """
+    return {
+        'backend': backend,
+        'suppliers': None,
+        'plants': None,
+        'started': time.time(),
+        'phases': {},
+        'variables': None,
+        'constraints': None,
+        'nonzeros': None,
+        'status': None,
+        'iterations': None,
+        'solver_seconds': None,
+        'total_seconds': 0.0,
+        'trace_memory': trace_memory
+    }
+
+
+def _start_tracing():
+    """
+    Начало замера памяти этапа; возвращает объем выделенной памяти на старте
+    """
+    global _tracing_phases, _tracing_owned
+    with _tracing_lock:
+        if _tracing_phases == 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracing_owned = True
+            tracemalloc.reset_peak()
+        _tracing_phases += 1
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracing(base):
+    """
+    Конец замера памяти этапа; возвращает пик выделенной памяти сверх base (МБ)
+    """
+    global _tracing_phases, _tracing_owned
+    with _tracing_lock:
+        peak = (tracemalloc.get_traced_memory()[1] - base) / 2 ** 20
+        _tracing_phases -= 1
+        if _tracing_phases == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+        return peak
+
+
+@contextmanager
+def profile_phase(profile, name):
+    """
+    Замер этапа: время, память процесса после этапа и (при trace_memory) пик выделенной памяти
+
+    Повторные замеры этапа с тем же именем складываются. profile может быть None -
+    тогда замер не выполняется. tracemalloc учитывает весь процесс, поэтому при
+    одновременных этапах в других потоках пик включает и их память.
+    """
+    if profile is None:
+        yield
+        return
+
+    traced = profile['trace_memory']
+    if traced:
+        base = _start_tracing()
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak = _stop_tracing(base) if traced else None
+        previous = profile['phases'].get(name)
+        if previous is not None:
+            seconds += previous['seconds']
+            if previous['peak_mb'] is not None:
+                peak = max(peak, previous['peak_mb'])
+        profile['phases'][name] = {'seconds': seconds, 'rss_mb': _rss_mb(), 'peak_mb': peak}
+        profile['total_seconds'] = sum(phase['seconds'] for phase in profile['phases'].values())
+
+
+def parse_cbc_log(text):
+    """
+    Итерации симплекс-метода и время решателя (с) из журнала CBC
+    """
+    iterations = CBC_ITERATIONS_PATTERN.search(text)
+    wallclock = CBC_WALLCLOCK_PATTERN.search(text)
+    return (int(iterations.group(1)) if iterations else None,
+            float(wallclock.group(1)) if wallclock else None)
+
+
+def finish_profile(profile):
+    """
+    Запись профиля в журнал запусков
+
+    Запись в журнале - тот же словарь, поэтому этап отображения, замеренный позже,
+    тоже попадает в сводку и в total_seconds.
+    """
+    _profile_log.append(profile)
+    return profile
+
+
+def profile_log_dataframe():
+    """
+    Журнал запусков: одна строка на этап решения (доля - от суммы всех этапов запуска)
+    """
+    rows = []
+    for profile in list(_profile_log):
+        total = sum(phase['seconds'] for phase in profile['phases'].values())
+        for name, phase in profile['phases'].items():
+            rows.append({
+                'backend': profile['backend'],
+                'suppliers': profile['suppliers'],
+                'plants': profile['plants'],
+                'variables': profile['variables'],
+                'nonzeros': profile['nonzeros'],
+                'status': profile['status'],
+                'iterations': profile['iterations'],
+                'phase': name,
+                'seconds': phase['seconds'],
+                'share': phase['seconds'] / total if total else None,
+                'rss_mb': phase['rss_mb'],
+                'peak_mb': phase['peak_mb']
+            })
+    return pd.DataFrame(rows, columns=['backend', 'suppliers', 'plants', 'variables', 'nonzeros', 'status',
+                                       'iterations', 'phase', 'seconds', 'share', 'rss_mb', 'peak_mb'])
+
+
+def profile_summary(by=('backend', 'phase')):
+    """
+    Сводка журнала запусков: число запусков, среднее, медиана и максимум времени этапов
+    и средняя доля этапа во времени решения
+    """
+    log = profile_log_dataframe()
+    if log.empty:
+        return log
+    return log.groupby(list(by)).agg(
+        runs=('seconds', 'size'),
+        mean_seconds=('seconds', 'mean'),
+        median_seconds=('seconds', 'median'),
+        max_seconds=('seconds', 'max'),
+        mean_share=('share', 'mean'),
+        max_peak_mb=('peak_mb', 'max')
+    ).reset_index()
+
+
+def clear_profile_log():
+    _profile_log.clear()
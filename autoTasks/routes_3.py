@@ -0,0 +1,120 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from autoTasks.Task3 import AMOUNT_COLUMN, NAME_COLUMN, TYPE_COLUMN
+
+EARTH_RADIUS_KM = 6371.0
+
+# Сколько последних матриц затрат хранить в кэше
+COST_CACHE_SIZE = 8
+_cost_cache = OrderedDict()
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Расстояние по дуге большого круга (км) с поддержкой broadcasting
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class TariffModel:
+    def __init__(self, rate_per_km, loading_cost=0.0, bands=None, road_factor=1.3):
+        """
+        Тариф перевозки тонны груза
+
+        Стоимость = loading_cost + ставка * расстояние по дорогам, где расстояние по дорогам -
+        расстояние по прямой, умноженное на road_factor. bands - список пар
+        (верхняя граница диапазона в км, ставка за км): ставка диапазона, в который попадает
+        маршрут, применяется ко всему расстоянию; дальше последней границы - rate_per_km.
+        """
+        self.rate_per_km = float(rate_per_km)
+        self.loading_cost = float(loading_cost)
+        self.road_factor = float(road_factor)
+
+        bands = sorted(bands or [])
+        self.band_limits = np.array([limit for limit, _ in bands], dtype=np.float64)
+        self.band_rates = np.array([rate for _, rate in bands] + [self.rate_per_km], dtype=np.float64)
+
+    def key(self):
+        """
+        Параметры тарифа для ключа кэша
+        """
+        return (self.rate_per_km, self.loading_cost, self.road_factor,
+                tuple(self.band_limits), tuple(self.band_rates))
+
+    def cost(self, distance_km):
+        """
+        Стоимость тонны по расстоянию по прямой (массив любой формы)
+        """
+        road = distance_km * self.road_factor
+        rate = self.band_rates[np.searchsorted(self.band_limits, road)]
+        return self.loading_cost + rate * road
+
+
+def _location_key(supplier_coords, plant_coords, tariff):
+    digest = hashlib.sha1()
+    digest.update(supplier_coords.tobytes())
+    digest.update(plant_coords.tobytes())
+    return supplier_coords.shape, plant_coords.shape, digest.hexdigest(), tariff.key()
+
+
+def build_cost_matrix(supplier_coords, plant_coords, tariff, chunk_rows=2048, use_cache=True):
+    """
+    Матрица затрат на тонну (поставщики x производства) по координатам (широта, долгота)
+
+    Расстояния считаются broadcasting'ом по блокам из chunk_rows поставщиков, чтобы
+    промежуточные массивы не росли с размером задачи. Результат кэшируется по набору
+    координат и параметрам тарифа; возвращается копия матрицы из кэша.
+    """
+    supplier_coords = np.ascontiguousarray(supplier_coords, dtype=np.float64)
+    plant_coords = np.ascontiguousarray(plant_coords, dtype=np.float64)
+
+    key = _location_key(supplier_coords, plant_coords, tariff)
+    if use_cache and key in _cost_cache:
+        _cost_cache.move_to_end(key)
+        return _cost_cache[key].copy()
+
+    m, n = len(supplier_coords), len(plant_coords)
+    costs = np.empty((m, n))
+    plant_lat, plant_lon = plant_coords[None, :, 0], plant_coords[None, :, 1]
+    for start in range(0, m, chunk_rows):
+        block = supplier_coords[start:start + chunk_rows]
+        distance = haversine_km(block[:, 0, None], block[:, 1, None], plant_lat, plant_lon)
+        costs[start:start + len(block)] = tariff.cost(distance)
+
+    if use_cache:
+        _cost_cache[key] = costs
+        if len(_cost_cache) > COST_CACHE_SIZE:
+            _cost_cache.popitem(last=False)
+        costs = costs.copy()
+
+    return costs
+
+
+def build_transportation_dataframe(supplier_names, supplier_coords, supply,
+                                   plant_names, plant_coords, demand, tariff, decimals=2):
+    """
+    Данные транспортной задачи в формате Task3Csv.csv с затратами по координатам и тарифу
+
+    Результат можно сразу передать в solve_transportation_problem.
+    """
+    costs = np.round(build_cost_matrix(supplier_coords, plant_coords, tariff), decimals)
+    m, n = costs.shape
+
+    cost_rows = pd.DataFrame(costs, columns=list(plant_names))
+    cost_rows.insert(0, NAME_COLUMN, list(supplier_names))
+    cost_rows.insert(0, TYPE_COLUMN, 'Стоимость')
+    cost_rows[AMOUNT_COLUMN] = np.nan
+
+    amount_rows = pd.DataFrame({
+        TYPE_COLUMN: ['Мощность'] * m + ['Спрос'] * n,
+        NAME_COLUMN: list(supplier_names) + list(plant_names),
+        AMOUNT_COLUMN: np.concatenate([np.asarray(supply), np.asarray(demand)])
+    })
+
+    return pd.concat([cost_rows, amount_rows], ignore_index=True)
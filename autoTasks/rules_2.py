@@ -0,0 +1,89 @@
+import json
+import os
+
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'cluster_rules.json')
+
+OPERATORS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+}
+
+
+class ClusterRuleEngine:
+    def __init__(self, rules, default):
+        """
+        Векторизованная интерпретация кластеров и поставщиков по упорядоченному списку правил
+
+        Каждое правило - метка и список условий {feature, op, value[, relative_to]}.
+        Условия правила объединяются через И, срабатывает первое подходящее правило.
+        При relative_to='mean' порог равен value * среднее значение признака по таблице.
+        """
+        for rule in rules:
+            for condition in rule['conditions']:
+                if condition['op'] not in OPERATORS:
+                    raise ValueError(f"Неизвестный оператор в правиле '{rule['label']}': {condition['op']}")
+                if condition.get('relative_to') not in (None, 'mean'):
+                    raise ValueError(f"Неизвестная база сравнения в правиле '{rule['label']}': "
+                                     f"{condition['relative_to']}")
+
+        self.rules = rules
+        self.default = default
+        self.labels = np.array([rule['label'] for rule in rules] + [default], dtype=object)
+
+    @classmethod
+    def from_config(cls, path=DEFAULT_RULES_PATH):
+        """
+        Загрузка правил из JSON-файла конфигурации
+        """
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+
+        return cls(config['rules'], config['default'])
+
+    def label(self, table, suffix='', reference=None):
+        """
+        Метки для всех строк таблицы за один проход
+
+        table - DataFrame или словарь массивов признаков;
+        suffix - окончание названий колонок ('_mean' для статистики кластеров, '' для поставщиков);
+        reference - средние значения признаков для относительных порогов (по умолчанию - по таблице).
+        """
+        features = {condition['feature'] for rule in self.rules for condition in rule['conditions']}
+        columns = {feature: np.asarray(table[feature + suffix], dtype=np.float64) for feature in features}
+        means = dict(reference or {})
+        n = len(next(iter(columns.values())))
+
+        masks = []
+        for rule in self.rules:
+            mask = np.ones(n, dtype=bool)
+            for condition in rule['conditions']:
+                feature = condition['feature']
+                threshold = condition['value']
+                if condition.get('relative_to') == 'mean':
+                    if feature not in means:
+                        means[feature] = columns[feature].mean()
+                    threshold = threshold * means[feature]
+
+                mask &= OPERATORS[condition['op']](columns[feature], threshold)
+            masks.append(mask)
+
+        # Номер первого сработавшего правила, иначе - метка по умолчанию
+        codes = np.select(masks, np.arange(len(masks)), default=len(masks))
+
+        return self.labels[codes]
+
+    def label_clusters(self, stats):
+        """
+        Интерпретация кластеров по таблице статистики (колонки *_mean)
+        """
+        return self.label(stats, suffix='_mean')
+
+    def label_suppliers(self, features, reference=None):
+        """
+        Интерпретация отдельных поставщиков по их признакам
+        """
+        return self.label(features, reference=reference)
@@ -0,0 +1,230 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from autoTasks.Task3 import (HIGHS_AVAILABLE, HIGHS_STATUS, build_transportation_matrices,
+                             parse_transportation_dataframe)
+from autoTasks.simplex_3 import TransportationSimplex
+
+if HIGHS_AVAILABLE:
+    from scipy.optimize import linprog
+
+SCENARIO_BACKENDS = ('simplex', 'highs')
+
+
+def stack_scenarios(costs, supply, demand):
+    """
+    Сценарии из стопок массивов: costs (k, m, n), supply (k, m), demand (k, n)
+
+    Любой из массивов может быть задан без первой оси - тогда он общий для всех сценариев.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    supply = np.asarray(supply, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+
+    k = max(len(a) if a.ndim == base + 1 else 1 for a, base in ((costs, 2), (supply, 1), (demand, 1)))
+    costs = np.broadcast_to(costs, (k,) + costs.shape[-2:])
+    supply = np.broadcast_to(supply, (k,) + supply.shape[-1:])
+    demand = np.broadcast_to(demand, (k,) + demand.shape[-1:])
+
+    for index in range(k):
+        yield costs[index], supply[index], demand[index]
+
+
+def perturbed_scenarios(costs, supply, demand, n_scenarios, demand_cv=0.1, surcharge=(0.0, 0.15),
+                        outage_probability=0.05, random_state=42):
+    """
+    Генератор типовых сценариев вокруг базовых данных
+
+    Потребности умножаются на сезонный коэффициент с вариацией demand_cv, затраты всех
+    маршрутов - на общую топливную надбавку из интервала surcharge, каждый поставщик
+    с вероятностью outage_probability выбывает (мощность равна нулю).
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    supply = np.asarray(supply, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+    rng = np.random.default_rng(random_state)
+
+    for _ in range(n_scenarios):
+        season = np.maximum(rng.normal(1.0, demand_cv, len(demand)), 0.0)
+        fuel = 1.0 + rng.uniform(*surcharge)
+        outage = rng.random(len(supply)) < outage_probability
+        yield costs * fuel, np.where(outage, 0.0, supply), demand * season
+
+
+def _solve_scenario_chunk(scenarios, backend, tol):
+    """
+    Решение порции сценариев и свертка результатов порции
+
+    Для симплекс-метода каждый следующий сценарий решается от базиса предыдущего
+    (если пересчет не дал оптимума, сценарий решается заново с начального плана),
+    для HiGHS матрица ограничений строится один раз на размерность задачи.
+    """
+    m, n = scenarios[0][0].shape
+    total_costs = np.full(len(scenarios), np.nan)
+    statuses = []
+    route_used = np.zeros((m, n), dtype=np.int64)
+    flow_sum = np.zeros((m, n))
+
+    solver = None
+    matrices = {}
+    for index, (costs, supply, demand) in enumerate(scenarios):
+        if backend == 'simplex':
+            if solver is not None:
+                solver.resolve(costs, supply, demand)
+            if solver is None or solver.status != 'Optimal':
+                solver = TransportationSimplex(costs, supply, demand).solve()
+            status, total_cost, flows = solver.status, solver.total_cost, solver.flows
+        else:
+            status, total_cost, flows = _solve_highs_scenario(costs, supply, demand, matrices)
+
+        statuses.append(status)
+        if status == 'Optimal':
+            total_costs[index] = total_cost
+            route_used += flows > tol
+            flow_sum += flows
+
+    return total_costs, statuses, route_used, flow_sum
+
+
+def _solve_highs_scenario(costs, supply, demand, matrices):
+    """
+    Один сценарий через HiGHS: фиктивный узел добавляется в затраты, матрица берется из кэша
+    """
+    m, n = costs.shape
+    excess = supply.sum() - demand.sum()
+    if excess > 0:
+        costs = np.column_stack([costs, np.zeros(m)])
+        demand = np.append(demand, excess)
+    elif excess < 0:
+        costs = np.vstack([costs, np.zeros(n)])
+        supply = np.append(supply, -excess)
+
+    shape = costs.shape
+    if shape not in matrices:
+        matrices[shape] = build_transportation_matrices(*shape)
+
+    res = linprog(costs.ravel(), A_eq=matrices[shape], b_eq=np.concatenate([supply, demand]),
+                  bounds=(0, None), method='highs')
+    status = HIGHS_STATUS.get(res.status, 'Not Solved')
+    if res.x is None:
+        return status, None, None
+
+    return status, res.fun, res.x.reshape(shape)[:m, :n]
+
+
+class ScenarioBatchSolver:
+    def __init__(self, backend='simplex', n_jobs=None, chunk_size=16, max_pending=None, tol=1e-9):
+        """
+        Пакетное решение сценариев транспортной задачи в пуле процессов
+
+        Сценарии читаются из итератора порциями по chunk_size; в работе одновременно
+        не более max_pending порций, а результаты каждой порции сразу сворачиваются в
+        распределение общей стоимости и частоты использования маршрутов, поэтому память
+        не зависит от количества сценариев (кроме вектора стоимостей).
+        """
+        if backend not in SCENARIO_BACKENDS:
+            raise ValueError(f"Неизвестный решатель: {backend}. Доступны: {', '.join(SCENARIO_BACKENDS)}")
+        if backend == 'highs' and not HIGHS_AVAILABLE:
+            backend = 'simplex'
+
+        self.backend = backend
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * self.n_jobs
+        self.tol = tol
+
+    def solve(self, scenarios):
+        """
+        Решение сценариев (итератор кортежей (затраты, мощности, потребности))
+
+        Возвращает стоимости по сценариям (NaN - нет оптимального решения), статусы,
+        частоту использования и средние объемы по маршрутам среди оптимальных сценариев.
+        Сценарии без оптимального решения не входят в сводку стоимостей; их число и номера -
+        'n_failed' и 'failed_scenarios'.
+        """
+        scenarios = iter(scenarios)
+        chunk_costs = {}
+        starts = {}
+        status_counts = {}
+        route_used = None
+        flow_sum = None
+
+        def collect(future):
+            nonlocal route_used, flow_sum
+            start, (costs, statuses, used, flows) = starts.pop(future), future.result()
+            chunk_costs[start] = costs
+            for status in statuses:
+                status_counts[status] = status_counts.get(status, 0) + 1
+            if route_used is None:
+                route_used, flow_sum = used, flows
+            else:
+                route_used += used
+                flow_sum += flows
+
+        start = 0
+        pending = set()
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            while True:
+                chunk = [scenario for _, scenario in zip(range(self.chunk_size), scenarios)]
+                if not chunk:
+                    break
+                future = executor.submit(_solve_scenario_chunk, chunk, self.backend, self.tol)
+                starts[future] = start
+                pending.add(future)
+                start += len(chunk)
+
+                if len(pending) >= self.max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+
+            for future in pending:
+                collect(future)
+
+        if not start:
+            raise ValueError("Не передано ни одного сценария")
+
+        total_costs = np.concatenate([chunk_costs[key] for key in sorted(chunk_costs)])
+        solved = int(np.isfinite(total_costs).sum())
+        finite = total_costs[np.isfinite(total_costs)]
+
+        return {
+            'n_scenarios': start,
+            'n_solved': solved,
+            'n_failed': start - solved,
+            'failed_scenarios': np.flatnonzero(np.isnan(total_costs)),
+            'status_counts': status_counts,
+            'total_costs': total_costs,
+            'cost_mean': float(finite.mean()) if solved else np.nan,
+            'cost_std': float(finite.std()) if solved else np.nan,
+            'cost_quantiles': {q: float(np.quantile(finite, q)) for q in (0.05, 0.5, 0.95)} if solved else {},
+            'route_frequency': route_used / solved if solved else route_used.astype(np.float64),
+            'mean_flows': flow_sum / solved if solved else flow_sum
+        }
+
+
+def solve_transportation_scenarios(dataframe, scenarios=None, n_scenarios=200, backend='simplex', **kwargs):
+    """
+    Пакетное решение сценариев вокруг данных из DataFrame
+
+    Если scenarios не переданы, используется perturbed_scenarios по базовым данным;
+    scenarios может быть функцией (costs, supply, demand) -> итератор сценариев.
+    Остальные параметры передаются в ScenarioBatchSolver.
+    """
+    parsed = parse_transportation_dataframe(dataframe)
+    if parsed['errors']:
+        raise ValueError('\n'.join(parsed['errors']))
+
+    base = (parsed['costs'], parsed['supply'], parsed['demand'])
+    if scenarios is None:
+        scenarios = perturbed_scenarios(*base, n_scenarios=n_scenarios)
+    elif callable(scenarios):
+        scenarios = scenarios(*base)
+
+    summary = ScenarioBatchSolver(backend=backend, **kwargs).solve(scenarios)
+    summary['supply_names'] = parsed['supply_names']
+    summary['demand_names'] = parsed['demand_names']
+
+    return summary
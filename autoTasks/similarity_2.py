@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+
+class SupplierSimilarityIndex:
+    def __init__(self, scaled_features, names, labels, leaf_size=40, rebuild_ratio=0.1, min_buffer=256,
+                 solver=None):
+        """
+        Индекс ближайших соседей по масштабированным признакам поставщиков
+
+        Основные точки хранятся в KD-дереве. Добавленные поставщики попадают в небольшой
+        буфер, который просматривается напрямую, а дерево перестраивается, когда буфер
+        превышает rebuild_ratio от размера дерева (но не меньше min_buffer точек).
+        solver - обученный ClusteringSolver; нужен для добавления поставщиков из таблицы
+        и поиска по профилю (масштабирование и отнесение к кластеру).
+        """
+        self.solver = solver
+        self.leaf_size = leaf_size
+        self.rebuild_ratio = rebuild_ratio
+        self.min_buffer = min_buffer
+
+        self._points = np.ascontiguousarray(scaled_features, dtype=np.float64)
+        self._names = np.asarray(names, dtype=object)
+        self._labels = np.asarray(labels)
+        self._n_tree = 0
+        self._tree = None
+        self._positions = {}
+
+        self._rebuild()
+
+    @classmethod
+    def from_solver(cls, solver, **kwargs):
+        """
+        Построение индекса по результатам ClusteringSolver.perform_clustering
+        """
+        if solver.model is None:
+            raise ValueError("Сначала необходимо выполнить кластеризацию")
+
+        return cls(solver.scaled_features(), solver.supplier_names, solver.labels, solver=solver, **kwargs)
+
+    def __len__(self):
+        return len(self._points)
+
+    def _rebuild(self):
+        """
+        Полная перестройка дерева по всем точкам (включая буфер)
+        """
+        self._tree = KDTree(self._points, leaf_size=self.leaf_size)
+        self._n_tree = len(self._points)
+        self._positions = {name: i for i, name in enumerate(self._names)}
+
+    def add_suppliers(self, scaled_features, names, labels):
+        """
+        Добавление поставщиков в индекс
+        """
+        scaled_features = np.atleast_2d(np.asarray(scaled_features, dtype=np.float64))
+        start = len(self._points)
+
+        self._points = np.concatenate([self._points, scaled_features])
+        self._names = np.concatenate([self._names, np.asarray(names, dtype=object)])
+        self._labels = np.concatenate([self._labels, np.asarray(labels)])
+        for offset, name in enumerate(names):
+            self._positions[name] = start + offset
+
+        buffer_size = len(self._points) - self._n_tree
+        if buffer_size > max(self.min_buffer, self.rebuild_ratio * self._n_tree):
+            self._rebuild()
+
+    def _require_solver(self):
+        if self.solver is None:
+            raise ValueError("Индекс построен без ClusteringSolver: передайте solver или используйте from_solver")
+
+    def add_from_dataframe(self, df):
+        """
+        Добавление новых поставщиков из исходной таблицы с помощью обученного solver
+        """
+        self._require_solver()
+        scaled, names = self.solver.transform_features(df)
+        self.add_suppliers(scaled, names, self.solver.model.predict(scaled))
+
+    def _result(self, indices, distances):
+        """
+        Таблица результатов запроса
+        """
+        return pd.DataFrame({
+            'supplier_name': self._names[indices],
+            'distance': distances,
+            'cluster': self._labels[indices]
+        })
+
+    def query(self, point, k=5):
+        """
+        k ближайших поставщиков к точке масштабированного пространства признаков
+        """
+        point = np.asarray(point, dtype=np.float64).reshape(1, -1)
+        k_tree = min(k, self._n_tree)
+        distances, indices = self._tree.query(point, k=k_tree)
+        distances, indices = distances[0], indices[0]
+
+        if len(self._points) > self._n_tree:
+            buffer_distances = np.sqrt(((self._points[self._n_tree:] - point) ** 2).sum(axis=1))
+            distances = np.concatenate([distances, buffer_distances])
+            indices = np.concatenate([indices, np.arange(self._n_tree, len(self._points))])
+            order = np.argsort(distances, kind='stable')[:k]
+            distances, indices = distances[order], indices[order]
+
+        return self._result(indices, distances)
+
+    def query_radius(self, point, radius):
+        """
+        Все поставщики в пределах радиуса от точки, по возрастанию расстояния
+        """
+        point = np.asarray(point, dtype=np.float64).reshape(1, -1)
+        indices, distances = self._tree.query_radius(point, r=radius, return_distance=True, sort_results=True)
+        indices, distances = indices[0], distances[0]
+
+        if len(self._points) > self._n_tree:
+            buffer_distances = np.sqrt(((self._points[self._n_tree:] - point) ** 2).sum(axis=1))
+            inside = np.flatnonzero(buffer_distances <= radius)
+            distances = np.concatenate([distances, buffer_distances[inside]])
+            indices = np.concatenate([indices, self._n_tree + inside])
+            order = np.argsort(distances, kind='stable')
+            distances, indices = distances[order], indices[order]
+
+        return self._result(indices, distances)
+
+    def similar_to(self, supplier_name, k=5):
+        """
+        k поставщиков, наиболее похожих на указанного (без него самого)
+        """
+        if supplier_name not in self._positions:
+            raise ValueError(f"Поставщик не найден в индексе: {supplier_name}")
+
+        position = self._positions[supplier_name]
+        result = self.query(self._points[position], k=k + 1)
+        return result[result['supplier_name'] != supplier_name].head(k).reset_index(drop=True)
+
+    def closest_to_profile(self, delivery_rate, price, impurity, k=5):
+        """
+        k поставщиков, ближайших к целевому профилю
+
+        delivery_rate - выполнение поставок в срок (%), price - руб/т, impurity - примеси (%).
+        """
+        profile = pd.DataFrame({
+            'Название поставщика': ['Целевой профиль'],
+            'Коэффициент выполнения поставок в срок (%)': [delivery_rate],
+            'Стоимость 1 тонны песка (руб)': [price],
+            'Содержание примесей (%)': [impurity]
+        })
+        self._require_solver()
+        scaled, _ = self.solver.transform_features(profile)
+        return self.query(scaled[0], k=k)
@@ -0,0 +1,792 @@
+import numpy as np
+
+STARTS = ('vogel', 'northwest')
+
+
+class TransportationSimplex:
+    def __init__(self, costs, supply, demand, start='vogel', tol=1e-9, max_iter=None, block_rows=None):
+        """
+        Транспортный (сетевой) симплекс-метод с потенциалами (метод MODI)
+
+        Базис хранится массивами базисных клеток (строка, столбец, объем) и списками
+        смежности остовного дерева. Несбалансированная задача решается без добавления
+        фиктивной строки или столбца в матрицу затрат: фиктивный узел существует только
+        в дереве, а его затраты всегда равны нулю.
+        """
+        if start not in STARTS:
+            raise ValueError(f"Неизвестный начальный план: {start}. Доступны: {', '.join(STARTS)}")
+
+        self.costs = np.array(costs, dtype=np.float64)
+        self.supply = np.asarray(supply, dtype=np.float64)
+        self.demand = np.asarray(demand, dtype=np.float64)
+        self.start = start
+        self.tol = tol
+
+        self.m, self.n = self.costs.shape
+        if len(self.supply) != self.m or len(self.demand) != self.n:
+            raise ValueError("Размеры матрицы затрат не совпадают с количеством поставщиков и производств")
+
+        self._setup_nodes()
+
+        self.max_iter = max_iter or 50 * (self.M + self.N) + 1000
+        self.block_rows = block_rows or max(1, self.M // 20)
+
+        self.iterations = 0
+        self.status = 'Not Solved'
+        self.flows = None
+        self.total_cost = None
+        self.u = None
+        self.v = None
+
+    def _setup_nodes(self):
+        """
+        Узлы дерева: строки 0..M-1 и столбцы 0..N-1 (с учетом фиктивного узла)
+        """
+        total_supply = self.supply.sum()
+        total_demand = self.demand.sum()
+        self.dummy_col = total_supply > total_demand + self.tol
+        self.dummy_row = total_demand > total_supply + self.tol
+
+        self.M = self.m + int(self.dummy_row)
+        self.N = self.n + int(self.dummy_col)
+
+        self.row_amount = self.supply
+        self.col_amount = self.demand
+        if self.dummy_row:
+            self.row_amount = np.append(self.supply, total_demand - total_supply)
+        if self.dummy_col:
+            self.col_amount = np.append(self.demand, total_supply - total_demand)
+
+    def _cost(self, r, c):
+        """
+        Затраты клетки; для фиктивного узла - ноль
+        """
+        if r < self.m and c < self.n:
+            return self.costs[r, c]
+        return 0.0
+
+    # ----- начальный опорный план -----
+
+    def _northwest_start(self):
+        """
+        Метод северо-западного угла
+        """
+        rem_r = self.row_amount.copy()
+        rem_c = self.col_amount.copy()
+        cells = []
+        r = c = 0
+        while r < self.M and c < self.N:
+            x = min(rem_r[r], rem_c[c])
+            cells.append((r, c, x))
+            rem_r[r] -= x
+            rem_c[c] -= x
+            # При одновременном исчерпании переходим только на следующую строку,
+            # чтобы вырожденная нулевая клетка сохранила связность дерева
+            if (rem_r[r] <= rem_c[c] and r < self.M - 1) or c == self.N - 1:
+                r += 1
+            else:
+                c += 1
+
+        return cells
+
+    def _vogel_start(self):
+        """
+        Метод аппроксимации Фогеля
+
+        Строки и столбцы затрат сортируются один раз; для каждой линии хранятся указатели
+        на две наименьшие активные клетки, поэтому штрафы пересчитываются только у линий,
+        которые затронуло исключение строки или столбца.
+        """
+        C = self.costs
+        m, n, M, N = self.m, self.n, self.M, self.N
+
+        rem_r = self.row_amount.copy()
+        rem_c = self.col_amount.copy()
+        row_active = np.ones(M, dtype=bool)
+        col_active = np.ones(N, dtype=bool)
+
+        row_order = np.argsort(C, axis=1, kind='stable')
+        col_order = np.argsort(C, axis=0, kind='stable').T
+        row_ptr = np.zeros((m, 2), dtype=np.int64)
+        row_ptr[:, 1] = 1
+        col_ptr = np.zeros((n, 2), dtype=np.int64)
+        col_ptr[:, 1] = 1
+
+        row_pen = np.full(M, -np.inf)
+        row_best = np.zeros(M, dtype=np.int64)
+        col_pen = np.full(N, -np.inf)
+        col_best = np.zeros(N, dtype=np.int64)
+
+        def line_update(line, order, ptr, active_other, costs_line, dummy_other, pen, best):
+            # Две наименьшие активные клетки линии (указатели только увеличиваются)
+            size = len(order)
+            p = ptr[line, 0]
+            while p < size and not active_other[order[p]]:
+                p += 1
+            q = max(ptr[line, 1], p + 1)
+            while q < size and not active_other[order[q]]:
+                q += 1
+            ptr[line, 0], ptr[line, 1] = p, q
+
+            candidates = []
+            if p < size:
+                candidates.append((costs_line[order[p]], order[p]))
+            if q < size:
+                candidates.append((costs_line[order[q]], order[q]))
+            if dummy_other is not None and active_other[dummy_other]:
+                candidates.append((0.0, dummy_other))
+            candidates.sort(key=lambda item: item[0])
+
+            best[line] = candidates[0][1]
+            pen[line] = candidates[1][0] - candidates[0][0] if len(candidates) > 1 else candidates[0][0]
+
+        def row_update(r):
+            if r < m:
+                line_update(r, row_order[r], row_ptr, col_active, C[r], n if self.dummy_col else None,
+                            row_pen, row_best)
+            else:
+                # Фиктивная строка: все затраты нулевые
+                row_best[r] = np.argmax(col_active)
+                row_pen[r] = 0.0
+
+        def col_update(c):
+            if c < n:
+                line_update(c, col_order[c], col_ptr, row_active, C[:, c], m if self.dummy_row else None,
+                            col_pen, col_best)
+            else:
+                col_best[c] = np.argmax(row_active)
+                col_pen[c] = 0.0
+
+        for r in range(M):
+            row_update(r)
+        for c in range(N):
+            col_update(c)
+
+        def affected(ptr, order, removed, active):
+            # Линии, у которых одна из двух наименьших клеток попала в исключенную линию
+            size = order.shape[1]
+            lines = np.arange(len(order))
+            hit = np.zeros(len(order), dtype=bool)
+            for k in range(2):
+                valid = ptr[:, k] < size
+                hit[valid] |= order[lines[valid], ptr[valid, k]] == removed
+            return np.flatnonzero(hit & active[:len(order)])
+
+        cells = []
+        n_rows, n_cols = M, N
+        while n_rows > 0 and n_cols > 0:
+            r_line = int(np.argmax(row_pen))
+            c_line = int(np.argmax(col_pen))
+            if row_pen[r_line] >= col_pen[c_line]:
+                r, c = r_line, int(row_best[r_line])
+            else:
+                r, c = int(col_best[c_line]), c_line
+
+            x = min(rem_r[r], rem_c[c])
+            cells.append((r, c, x))
+            rem_r[r] -= x
+            rem_c[c] -= x
+
+            if n_rows == 1 and n_cols == 1:
+                break
+
+            if (rem_r[r] <= self.tol and n_rows > 1) or n_cols == 1:
+                row_active[r] = False
+                row_pen[r] = -np.inf
+                n_rows -= 1
+                if r < m:
+                    columns = affected(col_ptr, col_order, r, col_active)
+                else:
+                    columns = np.flatnonzero(col_active[:n])
+                for column in columns:
+                    col_update(column)
+                if self.dummy_col and col_active[n]:
+                    col_update(n)
+            else:
+                col_active[c] = False
+                col_pen[c] = -np.inf
+                n_cols -= 1
+                if c < n:
+                    rows = affected(row_ptr, row_order, c, row_active)
+                else:
+                    rows = np.flatnonzero(row_active[:m])
+                for row in rows:
+                    row_update(row)
+                if self.dummy_row and row_active[m]:
+                    row_update(m)
+
+        return cells
+
+    # ----- остовное дерево базиса -----
+
+    def _set_basis(self, cells):
+        """
+        Базис из списка клеток (строка, столбец, объем)
+        """
+        self.basis_rows = [int(r) for r, _, _ in cells]
+        self.basis_cols = [int(c) for _, c, _ in cells]
+        self.basis_flows = [float(x) for _, _, x in cells]
+        self.basis_costs = [self._cost(r, c) for r, c in zip(self.basis_rows, self.basis_cols)]
+
+        self.adjacency = [set() for _ in range(self.M + self.N)]
+        for slot, (r, c) in enumerate(zip(self.basis_rows, self.basis_cols)):
+            self.adjacency[r].add(slot)
+            self.adjacency[self.M + c].add(slot)
+
+    def _compute_tree(self):
+        """
+        Обход дерева от строки 0: родители, глубины и потенциалы узлов (u - строки, v - столбцы)
+        """
+        M = self.M
+        total = M + self.N
+        parent = [-1] * total
+        parent_slot = [-1] * total
+        depth = [0] * total
+        potential = [0.0] * total
+
+        order = [0]
+        for node in order:
+            for slot in self.adjacency[node]:
+                if slot == parent_slot[node]:
+                    continue
+                other = self.basis_rows[slot] if node >= M else M + self.basis_cols[slot]
+                parent[other] = node
+                parent_slot[other] = slot
+                depth[other] = depth[node] + 1
+                potential[other] = self.basis_costs[slot] - potential[node]
+                order.append(other)
+
+        if len(order) != total:
+            raise RuntimeError("Базис не является остовным деревом")
+
+        self.parent = parent
+        self.parent_slot = parent_slot
+        self.depth = depth
+        self.order = order
+        self.potential = potential
+        self._potential = np.array(potential)
+        self.u = self._potential[:M]
+        self.v = self._potential[M:]
+
+    def _in_subtree(self, node, root):
+        """
+        Лежит ли узел в поддереве с корнем root
+        """
+        while self.depth[node] > self.depth[root]:
+            node = self.parent[node]
+        return node == root
+
+    def _reattach(self, node, parent, slot):
+        """
+        Обновление дерева только в отрезанном поддереве, которое подвешивается к parent через slot
+
+        Родители, глубины и потенциалы остальной части дерева не меняются.
+        """
+        M = self.M
+        self.parent[node] = parent
+        self.parent_slot[node] = slot
+        self.depth[node] = self.depth[parent] + 1
+        self.potential[node] = self.basis_costs[slot] - self.potential[parent]
+
+        order = [node]
+        for current in order:
+            for adjacent in self.adjacency[current]:
+                if adjacent == self.parent_slot[current]:
+                    continue
+                other = self.basis_rows[adjacent] if current >= M else M + self.basis_cols[adjacent]
+                self.parent[other] = current
+                self.parent_slot[other] = adjacent
+                self.depth[other] = self.depth[current] + 1
+                self.potential[other] = self.basis_costs[adjacent] - self.potential[current]
+                order.append(other)
+
+        self._potential[order] = [self.potential[x] for x in order]
+
+    def _reduced_block(self, start, stop):
+        """
+        Оценки (приведенные затраты) для блока строк start..stop-1
+        """
+        block = np.zeros((stop - start, self.N))
+        real_stop = min(stop, self.m)
+        if start < real_stop:
+            block[:real_stop - start, :self.n] = self.costs[start:real_stop]
+        block -= self.u[start:stop, None]
+        block -= self.v[None, :]
+        return block
+
+    def _price(self):
+        """
+        Выбор входящей клетки блочным просмотром строк; None - план оптимален
+        """
+        for offset in range(0, self.M, self.block_rows):
+            start = (self._price_start + offset) % self.M
+            stop = min(start + self.block_rows, self.M)
+            block = self._reduced_block(start, stop)
+            index = int(np.argmin(block))
+            if block.flat[index] < -self.tol:
+                self._price_start = stop % self.M
+                r, c = divmod(index, self.N)
+                return start + r, c
+
+        return None
+
+    def _cycle(self, r, c):
+        """
+        Цикл пересчета для входящей клетки (r, c): базисные клетки со знаками +/-
+
+        Путь по дереву идет от столбца c к строке r; знаки чередуются, начиная с минуса.
+        """
+        a, b = self.M + c, r
+        from_col, from_row = [], []
+        while self.depth[a] > self.depth[b]:
+            from_col.append(self.parent_slot[a])
+            a = self.parent[a]
+        while self.depth[b] > self.depth[a]:
+            from_row.append(self.parent_slot[b])
+            b = self.parent[b]
+        while a != b:
+            from_col.append(self.parent_slot[a])
+            a = self.parent[a]
+            from_row.append(self.parent_slot[b])
+            b = self.parent[b]
+
+        path = from_col + from_row[::-1]
+        return path[0::2], path[1::2]
+
+    def _pivot(self, r, c):
+        """
+        Ввод клетки (r, c) в базис и вывод клетки с минимальным объемом среди клеток со знаком минус
+        """
+        minus, plus = self._cycle(r, c)
+        leaving = min(minus, key=lambda slot: self.basis_flows[slot])
+        self._exchange(r, c, leaving, self.basis_flows[leaving], minus, plus)
+
+    def _exchange(self, r, c, leaving, theta, minus, plus):
+        """
+        Сдвиг объема theta по циклу и замена выходящей клетки на входящую (r, c)
+        """
+        for slot in minus:
+            self.basis_flows[slot] -= theta
+        for slot in plus:
+            self.basis_flows[slot] += theta
+
+        # Узел, который отрезается от корня при удалении выходящей клетки
+        leaving_row = self.basis_rows[leaving]
+        leaving_col = self.M + self.basis_cols[leaving]
+        cut = leaving_row if self.parent_slot[leaving_row] == leaving else leaving_col
+
+        self._replace(leaving, r, c, theta)
+
+        # Отрезанное поддерево подвешивается через входящую клетку
+        if self._in_subtree(r, cut):
+            self._reattach(r, self.M + c, leaving)
+        else:
+            self._reattach(self.M + c, r, leaving)
+
+    def _replace(self, slot, r, c, flow):
+        """
+        Замена базисной клетки slot на клетку (r, c)
+        """
+        self.adjacency[self.basis_rows[slot]].discard(slot)
+        self.adjacency[self.M + self.basis_cols[slot]].discard(slot)
+
+        self.basis_rows[slot] = r
+        self.basis_cols[slot] = c
+        self.basis_flows[slot] = flow
+        self.basis_costs[slot] = self._cost(r, c)
+
+        self.adjacency[r].add(slot)
+        self.adjacency[self.M + c].add(slot)
+
+    def _iterate(self):
+        """
+        Итерации симплекс-метода от текущего базиса до оптимума
+        """
+        self._price_start = 0
+        self._compute_tree()
+        while self.iterations < self.max_iter:
+            entering = self._price()
+            if entering is None:
+                self.status = 'Optimal'
+                return
+            self._pivot(*entering)
+            self.iterations += 1
+
+        self.status = 'Not Solved'
+
+    def _collect(self):
+        """
+        Матрица поставок и итоговая стоимость по базису
+        """
+        rows = np.array(self.basis_rows)
+        cols = np.array(self.basis_cols)
+        flows = np.array(self.basis_flows)
+
+        full = np.zeros((self.M, self.N))
+        full[rows, cols] = flows
+
+        self.flows = full[:self.m, :self.n]
+        # Недопоставка в фиктивный узел: остаток мощности или неудовлетворенный спрос
+        self.row_slack = full[:self.m, self.n] if self.dummy_col else np.zeros(self.m)
+        self.col_shortage = full[self.m, :self.n] if self.dummy_row else np.zeros(self.n)
+        self.total_cost = float((self.flows * self.costs).sum())
+
+    def initial_plan(self):
+        """
+        Только начальный опорный план (Фогеля или северо-западного угла) без итераций
+
+        Быстрое эвристическое решение со статусом 'Heuristic'.
+        """
+        cells = self._vogel_start() if self.start == 'vogel' else self._northwest_start()
+        self._set_basis(cells)
+        self._collect()
+        self.status = 'Heuristic'
+
+        return self
+
+    def solve(self):
+        """
+        Решение задачи от начального плана Фогеля или северо-западного угла
+        """
+        self.iterations = 0
+        cells = self._vogel_start() if self.start == 'vogel' else self._northwest_start()
+        self._set_basis(cells)
+        self._iterate()
+        self._collect()
+
+        return self
+
+    # ----- двойственные оценки и анализ чувствительности -----
+
+    def _preorder(self):
+        """
+        Обход дерева в глубину: позиция узла в прямом порядке и размер его поддерева
+
+        Поддерево любого узла занимает непрерывный отрезок прямого порядка.
+        """
+        total = self.M + self.N
+        children = [[] for _ in range(total)]
+        for node in self.order[1:]:
+            children[self.parent[node]].append(node)
+
+        position = np.empty(total, dtype=np.int64)
+        preorder = []
+        stack = [self.order[0]]
+        while stack:
+            node = stack.pop()
+            position[node] = len(preorder)
+            preorder.append(node)
+            stack.extend(children[node])
+
+        size = np.ones(total, dtype=np.int64)
+        for node in reversed(preorder[1:]):
+            size[self.parent[node]] += size[node]
+
+        return position, size
+
+    def _cost_ranges(self, reduced):
+        """
+        Допустимое уменьшение и увеличение затрат базисных клеток без смены базиса
+
+        Изменение затрат клетки на delta сдвигает потенциалы поддерева под ней: строки
+        поддерева на +delta, столбцы на -delta (или наоборот, если поддерево начинается
+        со столбца). Оценки меняются только у небазисных клеток, пересекающих разрез, поэтому
+        пределы - минимумы оценок по двум прямоугольникам в матрице, упорядоченной
+        обходом в глубину; минимумы берутся из префиксных и суффиксных минимумов.
+        """
+        M, N = self.M, self.N
+        position, size = self._preorder()
+
+        row_perm = np.argsort(position[:M])
+        col_perm = np.argsort(position[M:])
+        row_position = position[:M][row_perm]
+        col_position = position[M:][col_perm]
+
+        ordered = reduced[row_perm][:, col_perm]
+        inf_col = np.full((M, 1), np.inf)
+        inf_row = np.full((1, N), np.inf)
+        # Минимумы по столбцам левее/правее отрезка и по строкам выше/ниже отрезка
+        left = np.hstack([inf_col, np.minimum.accumulate(ordered, axis=1)])
+        right = np.hstack([np.minimum.accumulate(ordered[:, ::-1], axis=1)[:, ::-1], inf_col])
+        above = np.vstack([inf_row, np.minimum.accumulate(ordered, axis=0)])
+        below = np.vstack([np.minimum.accumulate(ordered[::-1], axis=0)[::-1], inf_row])
+
+        decrease = np.empty(len(self.basis_rows))
+        increase = np.empty(len(self.basis_rows))
+        for slot, (r, c) in enumerate(zip(self.basis_rows, self.basis_cols)):
+            child = r if self.parent_slot[r] == slot else M + c
+            lo, hi = position[child], position[child] + size[child]
+            r0, r1 = np.searchsorted(row_position, [lo, hi])
+            c0, c1 = np.searchsorted(col_position, [lo, hi])
+
+            # Строка внутри, столбец снаружи / строка снаружи, столбец внутри
+            inside_row = np.minimum(left[r0:r1, c0], right[r0:r1, c1]).min(initial=np.inf)
+            inside_col = np.minimum(above[r0, c0:c1], below[r1, c0:c1]).min(initial=np.inf)
+
+            if child < M:
+                increase[slot], decrease[slot] = inside_row, inside_col
+            else:
+                increase[slot], decrease[slot] = inside_col, inside_row
+
+        return decrease, increase
+
+    def _amount_ranges(self, root):
+        """
+        Допустимое изменение объема каждого узла, если разницу принимает узел root
+
+        При дереве с корнем в root изменение объема узла на delta меняет только клетки на
+        пути от узла к корню: на +delta у клеток к узлам той же стороны (строка/столбец)
+        и на -delta у остальных. Минимальные объемы на пути накапливаются за один обход.
+        """
+        M = self.M
+        total = M + self.N
+        min_row = np.full(total, np.inf)
+        min_col = np.full(total, np.inf)
+        visited = np.zeros(total, dtype=bool)
+        visited[root] = True
+
+        order = [root]
+        for node in order:
+            for slot in self.adjacency[node]:
+                other = self.basis_rows[slot] if node >= M else M + self.basis_cols[slot]
+                if visited[other]:
+                    continue
+                visited[other] = True
+                flow = self.basis_flows[slot]
+                min_row[other], min_col[other] = min_row[node], min_col[node]
+                if other < M:
+                    min_row[other] = min(min_row[other], flow)
+                else:
+                    min_col[other] = min(min_col[other], flow)
+                order.append(other)
+
+        is_row = np.arange(total) < M
+        lower = -np.where(is_row, min_row, min_col)
+        upper = np.where(is_row, min_col, min_row)
+        return lower, upper
+
+    def sensitivity(self):
+        """
+        Двойственные оценки, оценки маршрутов и диапазоны устойчивости по последнему базису
+
+        Теневые цены нормированы так, что потенциал фиктивного узла равен нулю (для
+        сбалансированной задачи - наибольший потенциал поставщика): supply_duals - изменение
+        стоимости на тонну дополнительной мощности, demand_duals - на тонну дополнительной
+        потребности. cost_lower/cost_upper - пределы затрат маршрута, при которых план
+        остается оптимальным; supply_lower/supply_upper и demand_lower/demand_upper - пределы
+        мощности и потребности, в которых теневые цены не меняются (для сбалансированной
+        задачи не определены).
+        """
+        if self.flows is None:
+            raise ValueError("Сначала необходимо решить задачу")
+
+        m, n, M = self.m, self.n, self.M
+
+        reduced = self._reduced_block(0, M)
+        basic_rows = np.array(self.basis_rows)
+        basic_cols = np.array(self.basis_cols)
+        reduced[basic_rows, basic_cols] = 0.0
+
+        if self.dummy_col:
+            shift = self.v[n]
+        elif self.dummy_row:
+            shift = -self.u[m]
+        else:
+            shift = -self.u[:m].max()
+
+        # Пределы изменения затрат: небазисная клетка - до обнуления оценки, базисная - по разрезу
+        nonbasic = reduced.copy()
+        nonbasic[basic_rows, basic_cols] = np.inf
+        decrease, increase = self._cost_ranges(nonbasic)
+
+        cost_decrease = reduced.copy()
+        cost_increase = np.full(reduced.shape, np.inf)
+        cost_decrease[basic_rows, basic_cols] = decrease
+        cost_increase[basic_rows, basic_cols] = increase
+
+        # Пределы объемов: разницу принимает фиктивный узел
+        if self.dummy_col or self.dummy_row:
+            root = M + n if self.dummy_col else m
+            lower, upper = self._amount_ranges(root)
+            supply_lower = np.maximum(self.supply + lower[:m], 0.0)
+            supply_upper = self.supply + upper[:m]
+            demand_lower = np.maximum(self.demand + lower[M:M + n], 0.0)
+            demand_upper = self.demand + upper[M:M + n]
+        else:
+            supply_lower = supply_upper = np.full(m, np.nan)
+            demand_lower = demand_upper = np.full(n, np.nan)
+
+        return {
+            'supply_duals': self.u[:m] + shift,
+            'demand_duals': self.v[:n] - shift,
+            'reduced_costs': reduced[:m, :n],
+            'cost_lower': self.costs - cost_decrease[:m, :n],
+            'cost_upper': self.costs + cost_increase[:m, :n],
+            'supply_lower': supply_lower,
+            'supply_upper': supply_upper,
+            'demand_lower': demand_lower,
+            'demand_upper': demand_upper
+        }
+
+    # ----- повторная оптимизация от последнего базиса -----
+
+    def _basis_flows_from_amounts(self):
+        """
+        Объемы базисных клеток для текущих мощностей и потребностей
+
+        Дерево обходится от листьев к корню: объем клетки к родителю равен остатку узла.
+        """
+        residual = np.concatenate([self.row_amount, self.col_amount]).tolist()
+        for node in reversed(self.order[1:]):
+            flow = residual[node]
+            self.basis_flows[self.parent_slot[node]] = flow
+            residual[self.parent[node]] -= flow
+
+    def _subtree_mask(self, root, excluded_slot):
+        """
+        Узлы поддерева root при удалении клетки excluded_slot: маски строк и столбцов
+        """
+        M = self.M
+        inside = np.zeros(M + self.N, dtype=bool)
+        inside[root] = True
+        order = [root]
+        for node in order:
+            for slot in self.adjacency[node]:
+                if slot == excluded_slot:
+                    continue
+                other = self.basis_rows[slot] if node >= M else M + self.basis_cols[slot]
+                if not inside[other]:
+                    inside[other] = True
+                    order.append(other)
+        return inside[:M], inside[M:]
+
+    def _dual_iterate(self):
+        """
+        Двойственный симплекс-метод: устранение отрицательных объемов при сохранении оптимальности оценок
+
+        Используется после изменения мощностей или потребностей, когда прежний базис
+        остается двойственно допустимым, но перестает быть допустимым по объемам.
+        """
+        while self.iterations < self.max_iter:
+            flows = np.array(self.basis_flows)
+            leaving = int(np.argmin(flows))
+            if flows[leaving] >= -self.tol:
+                return True
+
+            # Поддерево, отрезаемое выходящей клеткой
+            leaving_row = self.basis_rows[leaving]
+            leaving_col = self.M + self.basis_cols[leaving]
+            cut = leaving_row if self.parent_slot[leaving_row] == leaving else leaving_col
+            rows_inside, cols_inside = self._subtree_mask(cut, leaving)
+
+            # Входящая клетка пересекает разрез в направлении, противоположном выходящей
+            if cut == leaving_row:
+                eligible = ~rows_inside[:, None] & cols_inside[None, :]
+            else:
+                eligible = rows_inside[:, None] & ~cols_inside[None, :]
+
+            reduced = self._reduced_block(0, self.M)
+            reduced[~eligible] = np.inf
+            index = int(np.argmin(reduced))
+            if not np.isfinite(reduced.flat[index]):
+                self.status = 'Infeasible'
+                return False
+            r, c = divmod(index, self.N)
+
+            minus, plus = self._cycle(r, c)
+            self._exchange(r, c, leaving, -flows[leaving], minus, plus)
+            self.iterations += 1
+
+        self.status = 'Not Solved'
+        return False
+
+    def reoptimize(self, cost_delta=None, supply_delta=None, demand_delta=None):
+        """
+        Повторная оптимизация от последнего оптимального базиса после изменения данных
+
+        cost_delta - {(поставщик, производство): изменение затрат},
+        supply_delta - {поставщик: изменение мощности}, demand_delta - {производство: изменение потребности}
+        (индексы - номера строк и столбцов исходной задачи).
+        Возвращает изменение стоимости, изменившиеся поставки и число итераций.
+        """
+        if self.flows is None:
+            raise ValueError("Сначала необходимо решить задачу")
+
+        costs = self.costs.copy()
+        supply = self.supply.copy()
+        demand = self.demand.copy()
+        for i, delta in (supply_delta or {}).items():
+            supply[i] += delta
+        for j, delta in (demand_delta or {}).items():
+            demand[j] += delta
+        for (i, j), delta in (cost_delta or {}).items():
+            costs[i, j] += delta
+
+        return self.resolve(costs, supply, demand)
+
+    def resolve(self, costs=None, supply=None, demand=None):
+        """
+        Решение задачи с новыми данными той же размерности от последнего оптимального базиса
+
+        Сначала изменения объемов обрабатываются двойственным симплекс-методом при старых
+        затратах (для них базис двойственно допустим), затем изменения затрат - прямым.
+        Если меняется сторона фиктивного узла (избыток/дефицит), задача решается заново.
+        Ограничение max_iter и счетчик iterations относятся к одному вызову.
+        """
+        if self.flows is None:
+            raise ValueError("Сначала необходимо решить задачу")
+
+        previous_flows = self.flows.copy()
+        previous_cost = self.total_cost
+        self.iterations = 0
+
+        amounts_changed = False
+        if supply is not None:
+            supply = np.asarray(supply, dtype=np.float64)
+            amounts_changed = not np.array_equal(supply, self.supply)
+            self.supply = supply
+        if demand is not None:
+            demand = np.asarray(demand, dtype=np.float64)
+            amounts_changed = amounts_changed or not np.array_equal(demand, self.demand)
+            self.demand = demand
+
+        dummy_col, dummy_row = self.dummy_col, self.dummy_row
+        self._setup_nodes()
+
+        warm = (self.dummy_col, self.dummy_row) == (dummy_col, dummy_row)
+        if warm and amounts_changed:
+            # При старых затратах базис двойственно допустим: восстанавливаем объемы
+            self._compute_tree()
+            self._basis_flows_from_amounts()
+            warm = self._dual_iterate()
+
+        if costs is not None:
+            self.costs = np.array(costs, dtype=np.float64)
+
+        if warm:
+            self.basis_costs = [self._cost(r, c) for r, c in zip(self.basis_rows, self.basis_cols)]
+            self._iterate()
+        else:
+            # Структура фиктивного узла изменилась - решаем с нуля
+            self.iterations = 0
+            cells = self._vogel_start() if self.start == 'vogel' else self._northwest_start()
+            self._set_basis(cells)
+            self._iterate()
+
+        self._collect()
+
+        changed_rows, changed_cols = np.nonzero(np.abs(self.flows - previous_flows) > self.tol)
+        changes = [
+            (int(i), int(j), float(previous_flows[i, j]), float(self.flows[i, j]))
+            for i, j in zip(changed_rows, changed_cols)
+        ]
+
+        return {
+            'status': self.status,
+            'warm_start': warm,
+            'total_cost': self.total_cost,
+            'previous_cost': previous_cost,
+            'cost_change': self.total_cost - previous_cost,
+            'changed_flows': changes,
+            'iterations': self.iterations
+        }
@@ -0,0 +1,304 @@
+import os
+import re
+import shlex
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+import numpy as np
+from pulp import (COIN_CMD, PULP_CBC_CMD, LpBinary, LpContinuous, LpInteger, LpMinimize, LpProblem, LpStatus,
+                  LpVariable, lpSum, value)
+
+from autoTasks.Task3 import parse_transportation_dataframe
+from autoTasks.simplex_3 import TransportationSimplex
+
+# Статус решения CBC (problem.sol_status) в терминах страницы плана закупок
+SOLUTION_STATUS = {1: 'Optimal', 2: 'Feasible', 0: 'Not Solved', -1: 'Infeasible', -2: 'Unbounded'}
+
+# Строки журнала CBC с найденными допустимыми решениями и нижними границами
+INCUMBENT_PATTERN = re.compile(r"(?:Integer solution of|MIPStart provided solution with cost)\s+(-?[\d.eE+]+)")
+BOUND_PATTERN = re.compile(r"(?:best possible|Lower bound:|changed objective from \S+ to)\s+(-?[\d.eE+]+)")
+
+
+def _line_buffered_cbc(log_dir):
+    """
+    Сценарий запуска CBC через stdbuf: CBC буферизует вывод в файл, а stdbuf переводит
+    его в построчный режим только для процесса решателя, не меняя окружение сервера
+
+    Возвращает путь к сценарию или None, если stdbuf или CBC недоступны.
+    """
+    stdbuf = shutil.which('stdbuf')
+    cbc = PULP_CBC_CMD.pulp_cbc_path
+    if os.name != 'posix' or stdbuf is None or not os.path.isfile(cbc):
+        return None
+
+    script_file, script_path = tempfile.mkstemp(suffix='.sh', dir=log_dir)
+    with os.fdopen(script_file, 'w') as script:
+        script.write(f'#!/bin/sh\nexec {shlex.quote(stdbuf)} -oL {shlex.quote(cbc)} "$@"\n')
+    os.chmod(script_path, stat.S_IRWXU)
+    return script_path
+
+
+def _as_matrix(values, shape):
+    """
+    Параметр маршрутов: число (одинаково для всех маршрутов) или матрица поставщики x производства
+    """
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), shape)
+
+
+def build_truckload_model(costs, supply, demand, truck_capacity, trip_cost=0.0, fixed_cost=0.0, min_lot=0.0):
+    """
+    Целочисленная модель перевозки рейсами
+
+    Для маршрута: x - объем (т), trucks - число рейсов (целое, x <= вместимость * trucks),
+    opened - маршрут используется (x >= минимальная партия и x <= min(мощность, потребность)
+    только при opened = 1). Стоимость: затраты на тонну, стоимость рейса и фиксированные
+    затраты на открытие маршрута. При избытке мощностей спрос выполняется полностью,
+    при дефиците - полностью используются мощности (как с фиктивным узлом в Task3).
+    """
+    m, n = costs.shape
+    trip_cost = _as_matrix(trip_cost, (m, n))
+    fixed_cost = _as_matrix(fixed_cost, (m, n))
+    min_lot = _as_matrix(min_lot, (m, n))
+    upper = np.minimum.outer(supply, demand)
+
+    problem = LpProblem('Truckload_Problem', LpMinimize)
+    x = {}
+    trucks = {}
+    opened = {}
+    for i in range(m):
+        for j in range(n):
+            x[i, j] = LpVariable(f'x_{i}_{j}', 0, None, LpContinuous)
+            trucks[i, j] = LpVariable(f't_{i}_{j}', 0, None, LpInteger)
+            opened[i, j] = LpVariable(f'y_{i}_{j}', 0, 1, LpBinary)
+
+    problem += lpSum(costs[i, j] * x[i, j] + trip_cost[i, j] * trucks[i, j] + fixed_cost[i, j] * opened[i, j]
+                     for i in range(m) for j in range(n)), "Total_Cost"
+
+    for i in range(m):
+        for j in range(n):
+            problem += x[i, j] <= truck_capacity * trucks[i, j], f"Trucks_{i}_{j}"
+            problem += x[i, j] <= upper[i, j] * opened[i, j], f"Open_{i}_{j}"
+            if min_lot[i, j] > 0:
+                problem += x[i, j] >= min_lot[i, j] * opened[i, j], f"MinLot_{i}_{j}"
+
+    surplus = supply.sum() >= demand.sum()
+    for i in range(m):
+        shipped = lpSum(x[i, j] for j in range(n))
+        problem += (shipped <= supply[i]) if surplus else (shipped == supply[i]), f"Supply_{i}"
+    for j in range(n):
+        received = lpSum(x[i, j] for i in range(m))
+        problem += (received == demand[j]) if surplus else (received <= demand[j]), f"Demand_{j}"
+
+    return problem, x, trucks, opened
+
+
+def _rounded_plan(guide, amortized, supply, demand, min_lot):
+    """
+    Допустимый план с минимальными партиями, построенный по непрерывному плану
+
+    Спрос должен быть покрыт полностью (при дефиците мощностей задача передается
+    транспонированной). Маршруты непрерывного плана просматриваются первыми, остальные -
+    по возрастанию затрат; по маршруту отправляется остаток мощности или спроса, если он
+    не меньше минимальной партии и не оставляет спроса меньше партии. Остатки спроса затем
+    распределяются по открытым маршрутам или новым маршрутом, часть которого снимается
+    с уже открытого. Возвращает план и непокрытый спрос.
+    """
+    m, n = amortized.shape
+    remaining_supply = supply.copy()
+    remaining_demand = demand.copy()
+    flows = np.zeros((m, n))
+
+    def ship(i, j, amount):
+        flows[i, j] += amount
+        remaining_supply[i] -= amount
+        remaining_demand[j] -= amount
+
+    order = np.lexsort((amortized.ravel(), guide.ravel() <= 1e-9))
+    for index in order:
+        i, j = divmod(int(index), n)
+        amount = min(remaining_supply[i], remaining_demand[j])
+        left = remaining_demand[j] - amount
+        if 1e-9 < left < min_lot[i, j]:
+            amount -= min_lot[i, j] - left
+        if amount > 1e-9 and amount >= min_lot[i, j] - 1e-9:
+            ship(i, j, amount)
+
+    for j in np.flatnonzero(remaining_demand > 1e-9):
+        by_cost = np.argsort(amortized[:, j])
+        for i in by_cost[flows[by_cost, j] > 0]:
+            ship(i, j, min(remaining_supply[i], remaining_demand[j]))
+        if remaining_demand[j] <= 1e-9:
+            continue
+
+        # Новые маршруты с партией: недостающая до партии часть снимается с открытого маршрута
+        for i in by_cost[flows[by_cost, j] == 0]:
+            lot, left = min_lot[i, j], remaining_demand[j]
+            if remaining_supply[i] < left:
+                if remaining_supply[i] >= lot - 1e-9:
+                    ship(i, j, remaining_supply[i])
+                continue
+            need = max(lot - left, 0.0)
+            donors = np.flatnonzero(flows[:, j] - need >= min_lot[:, j] - 1e-9)
+            if remaining_supply[i] >= left + need - 1e-9 and (need == 0 or len(donors)):
+                if need:
+                    ship(donors[0], j, -need)
+                ship(i, j, left + need)
+                break
+
+    return flows, remaining_demand
+
+
+def _warm_start(costs, supply, demand, truck_capacity, trip_cost, fixed_cost, min_lot, x, trucks, opened):
+    """
+    Начальное решение MIP из непрерывной задачи
+
+    Непрерывная задача с исходными затратами дает нижнюю границу для MIP; от ее базиса
+    решается задача с затратами рейсов и открытия маршрутов в расчете на тонну, и ее план
+    округляется до допустимого с минимальными партиями. Если это удалось, объемы передаются
+    в CBC, а рейсы округляются вверх. Возвращает (нижняя граница, передано ли начальное решение).
+    """
+    m, n = costs.shape
+    relaxed = TransportationSimplex(costs, supply, demand).solve()
+    lower_bound = relaxed.total_cost
+
+    upper = np.maximum(np.minimum.outer(supply, demand), 1e-9)
+    amortized = costs + _as_matrix(trip_cost, (m, n)) / truck_capacity + _as_matrix(fixed_cost, (m, n)) / upper
+    relaxed.resolve(amortized)
+
+    min_lot = _as_matrix(min_lot, (m, n))
+    if supply.sum() >= demand.sum():
+        flows, uncovered = _rounded_plan(relaxed.flows, amortized, supply, demand, min_lot)
+    else:
+        # При дефиците должны быть исчерпаны мощности - та же задача для производств
+        flows, uncovered = _rounded_plan(relaxed.flows.T, amortized.T, demand, supply, min_lot.T)
+        flows = flows.T
+    if (uncovered > 1e-6).any():
+        return lower_bound, False
+
+    for (i, j), variable in x.items():
+        variable.setInitialValue(flows[i, j])
+        trucks[i, j].setInitialValue(int(np.ceil(flows[i, j] / truck_capacity - 1e-9)))
+        opened[i, j].setInitialValue(int(flows[i, j] > 1e-9))
+
+    return lower_bound, True
+
+
+def solve_truckload_problem(dataframe, truck_capacity=20, trip_cost=0.0, fixed_cost=0.0, min_lot=0.0,
+                            time_limit=60, gap_rel=0.01, warm_start=True, on_incumbent=None, poll_interval=0.2):
+    """
+    План поставок целыми рейсами с фиксированными затратами и минимальными партиями (CBC)
+
+    time_limit - ограничение времени (с), gap_rel - допустимый относительный разрыв MIP.
+    Решение непрерывной задачи используется как начальное решение MIP. Пока CBC работает
+    в фоновом потоке, журнал решателя читается в вызывающем потоке, и для каждого
+    улучшенного решения вызывается on_incumbent(секунды, стоимость) - это позволяет
+    обновлять интерфейс по ходу решения.
+    """
+    parsed = parse_transportation_dataframe(dataframe)
+    if parsed['errors']:
+        raise ValueError('\n'.join(parsed['errors']))
+
+    costs = parsed['costs'].astype(np.float64)
+    supply = parsed['supply'].astype(np.float64)
+    demand = parsed['demand'].astype(np.float64)
+    m, n = costs.shape
+
+    problem, x, trucks, opened = build_truckload_model(costs, supply, demand, truck_capacity,
+                                                       trip_cost, fixed_cost, min_lot)
+    relaxation_cost, started_warm = None, False
+    if warm_start:
+        relaxation_cost, started_warm = _warm_start(costs, supply, demand, truck_capacity, trip_cost, fixed_cost,
+                                                    min_lot, x, trucks, opened)
+
+    log_file, log_path = tempfile.mkstemp(suffix='.log')
+    os.close(log_file)
+    options = dict(msg=False, timeLimit=time_limit, gapRel=gap_rel, warmStart=started_warm, logPath=log_path)
+    cbc_path = _line_buffered_cbc(os.path.dirname(log_path))
+    solver = COIN_CMD(path=cbc_path, **options) if cbc_path else PULP_CBC_CMD(**options)
+
+    errors = []
+
+    def run():
+        try:
+            problem.solve(solver)
+        except Exception as e:
+            errors.append(e)
+
+    # Поток решателя; журнал читается здесь, чтобы обратный вызов шел из вызывающего потока
+    started = time.perf_counter()
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+
+    incumbents = []
+    log_text = ''
+    position = 0
+    try:
+        while True:
+            finished = not worker.is_alive()
+            with open(log_path, encoding='utf-8', errors='replace') as log:
+                log.seek(position)
+                chunk = log.read()
+                position = log.tell()
+            log_text += chunk
+            for match in INCUMBENT_PATTERN.finditer(chunk):
+                cost = float(match.group(1))
+                if not incumbents or cost < incumbents[-1][1] - 1e-9:
+                    incumbents.append((time.perf_counter() - started, cost))
+                    if on_incumbent is not None:
+                        on_incumbent(*incumbents[-1])
+            if finished:
+                break
+            time.sleep(poll_interval)
+    finally:
+        worker.join()
+        os.remove(log_path)
+        if cbc_path:
+            os.remove(cbc_path)
+
+    if errors:
+        raise errors[0]
+
+    # Остановка по времени с найденным решением - допустимый, но не доказанно оптимальный план
+    status = SOLUTION_STATUS.get(problem.sol_status, LpStatus[problem.status])
+    if status not in ('Optimal', 'Feasible'):
+        flows = np.zeros((m, n))
+        truck_counts = np.zeros((m, n), dtype=np.int64)
+        total_cost = None
+    else:
+        flows = np.array([[x[i, j].varValue or 0.0 for j in range(n)] for i in range(m)])
+        truck_counts = np.array([[round(trucks[i, j].varValue or 0) for j in range(n)] for i in range(m)])
+        total_cost = value(problem.objective)
+
+    # Нижние границы только растут: берется наибольшая из журнала
+    bounds = [float(match.group(1)) for match in BOUND_PATTERN.finditer(log_text)]
+    if relaxation_cost is not None:
+        bounds.append(relaxation_cost)
+    lower_bound = max(bounds) if bounds else None
+    if total_cost is not None and lower_bound is not None:
+        lower_bound = min(lower_bound, total_cost)
+
+    rows, cols = np.nonzero(flows > 1e-9)
+    return {
+        'results': flows.tolist(),
+        'flows': {'rows': rows, 'cols': cols, 'values': flows[rows, cols], 'costs': costs[rows, cols]},
+        'trucks': truck_counts,
+        'supply_names': parsed['supply_names'],
+        'demand_names': parsed['demand_names'],
+        'supply': parsed['supply'].tolist(),
+        'demand': parsed['demand'].tolist(),
+        'total_cost': total_cost,
+        'transport_cost': float((costs * flows).sum()),
+        'original_costs': costs.tolist(),
+        'status': status,
+        'total_supply': parsed['supply'].sum(),
+        'total_demand': parsed['demand'].sum(),
+        'relaxation_cost': relaxation_cost,
+        'warm_start': started_warm,
+        'lower_bound': lower_bound,
+        'mip_gap': (total_cost - lower_bound) / abs(total_cost) if total_cost and lower_bound is not None else None,
+        'incumbents': incumbents,
+        'solve_time': time.perf_counter() - started
+    }
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from autoTasks.Task2 import FEATURE_COLUMNS
+
+
+class ClusterWhatIf:
+    def __init__(self, solver, cluster_stats):
+        """
+        Быстрый пересчет кластера поставщика при изменении его характеристик
+
+        Использует обученные scaler и K-means из ClusteringSolver. Для каждого кластера
+        хранятся количество, суммы и суммы квадратов признаков, поэтому при переходе
+        поставщика пересчитываются только строки двух затронутых кластеров.
+        """
+        if solver.model is None:
+            raise ValueError("Сначала необходимо выполнить кластеризацию")
+
+        self.solver = solver
+        self.cluster_stats = cluster_stats.copy()
+
+        self.names = solver.supplier_names
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.features = solver.features.astype(np.float64)
+        self.labels = np.asarray(solver.labels).copy()
+
+        self._mean = solver.scaler.mean_
+        self._scale = solver.scaler.scale_
+        self._centers = solver.model.cluster_centers_
+
+        k = len(self._centers)
+        self._counts = np.bincount(self.labels, minlength=k).astype(np.float64)
+        self._sums = np.zeros((k, len(FEATURE_COLUMNS)))
+        self._sumsq = np.zeros((k, len(FEATURE_COLUMNS)))
+        np.add.at(self._sums, self.labels, self.features)
+        np.add.at(self._sumsq, self.labels, self.features ** 2)
+
+    def _feature_vector(self, position, delivery_rate=None, price=None, impurity=None):
+        """
+        Вектор признаков поставщика с учетом измененных значений
+        """
+        vector = self.features[position].copy()
+        if delivery_rate is not None:
+            vector[0] = delivery_rate / 100.0
+        if price is not None:
+            vector[1] = price
+        if impurity is not None:
+            # Нормировка качества остается той же, что и при обучении
+            vector[2] = 1 - impurity / self.solver.max_impurity
+
+        return vector
+
+    def _predict(self, vector):
+        """
+        Номер ближайшего центра кластера для вектора признаков
+        """
+        scaled = (vector - self._mean) / self._scale
+        return int(np.argmin(((self._centers - scaled) ** 2).sum(axis=1)))
+
+    def _stats_row(self, counts, sums, sumsq, cluster):
+        """
+        Строка статистики кластера по накопленным суммам
+        """
+        n = counts[cluster]
+        mean = sums[cluster] / n
+        if n > 1:
+            std = np.sqrt(np.maximum(sumsq[cluster] - sums[cluster] ** 2 / n, 0) / (n - 1))
+        else:
+            std = np.full(len(FEATURE_COLUMNS), np.nan)
+
+        row = {}
+        for i, column in enumerate(FEATURE_COLUMNS):
+            row[f'{column}_mean'] = round(mean[i], 2)
+            row[f'{column}_std'] = round(std[i], 2)
+        row['suppliers_count'] = int(n)
+        return row
+
+    def what_if(self, supplier_name, delivery_rate=None, price=None, impurity=None, apply=False):
+        """
+        Оценка кластера поставщика при измененных характеристиках
+
+        delivery_rate - выполнение поставок в срок (%), price - руб/т, impurity - примеси (%).
+        При apply=True изменения сохраняются в состоянии для следующих запросов.
+        """
+        if supplier_name not in self.positions:
+            raise ValueError(f"Поставщик не найден: {supplier_name}")
+
+        position = self.positions[supplier_name]
+        vector = self._feature_vector(position, delivery_rate, price, impurity)
+        old_cluster = int(self.labels[position])
+        new_cluster = self._predict(vector)
+
+        counts = self._counts.copy()
+        sums = self._sums.copy()
+        sumsq = self._sumsq.copy()
+        counts[old_cluster] -= 1
+        sums[old_cluster] -= self.features[position]
+        sumsq[old_cluster] -= self.features[position] ** 2
+        counts[new_cluster] += 1
+        sums[new_cluster] += vector
+        sumsq[new_cluster] += vector ** 2
+
+        stats = self.cluster_stats.drop(columns='cluster_type')
+        for cluster in {old_cluster, new_cluster}:
+            if counts[cluster] > 0:
+                stats.loc[cluster] = self._stats_row(counts, sums, sumsq, cluster)
+            else:
+                stats = stats.drop(index=cluster)
+
+        stats['suppliers_count'] = stats['suppliers_count'].astype(int)
+        stats['cluster_type'] = self.solver.interpret_clusters(stats)
+
+        # Относительные пороги для поставщика считаются по средним всей выборки
+        reference = dict(zip(FEATURE_COLUMNS, sums.sum(axis=0) / counts.sum()))
+        supplier_type = self.solver.interpret_suppliers(
+            pd.DataFrame([vector], columns=FEATURE_COLUMNS), reference=reference)[0]
+
+        # Тип исходного кластера - до изменения, независимо от apply
+        old_cluster_type = self.cluster_stats.loc[old_cluster, 'cluster_type']
+
+        if apply:
+            self.features[position] = vector
+            self.labels[position] = new_cluster
+            self._counts, self._sums, self._sumsq = counts, sums, sumsq
+            self.cluster_stats = stats
+
+        return {
+            'supplier_name': supplier_name,
+            'old_cluster': old_cluster,
+            'new_cluster': new_cluster,
+            'cluster_changed': old_cluster != new_cluster,
+            'old_cluster_type': old_cluster_type,
+            'new_cluster_type': stats.loc[new_cluster, 'cluster_type'],
+            'supplier_type': supplier_type,
+            'cluster_stats': stats
+        }
@@ -1,12 +1,15 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 from plotly.subplots import make_subplots
 
 
 class ResultsDisplay:
-    def __init__(self):
+    def __init__(self, point_budget=20000, density_bins=60):
+        # Максимальное количество точек, передаваемых в браузер на один график
+        self.point_budget = point_budget
+        self.density_bins = density_bins
         self.color_map = {
             0: '#1f77b4',  # синий
             1: '#ff7f0e',  # оранжевый
@@ -37,31 +40,80 @@ class ResultsDisplay:
         summary_df = pd.DataFrame(summary_data)
         st.dataframe(summary_df, width='stretch', hide_index=True)
 
+    def _cluster_groups(self, labels):
+        """
+        Индексы точек каждого кластера за одну сортировку
+        """
+        order = np.argsort(labels, kind='stable')
+        clusters, starts = np.unique(labels[order], return_index=True)
+        return dict(zip(clusters.tolist(), np.split(order, starts[1:])))
+
+    def _sample_groups(self, groups, total):
+        """
+        Пропорциональная выборка точек по кластерам в пределах point_budget
+
+        Каждый кластер сохраняет хотя бы одну точку, поэтому подсказки с названиями
+        остаются у представительной выборки всех кластеров.
+        """
+        if total <= self.point_budget:
+            return groups, False
+
+        rng = np.random.default_rng(42)
+        sampled = {}
+        for cluster, indices in groups.items():
+            size = max(1, int(self.point_budget * len(indices) / total))
+            sampled[cluster] = np.sort(rng.choice(indices, size=min(size, len(indices)), replace=False))
+        return sampled, True
+
+    def _density_trace(self, x, y):
+        """
+        Плотность всех точек, посчитанная на сервере и переданная как тепловая карта
+        """
+        counts, x_edges, y_edges = np.histogram2d(x, y, bins=self.density_bins)
+        counts[counts == 0] = np.nan
+        return go.Heatmap(
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            z=counts.T,
+            colorscale='Greys',
+            opacity=0.35,
+            showscale=False,
+            hovertemplate='Поставщиков в ячейке: %{z:.0f}<extra></extra>'
+        )
+
     def display_cluster_plot(self, result_df):
         """
         Визуализация кластеров в 3D пространстве
         """
         st.header("📈 Визуализация кластеров")
 
-        # Создаем 3D scatter plot
-        fig = px.scatter_3d(
-            result_df,
-            x='delivery_rate',
-            y='price',
-            z='quality',
-            color='cluster',
-            hover_name='Название поставщика',
-            color_continuous_scale='viridis',
-            title='Кластеризация поставщиков в 3D пространстве',
-            labels={
-                'delivery_rate': 'Надежность поставок',
-                'price': 'Стоимость (руб/т)',
-                'quality': 'Качество песка',
-                'cluster': 'Кластер'
-            }
-        )
+        labels = result_df['cluster'].to_numpy()
+        delivery = result_df['delivery_rate'].to_numpy()
+        price = result_df['price'].to_numpy()
+        quality = result_df['quality'].to_numpy()
+        names = result_df['Название поставщика'].to_numpy()
+
+        groups, decimated = self._sample_groups(self._cluster_groups(labels), len(labels))
+
+        # Scatter3d отрисовывается через WebGL; массивы NumPy передаются в бинарном виде
+        fig = go.Figure()
+        for cluster, indices in groups.items():
+            fig.add_trace(
+                go.Scatter3d(
+                    x=delivery[indices],
+                    y=price[indices],
+                    z=quality[indices],
+                    mode='markers',
+                    name=f'Кластер {cluster}',
+                    marker=dict(size=4, color=self.color_map.get(cluster, '#000000')),
+                    text=names[indices],
+                    hovertemplate='<b>%{text}</b><br>Надежность: %{x:.2f}<br>Цена: %{y:.0f} руб'
+                                  '<br>Качество: %{z:.2f}<extra></extra>'
+                )
+            )
 
         fig.update_layout(
+            title='Кластеризация поставщиков в 3D пространстве',
             scene=dict(
                 xaxis_title='Надежность поставок',
                 yaxis_title='Стоимость (руб/т)',
@@ -71,6 +123,9 @@ class ResultsDisplay:
         )
 
         st.plotly_chart(fig, width='stretch')
+        if decimated:
+            shown = sum(len(indices) for indices in groups.values())
+            st.caption(f"Показана пропорциональная выборка: {shown:,} из {len(labels):,} поставщиков")
 
     def display_pair_plot(self, result_df):
         """
@@ -78,6 +133,18 @@ class ResultsDisplay:
         """
         st.header("🔍 Детальный анализ признаков")
 
+        labels = result_df['cluster'].to_numpy()
+        columns = {
+            'delivery_rate': result_df['delivery_rate'].to_numpy(),
+            'price': result_df['price'].to_numpy(),
+            'quality': result_df['quality'].to_numpy()
+        }
+        names = result_df['Название поставщика'].to_numpy()
+
+        # Группируем точки по кластерам один раз для всех графиков
+        all_groups = self._cluster_groups(labels)
+        groups, decimated = self._sample_groups(all_groups, len(labels))
+
         # Создаем subplots
         fig = make_subplots(
             rows=2, cols=2,
@@ -89,64 +156,43 @@ class ResultsDisplay:
             )
         )
 
-        # Надежность vs Стоимость
-        for cluster in sorted(result_df['cluster'].unique()):
-            cluster_data = result_df[result_df['cluster'] == cluster]
-            fig.add_trace(
-                go.Scatter(
-                    x=cluster_data['delivery_rate'],
-                    y=cluster_data['price'],
-                    mode='markers',
-                    name=f'Кластер {cluster}',
-                    marker=dict(color=self.color_map.get(cluster, '#000000')),
-                    text=cluster_data['Название поставщика'],
-                    hovertemplate='<b>%{text}</b><br>Надежность: %{x:.2f}<br>Цена: %{y:.0f} руб<extra></extra>',
-                    showlegend=True
-                ),
-                row=1, col=1
-            )
-
-        # Надежность vs Качество
-        for cluster in sorted(result_df['cluster'].unique()):
-            cluster_data = result_df[result_df['cluster'] == cluster]
-            fig.add_trace(
-                go.Scatter(
-                    x=cluster_data['delivery_rate'],
-                    y=cluster_data['quality'],
-                    mode='markers',
-                    name=f'Кластер {cluster}',
-                    marker=dict(color=self.color_map.get(cluster, '#000000')),
-                    text=cluster_data['Название поставщика'],
-                    hovertemplate='<b>%{text}</b><br>Надежность: %{x:.2f}<br>Качество: %{y:.2f}<extra></extra>',
-                    showlegend=False
-                ),
-                row=1, col=2
-            )
-
-        # Стоимость vs Качество
-        for cluster in sorted(result_df['cluster'].unique()):
-            cluster_data = result_df[result_df['cluster'] == cluster]
-            fig.add_trace(
-                go.Scatter(
-                    x=cluster_data['price'],
-                    y=cluster_data['quality'],
-                    mode='markers',
-                    name=f'Кластер {cluster}',
-                    marker=dict(color=self.color_map.get(cluster, '#000000')),
-                    text=cluster_data['Название поставщика'],
-                    hovertemplate='<b>%{text}</b><br>Цена: %{x:.0f} руб<br>Качество: %{y:.2f}<extra></extra>',
-                    showlegend=False
-                ),
-                row=2, col=1
-            )
+        panels = [
+            ('delivery_rate', 'price', 1, 1,
+             '<b>%{text}</b><br>Надежность: %{x:.2f}<br>Цена: %{y:.0f} руб<extra></extra>'),
+            ('delivery_rate', 'quality', 1, 2,
+             '<b>%{text}</b><br>Надежность: %{x:.2f}<br>Качество: %{y:.2f}<extra></extra>'),
+            ('price', 'quality', 2, 1,
+             '<b>%{text}</b><br>Цена: %{x:.0f} руб<br>Качество: %{y:.2f}<extra></extra>'),
+        ]
 
-        # Распределение по кластерам (bar plot)
-        cluster_counts = result_df['cluster'].value_counts().sort_index()
+        for panel, (x_column, y_column, row, col, hovertemplate) in enumerate(panels):
+            # При прореживании плотность всех точек показывается подложкой
+            if decimated:
+                fig.add_trace(self._density_trace(columns[x_column], columns[y_column]), row=row, col=col)
+
+            for cluster, indices in groups.items():
+                fig.add_trace(
+                    go.Scattergl(
+                        x=columns[x_column][indices],
+                        y=columns[y_column][indices],
+                        mode='markers',
+                        name=f'Кластер {cluster}',
+                        legendgroup=f'cluster_{cluster}',
+                        marker=dict(color=self.color_map.get(cluster, '#000000')),
+                        text=names[indices],
+                        hovertemplate=hovertemplate,
+                        showlegend=panel == 0
+                    ),
+                    row=row, col=col
+                )
+
+        # Распределение по кластерам (bar plot) - по всем точкам
+        clusters = list(all_groups)
         fig.add_trace(
             go.Bar(
-                x=[f'Кластер {i}' for i in cluster_counts.index],
-                y=cluster_counts.values,
-                marker_color=[self.color_map.get(i, '#000000') for i in cluster_counts.index],
+                x=[f'Кластер {i}' for i in clusters],
+                y=[len(all_groups[i]) for i in clusters],
+                marker_color=[self.color_map.get(i, '#000000') for i in clusters],
                 showlegend=False
             ),
             row=2, col=2
@@ -154,6 +200,9 @@ class ResultsDisplay:
 
         fig.update_layout(height=800, showlegend=True)
         st.plotly_chart(fig, width='stretch')
+        if decimated:
+            shown = sum(len(indices) for indices in groups.values())
+            st.caption(f"Точки прорежены до {shown:,} из {len(labels):,}; подложка показывает плотность всех поставщиков")
 
     def display_raw_data(self, result_df, cluster_stats):
         """
@@ -174,6 +223,7 @@ class ResultsDisplay:
         display_columns = [
             'Название поставщика',
             'cluster_type',
+            'supplier_type',
             'Коэффициент выполнения поставок в срок (%)',
             'Стоимость 1 тонны песка (руб)',
             'Содержание примесей (%)'
@@ -184,6 +234,7 @@ class ResultsDisplay:
         # Переименовываем для красоты
         column_names = {
             'cluster_type': 'Тип кластера',
+            'supplier_type': 'Тип поставщика',
             'Название поставщика': 'Поставщик',
             'Коэффициент выполнения поставок в срок (%)': 'Надежность (%)',
             'Стоимость 1 тонны песка (руб)': 'Цена (руб/т)',
@@ -1,9 +1,87 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
+from autoTasks.profiling_3 import profile_phase
 
-def display_transportation_solution(solution_data):
+# Наибольший размер матрицы поставок, которая строится для сети, заданной списком маршрутов
+MAX_MATRIX_CELLS = 200_000
+# Сколько крупнейших потоков показывать на диаграмме и сколько строк на странице таблиц
+DEFAULT_TOP_K = 30
+PAGE_SIZE = 50
+OTHER_LABEL = 'Прочие поставщики'
+
+
+def aggregate_flows(flows, supply_names, demand_names, top_k=DEFAULT_TOP_K, supplier_groups=None):
+    """
+    Потоки для диаграммы: top_k крупнейших маршрутов, остальные - из корзины «прочие» по производствам
+
+    supplier_groups - необязательное сопоставление {поставщик: группа} (регион, кластер);
+    поставщики без группы остаются отдельными узлами.
+    """
+    sources = pd.Series(np.asarray(supply_names, dtype=object)[flows['rows']])
+    if supplier_groups is not None:
+        sources = sources.map(supplier_groups).fillna(sources)
+
+    table = pd.DataFrame({
+        'source': sources.to_numpy(),
+        'target': np.asarray(demand_names, dtype=object)[flows['cols']],
+        'value': flows['values']
+    })
+    table = table.groupby(['source', 'target'], sort=False, as_index=False)['value'].sum()
+    if len(table) <= top_k:
+        return table
+
+    table = table.sort_values('value', ascending=False)
+    other = table.iloc[top_k:].groupby('target', sort=False, as_index=False)['value'].sum()
+    other.insert(0, 'source', OTHER_LABEL)
+
+    return pd.concat([table.iloc[:top_k], other], ignore_index=True)
+
+
+def _style_supply_matrix(block):
+    """
+    Векторная стилизация матрицы поставок: стили считаются для всего блока сразу
+    """
+    styles = np.where(block.to_numpy() > 0, 'color: green; font-weight: bold', 'color: lightgray')
+    return pd.DataFrame(styles, index=block.index, columns=block.columns)
+
+
+def _paginate(df, key, page_size=PAGE_SIZE):
+    """
+    Серверная постраничная разбивка: в браузер передается только выбранная страница
+    """
+    pages = -(-len(df) // page_size)
+    if pages <= 1:
+        return df
+
+    page = st.number_input(f"Страница (всего {pages})", min_value=1, max_value=pages, value=1, key=key)
+    start = (page - 1) * page_size
+    st.caption(f"Строки {start + 1}-{min(start + page_size, len(df))} из {len(df)}")
+    return df.iloc[start:start + page_size]
+
+
+def display_transportation_solution(solution_data, top_k=DEFAULT_TOP_K, supplier_groups=None):
+    """
+    Отображение решения транспортной задачи
+
+    top_k - сколько крупнейших потоков показывать на диаграмме, supplier_groups -
+    необязательное объединение поставщиков на диаграмме по группам (регион, кластер).
+    Время отображения записывается в профиль решения как этап 'display'.
+    """
+    profile = solution_data.get('profile')
+    if profile is not None:
+        # Каждая отрисовка заменяет предыдущий замер, а не складывается с ним
+        profile['phases'].pop('display', None)
+    with profile_phase(profile, 'display'):
+        _render_transportation_solution(solution_data, top_k, supplier_groups)
+
+
+def _render_transportation_solution(solution_data, top_k, supplier_groups):
+    """
+    Отрисовка решения (см. display_transportation_solution)
+    """
     # Извлекаем данные из словаря
     results = solution_data['results']
     supply_names = solution_data['supply_names']
@@ -11,7 +89,6 @@ def display_transportation_solution(solution_data):
     supply = solution_data['supply']
     demand = solution_data['demand']
     total_cost = solution_data['total_cost']
-    original_costs = solution_data['original_costs']
     status = solution_data['status']
 
     st.title("Решение транспортной задачи")
@@ -19,6 +96,8 @@ def display_transportation_solution(solution_data):
     # Статус решения
     if status == 'Optimal':
         st.success("✅ Задача решена оптимально!")
+    elif status == 'Heuristic':
+        st.info("⚡ Предварительный план (метод аппроксимации Фогеля)")
     else:
         st.warning(f"Статус решения: {status}")
 
@@ -33,95 +112,78 @@ def display_transportation_solution(solution_data):
 
     st.markdown("---")
 
-    #Матрица поставок
+    #Матрица поставок (стили и вывод - только для текущей страницы)
     st.subheader("📋 Матрица оптимальных поставок")
 
-    # Создаем DataFrame для матрицы поставок
-    df_supply = pd.DataFrame(results, index=supply_names, columns=demand_names)
-
-    # Функция для стилизации
-    def style_supply_table(val):
-        if val == 0:
-            return 'color: lightgray'
-        elif isinstance(val, (int, float)) and val > 0:
-            return 'color: green; font-weight: bold'
-        return ''
-
-    # Отображаем стилизованную таблицу
-    styled_df = df_supply.style.map(style_supply_table).format({
-        **{name: "{:.1f}" for name in demand_names}
-    })
+    flows = solution_data['flows']
+    if results is None and len(supply_names) * len(demand_names) > MAX_MATRIX_CELLS:
+        st.info("Сеть задана списком маршрутов и слишком велика для матрицы - см. детализацию поставок")
+    else:
+        # Создаем DataFrame для матрицы поставок
+        matrix = np.zeros((len(supply_names), len(demand_names)))
+        matrix[flows['rows'], flows['cols']] = flows['values']
+        df_supply = pd.DataFrame(matrix, index=supply_names, columns=demand_names)
 
-    st.dataframe(styled_df, width='stretch')
+        page = _paginate(df_supply, key="plan_matrix_page")
+        st.dataframe(page.style.apply(_style_supply_matrix, axis=None).format("{:.1f}"), width='stretch')
 
-    #Диаграмма потоков (Sankey)
+    #Диаграмма потоков (Sankey) - крупнейшие маршруты и корзина «прочие»
     st.subheader("🔗 Визуализация потоков поставок")
 
-    if len(results) > 0 and len(results[0]) > 0:
-        source = []
-        target = []
-        value = []
-        label = supply_names + demand_names
-
-        for i, supplier in enumerate(supply_names):
-            for j, consumer in enumerate(demand_names):
-                if results[i][j] > 0:
-                    source.append(i)
-                    target.append(len(supply_names) + j)
-                    value.append(results[i][j])
-
-        if source:  # Проверяем, есть ли данные для отображения
-            fig_sankey = go.Figure(data=[go.Sankey(
-                node=dict(
-                    label=label
-                ),
-                link=dict(
-                    source=source,
-                    target=target,
-                    value=value,
-                    color="rgba(184,184,208, 0.9)"
-                ),
-                textfont=dict(
-                    color="rgba(10,10,26, 1)",
-                    size=14
-                )
-            )])
-
-            fig_sankey.update_layout(
-                title_text="Потоки поставок между поставщиками и производствами",
-                font_size=10,
-                height=400
+    if len(flows['values']):
+        links = aggregate_flows(flows, supply_names, demand_names, top_k=top_k, supplier_groups=supplier_groups)
+        source_codes, source_labels = pd.factorize(links['source'])
+        target_codes, target_labels = pd.factorize(links['target'])
+
+        fig_sankey = go.Figure(data=[go.Sankey(
+            node=dict(
+                label=list(source_labels) + list(target_labels)
+            ),
+            link=dict(
+                source=source_codes,
+                target=len(source_labels) + target_codes,
+                value=links['value'],
+                color="rgba(184,184,208, 0.9)"
+            ),
+            textfont=dict(
+                color="rgba(10,10,26, 1)",
+                size=14
             )
-            st.plotly_chart(fig_sankey, width=True)
-        else:
-            st.info("Нет данных для построения диаграммы потоков")
+        )])
 
-    #Детализация поставок
+        fig_sankey.update_layout(
+            title_text="Потоки поставок между поставщиками и производствами",
+            font_size=10,
+            height=400
+        )
+        st.plotly_chart(fig_sankey, width='stretch')
+        if len(links) < len(flows['values']):
+            st.caption(f"Показаны {top_k} крупнейших потоков из {len(flows['values'])}, "
+                       f"остальные объединены в «{OTHER_LABEL}»")
+    else:
+        st.info("Нет данных для построения диаграммы потоков")
+
+    #Детализация поставок (без фиктивного поставщика/производства)
     st.subheader("🔍 Детализация поставок")
 
-    deliveries = []
-    for i, supplier in enumerate(supply_names):
-        for j, consumer in enumerate(demand_names):
-            if results[i][j] > 0:
-                # Используем оригинальные затраты (без фиктивных)
-                cost_per_ton = original_costs[i][j] if i < len(original_costs) and j < len(original_costs[i]) else 0
-                if (cost_per_ton != 0):
-                    deliveries.append({
-                        'От поставщика': supplier,
-                        'К потребителю': consumer,
-                        'Объем, т.': results[i][j],
-                        'Стоимость за тонну, руб.': cost_per_ton,
-                        'Общая стоимость, руб.': results[i][j] * cost_per_ton
-                    })
-
-    if deliveries:
-        df_deliveries = pd.DataFrame(deliveries)
+    real_suppliers = len(supply_names) - int(solution_data['total_supply'] < solution_data['total_demand'])
+    real_plants = len(demand_names) - int(solution_data['total_supply'] > solution_data['total_demand'])
+    real = (flows['rows'] < real_suppliers) & (flows['cols'] < real_plants)
+
+    if real.any():
+        df_deliveries = pd.DataFrame({
+            'От поставщика': np.asarray(supply_names, dtype=object)[flows['rows'][real]],
+            'К потребителю': np.asarray(demand_names, dtype=object)[flows['cols'][real]],
+            'Объем, т.': flows['values'][real],
+            'Стоимость за тонну, руб.': flows['costs'][real],
+            'Общая стоимость, руб.': flows['values'][real] * flows['costs'][real]
+        })
 
         # Сортируем по стоимости
         df_deliveries = df_deliveries.sort_values('Общая стоимость, руб.', ascending=False)
 
         st.dataframe(
-            df_deliveries.style.format({
+            _paginate(df_deliveries, key="plan_deliveries_page").style.format({
                 'Объем, т.': '{:.1f}',
                 'Стоимость за тонну, руб.': '{:.0f}',
                 'Общая стоимость, руб.': '{:,.0f}'
@@ -129,4 +191,189 @@ def display_transportation_solution(solution_data):
             width='stretch'
         )
     else:
-        st.info("Нет активных поставок для отображения")
\ No newline at end of file
+        st.info("Нет активных поставок для отображения")
+
+
+def display_progressive_solution(heuristic_data, exact_future, top_k=DEFAULT_TOP_K, supplier_groups=None):
+    """
+    Прогрессивный режим: план Фогеля сразу, точное решение - по готовности фоновой задачи
+
+    heuristic_data может быть None (предварительного плана нет) - тогда до готовности
+    показывается только ожидание. top_k и supplier_groups - как в display_transportation_solution.
+    """
+    if not exact_future.done():
+        _wait_for_exact_solution(exact_future)
+        if heuristic_data is not None:
+            display_transportation_solution(heuristic_data, top_k, supplier_groups)
+        return
+
+    if exact_future.exception() is not None:
+        st.error(f"Ошибка точного решения: {exact_future.exception()}")
+        if heuristic_data is not None:
+            display_transportation_solution(heuristic_data, top_k, supplier_groups)
+        return
+
+    solution_data = exact_future.result()
+    heuristic_cost = heuristic_data['total_cost'] if heuristic_data is not None else None
+    exact_cost = solution_data['total_cost']
+    if solution_data['status'] == 'Optimal' and heuristic_cost:
+        gap = heuristic_cost - exact_cost
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("План Фогеля", f"{heuristic_cost:,.0f} р.")
+        with col2:
+            st.metric("Оптимальный план", f"{exact_cost:,.0f} р.",
+                      delta=f"{-gap:,.0f} р.", delta_color="inverse")
+        with col3:
+            st.metric("Закрытый разрыв", f"{gap / heuristic_cost:.2%}")
+
+    display_transportation_solution(solution_data, top_k, supplier_groups)
+
+
+@st.fragment(run_every=1)
+def _wait_for_exact_solution(exact_future):
+    """
+    Опрос фоновой задачи без блокировки страницы; по готовности - перезапуск страницы
+    """
+    if exact_future.done():
+        st.rerun()
+    st.info("⏳ Точное решение вычисляется...")
+
+
+def display_what_if(what_if):
+    """
+    Панель «что если»: изменение мощности поставщика и стоимости маршрута
+    """
+    col1, col2 = st.columns(2)
+    with col1:
+        supplier = st.selectbox("Поставщик", what_if.supply_names, key="what_if_supplier")
+        capacity_change = st.slider("Изменение мощности, %", min_value=-100, max_value=100, value=0, step=5,
+                                    key="what_if_capacity")
+    with col2:
+        plant = st.selectbox("Производство", what_if.demand_names, key="what_if_plant")
+        cost_change = st.slider("Изменение стоимости маршрута, %", min_value=-50, max_value=100, value=0, step=5,
+                                key="what_if_cost")
+
+    i = what_if.supply_names.index(supplier)
+    j = what_if.demand_names.index(plant)
+    result = what_if.evaluate(
+        supply={supplier: what_if.base_supply[i] * (1 + capacity_change / 100)},
+        costs={(supplier, plant): what_if.base_costs[i, j] * (1 + cost_change / 100)}
+    )
+
+    if result['status'] != 'Optimal':
+        st.warning(f"Статус решения: {result['status']}")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Общая стоимость", f"{result['total_cost']:,.0f} р.",
+                  delta=f"{result['cost_change']:,.0f} р.", delta_color="inverse")
+    with col2:
+        st.metric("Итераций пересчета", result['iterations'])
+
+    if len(result['changed_flows']):
+        st.dataframe(
+            result['changed_flows'].style.format({'Было, т.': '{:.1f}', 'Стало, т.': '{:.1f}'}),
+            width='stretch', hide_index=True
+        )
+    else:
+        st.info("План поставок не изменился")
+
+
+def truckload_progress():
+    """
+    Заполнитель для улучшающихся планов CBC; возвращает обратный вызов on_incumbent
+    для solve_truckload_problem (вызывается в потоке страницы)
+    """
+    placeholder = st.empty()
+
+    def on_incumbent(seconds, cost):
+        placeholder.metric("Лучший найденный план", f"{cost:,.0f} р.", help=f"Найден через {seconds:.1f} с")
+
+    return on_incumbent
+
+
+def display_truckload_solution(solution_data):
+    """
+    Отображение плана поставок целыми рейсами
+    """
+    status = solution_data['status']
+    if status == 'Optimal':
+        st.success("✅ Целочисленный план найден (в пределах допустимого разрыва)")
+    elif status == 'Feasible':
+        st.warning("⏱ Время решения истекло: показан лучший найденный план")
+    else:
+        st.error(f"Допустимый план не найден. Статус решения: {status}")
+        return
+
+    flows = solution_data['flows']
+    trucks = solution_data['trucks'][flows['rows'], flows['cols']]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Общая стоимость", f"{solution_data['total_cost']:,.0f} р.")
+    with col2:
+        st.metric("Рейсов", f"{int(trucks.sum()):,}")
+    with col3:
+        gap = solution_data['mip_gap']
+        st.metric("Разрыв с нижней границей", f"{gap:.2%}" if gap is not None else "—")
+
+    if solution_data['relaxation_cost'] is not None:
+        st.caption(f"Непрерывная задача: {solution_data['relaxation_cost']:,.0f} р., "
+                   f"решение за {solution_data['solve_time']:.1f} с")
+
+    df_deliveries = pd.DataFrame({
+        'От поставщика': np.asarray(solution_data['supply_names'], dtype=object)[flows['rows']],
+        'К потребителю': np.asarray(solution_data['demand_names'], dtype=object)[flows['cols']],
+        'Объем, т.': flows['values'],
+        'Рейсов': trucks,
+        'Перевозка, руб.': flows['values'] * flows['costs']
+    }).sort_values('Перевозка, руб.', ascending=False)
+
+    st.dataframe(
+        _paginate(df_deliveries, key="truckload_page").style.format({
+            'Объем, т.': '{:.1f}',
+            'Перевозка, руб.': '{:,.0f}'
+        }),
+        width='stretch', hide_index=True
+    )
+
+
+def display_pareto_frontier(frontier):
+    """
+    Фронт Парето «стоимость - риск» и план выбранной точки
+    """
+    points = frontier['points']
+    fig = go.Figure(go.Scatter(x=points['Риск'], y=points['Стоимость, руб.'], mode='lines+markers'))
+    fig.update_layout(xaxis_title="Риск плана", yaxis_title="Стоимость, руб.", height=350,
+                      title_text="Фронт Парето: стоимость и надежность")
+    st.plotly_chart(fig, width='stretch')
+
+    if frontier.get('n_failed'):
+        st.warning(f"Не решено точек фронта: {frontier['n_failed']} - часть вершин могла быть пропущена")
+
+    if len(points) > 1:
+        index = st.slider("Точка фронта (0 - самый дешевый план)", min_value=0, max_value=len(points) - 1, value=0,
+                          key="pareto_point")
+    else:
+        # Самый дешевый план одновременно и самый надежный - выбирать не из чего
+        st.info("Стоимость и риск не противоречат друг другу: фронт состоит из одного плана")
+        index = 0
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Стоимость", f"{points['Стоимость, руб.'].iloc[index]:,.0f} р.",
+                  delta=f"{points['Стоимость, руб.'].iloc[index] - frontier['cheapest_cost']:,.0f} р.",
+                  delta_color="inverse")
+    with col2:
+        st.metric("Риск", f"{points['Риск'].iloc[index]:,.2f}")
+
+    plan = frontier['plans'][index]
+    rows, cols = np.nonzero(plan > 1e-9)
+    df_plan = pd.DataFrame({
+        'От поставщика': np.asarray(frontier['supply_names'], dtype=object)[rows],
+        'К потребителю': np.asarray(frontier['demand_names'], dtype=object)[cols],
+        'Объем, т.': plan[rows, cols]
+    })
+    st.dataframe(_paginate(df_plan, key="pareto_page").style.format({'Объем, т.': '{:.1f}'}),
+                 width='stretch', hide_index=True)
@@ -3,8 +3,13 @@ import os
 import pandas as pd
 import streamlit as st
 
-from autoTasks.Task3 import solve_transportation_problem
-from displays.plan_3 import display_transportation_solution
+from autoTasks.Task3 import (TransportationWhatIf, is_route_list, parse_route_list_dataframe,
+                             parse_transportation_dataframe, solve_transportation_problem,
+                             solve_transportation_problem_async)
+from autoTasks.pareto_3 import solve_pareto_frontier
+from autoTasks.truckload_3 import solve_truckload_problem
+from displays.plan_3 import (display_pareto_frontier, display_progressive_solution, display_truckload_solution,
+                             display_what_if, truckload_progress)
 from utils.styles import load_css
 
 favicon_path = os.path.join('assets', 'logo.ico')
@@ -41,6 +46,9 @@ if uploaded_file:
         uploaded_file.seek(0)
         df = pd.read_csv(uploaded_file, sep=';', encoding='utf-8-sig')
 
+        # Данные заданы матрицей затрат или списком маршрутов (Тип, Поставщик, Производство, Значение)
+        route_list = is_route_list(df)
+
         # Проверяем структуру данных
         required_columns = [
             'Тип',
@@ -49,35 +57,15 @@ if uploaded_file:
         ]
 
         missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
+        if missing_columns and not route_list:
             st.error(f"Отсутствуют обязательные колонки: {missing_columns}")
         else:
-            # Кол-во производств
-            sprows_count = len(df[df['Тип'] == 'Спрос'])
-            required_sprows = len(df.columns) - 3
-
-            # Кол-во поставщиков
-            cost_count = len(df[df['Тип'] == 'Стоимость'])
-            power_count = len(df[df['Тип'] == 'Мощность'])
-
-            # Контроль названия
-            suppliers_cost = set(df[df['Тип'] == 'Стоимость']['Поставщик/Производство'])
-            suppliers_power = set(df[df['Тип'] == 'Мощность']['Поставщик/Производство'])
-            productions = set(df[df['Тип'] == 'Спрос']['Поставщик/Производство'])
-            production_columns = set(df.columns[2:-1])
-
-            if sprows_count != required_sprows:
-                st.error(
-                    f"Количество строк с типом \"Спрос\" равное: {sprows_count}, а количество столбцов производств равно: {required_sprows}.\nПо структуре CSV файла их должно быть равное количество.")
-            elif cost_count != power_count:
-                st.error(
-                    f"Количество строк c типом \"Стоимость\" равное: {cost_count}, а количество строк c типом \"Мощность\" равно: {power_count}.\nПо структуре CSV файла их должно быть равное количество.")
-            elif suppliers_cost != suppliers_power:
-                st.error(
-                    f"Поставщики: {suppliers_cost - suppliers_power} есть в 'Стоимости', но нет в 'Мощности'.\nА поставщики: {suppliers_power - suppliers_cost} есть в 'Мощности', но нет в 'Стоимости'")
-            elif production_columns != productions:
-                st.error(
-                    f"Производства/о:  {production_columns - productions} есть в столбцах, но нет в спросе.\nА производства/о: {productions - production_columns} есть в спросе, но нет в столбцах")
+            # Разбор и проверка согласованности данных за один проход
+            parsed = parse_route_list_dataframe(df) if route_list else parse_transportation_dataframe(df)
+
+            if parsed['errors']:
+                for error in parsed['errors']:
+                    st.error(error)
             else:
                 st.success("Данные успешно загружены!")
 
@@ -91,12 +79,84 @@ if uploaded_file:
                 with col2:
                     button_clicked = st.button("Решить", width='stretch', key="run_forecast")
 
-                if button_clicked:
-                    with st.spinner("Решаем транспортную задачу...", width='stretch'):
-                        solution_data = solve_transportation_problem(dataframe=df)
-
-                    # Отображение результатов
-                    display_transportation_solution(solution_data)
+                if button_clicked and route_list:
+                    # Список маршрутов решается только по заданным маршрутам (HiGHS) в фоне
+                    st.session_state['plan_heuristic'] = None
+                    st.session_state['plan_exact'] = solve_transportation_problem_async(df, backend='highs')
+                    st.session_state['plan_file_id'] = uploaded_file.file_id
+                elif button_clicked:
+                    # План Фогеля показывается сразу, точное решение считается в фоне
+                    st.session_state['plan_heuristic'] = solve_transportation_problem(dataframe=df, backend='vogel')
+                    st.session_state['plan_exact'] = solve_transportation_problem_async(df)
+                    st.session_state['plan_file_id'] = uploaded_file.file_id
+
+                # Отображение результатов (сохраняются между перезапусками страницы)
+                if st.session_state.get('plan_file_id') == uploaded_file.file_id:
+                    with st.expander("⚙️ Настройки отображения"):
+                        top_k = st.slider("Крупнейших потоков на диаграмме", min_value=5, max_value=200,
+                                          value=30, step=5)
+                        groups_file = st.file_uploader("Группы поставщиков (CSV: Поставщик;Группа)", type="csv")
+                        supplier_groups = None
+                        if groups_file:
+                            groups = pd.read_csv(groups_file, sep=';', encoding='utf-8-sig')
+                            supplier_groups = dict(zip(groups.iloc[:, 0].astype(str).str.strip(),
+                                                       groups.iloc[:, 1].astype(str).str.strip()))
+
+                    display_progressive_solution(st.session_state['plan_heuristic'], st.session_state['plan_exact'],
+                                                 top_k=top_k, supplier_groups=supplier_groups)
+
+                # Анализ «что если»: решатель строится по кнопке и сохраняется между перезапусками страницы
+                if not route_list:
+                    with st.expander("🔁 Анализ «что если»"):
+                        if st.session_state.get('what_if_file_id') != uploaded_file.file_id:
+                            if st.button("Подготовить анализ", key="run_what_if"):
+                                st.session_state['what_if'] = TransportationWhatIf(df)
+                                st.session_state['what_if_file_id'] = uploaded_file.file_id
+
+                        if st.session_state.get('what_if_file_id') == uploaded_file.file_id:
+                            display_what_if(st.session_state['what_if'])
+
+                    # Целочисленный план: рейсы, фиксированные затраты маршрутов и минимальные партии
+                    with st.expander("🚚 План целыми рейсами"):
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            truck_capacity = st.number_input("Вместимость машины, т.", min_value=1.0, value=20.0)
+                            trip_cost = st.number_input("Стоимость рейса, р.", min_value=0.0, value=0.0, step=100.0)
+                            fixed_cost = st.number_input("Открытие маршрута, р.", min_value=0.0, value=0.0,
+                                                         step=1000.0)
+                        with col2:
+                            min_lot = st.number_input("Минимальная партия, т.", min_value=0.0, value=0.0)
+                            time_limit = st.number_input("Ограничение времени, с", min_value=1, value=60)
+                            gap_rel = st.number_input("Допустимый разрыв, %", min_value=0.0, value=1.0) / 100
+
+                        if st.button("Рассчитать рейсы", key="run_truckload"):
+                            st.session_state['truckload'] = solve_truckload_problem(
+                                df, truck_capacity, trip_cost, fixed_cost, min_lot,
+                                time_limit=time_limit, gap_rel=gap_rel, on_incumbent=truckload_progress()
+                            )
+                            st.session_state['truckload_file_id'] = uploaded_file.file_id
+
+                        if st.session_state.get('truckload_file_id') == uploaded_file.file_id:
+                            display_truckload_solution(st.session_state['truckload'])
+
+                    # Компромисс стоимости и надежности: риск задержки (Task1) или доля примесей (Task2)
+                    with st.expander("⚖️ Стоимость и надежность"):
+                        risk_file = st.file_uploader("Риск поставщиков (CSV: Поставщик;Риск на тонну)", type="csv")
+                        n_points = st.slider("Точек перебора весов", min_value=5, max_value=101, value=21, step=4)
+                        if risk_file and st.button("Построить фронт", key="run_pareto"):
+                            risk = pd.read_csv(risk_file, sep=';', encoding='utf-8-sig')
+                            supplier_risk = dict(zip(risk.iloc[:, 0].astype(str).str.strip(),
+                                                     pd.to_numeric(risk.iloc[:, 1], errors='coerce')))
+                            try:
+                                st.session_state['pareto'] = solve_pareto_frontier(df, supplier_risk,
+                                                                                   n_points=n_points, refine_rounds=3)
+                                st.session_state['pareto_file_id'] = uploaded_file.file_id
+                            except ValueError as e:
+                                st.session_state.pop('pareto_file_id', None)
+                                st.error(f"Ошибка в файле риска: {e}")
+
+                        if st.session_state.get('pareto_file_id') == uploaded_file.file_id:
+                            display_pareto_frontier(st.session_state['pareto'])
 
     except Exception as e:
         st.error(f"Ошибка загрузки файла: {str(e)}")
@@ -0,0 +1,19 @@
+import numpy as np
+
+from autoTasks.consensus_2 import ConsensusClustering
+
+
+def test_bounded_pool_gives_same_result():
+    rng = np.random.default_rng(0)
+    data = np.vstack([rng.normal(center, 0.5, (40, 2)) for center in (0, 3, 6)])
+    reference = np.repeat(np.arange(3), 40)
+
+    results = [
+        ConsensusClustering(n_resamples=30, chunk_size=3, n_jobs=n_jobs, max_pending=max_pending,
+                            store_labels=True).fit(data, reference, 3)
+        for n_jobs, max_pending in ((1, 1), (2, None))
+    ]
+
+    np.testing.assert_allclose(results[0].stability, results[1].stability)
+    np.testing.assert_array_equal(results[0].resample_labels, results[1].resample_labels)
+    assert results[0].resample_labels.shape == (30, 120)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoTasks.decomposition_3 import solve_decomposed_problem
+from autoTasks.Task3 import (PLANT_COLUMN, SUPPLIER_COLUMN, TYPE_COLUMN, VALUE_COLUMN,
+                             solve_transportation_problem)
+
+
+def _route_list(seed, m, n, supply_ratio, density=0.3):
+    """
+    Случайная разреженная сеть: у каждого производства не меньше трех маршрутов
+    """
+    rng = np.random.default_rng(seed)
+    routes = rng.random((m, n)) < density
+    for j in range(n):
+        routes[rng.choice(m, 3, replace=False), j] = True
+    demand = rng.integers(10, 50, n).astype(float)
+    supply = rng.random(m) + 0.5
+    supply = np.round(supply / supply.sum() * demand.sum() * supply_ratio)
+
+    rows, cols = np.nonzero(routes)
+    records = [('Маршрут', f's{i}', f'p{j}', float(rng.integers(10, 500))) for i, j in zip(rows, cols)]
+    records += [('Мощность', f's{i}', None, value) for i, value in enumerate(supply)]
+    records += [('Спрос', None, f'p{j}', value) for j, value in enumerate(demand)]
+    return pd.DataFrame(records, columns=[TYPE_COLUMN, SUPPLIER_COLUMN, PLANT_COLUMN, VALUE_COLUMN])
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('supply_ratio', [1.5, 0.7])
+def test_matches_monolithic_highs(seed, supply_ratio):
+    dataframe = _route_list(seed, m=40, n=30, supply_ratio=supply_ratio)
+
+    monolithic = solve_transportation_problem(dataframe, backend='highs')
+    decomposed = solve_decomposed_problem(dataframe, n_regions=4, n_jobs=1)
+
+    assert monolithic['status'] == decomposed['status'] == 'Optimal'
+    assert decomposed['total_cost'] == pytest.approx(monolithic['total_cost'], rel=1e-6)
+
+
+def test_zero_iterations_is_not_solved():
+    decomposed = solve_decomposed_problem(_route_list(0, m=10, n=8, supply_ratio=1.5), n_regions=2, n_jobs=1,
+                                          max_iter=0)
+
+    assert decomposed['status'] == 'Not Solved'
+    assert decomposed['total_cost'] is None
@@ -0,0 +1,25 @@
+import numpy as np
+
+from autoTasks.drift_2 import ClusterDriftMonitor
+
+
+def _snapshot(features, scale):
+    return {
+        'scaler_mean': np.zeros(3),
+        'scaler_scale': np.full(3, scale),
+        'centroids': features.mean(axis=0, keepdims=True),
+        'labels': np.zeros(len(features), dtype=np.int64),
+        'names': np.array(['A', 'B']),
+        'features': features.astype(np.float32),
+        'track_ids': np.array([0])
+    }
+
+
+def test_supplier_movement_is_euclidean_in_previous_scale():
+    previous = _snapshot(np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]]), scale=2.0)
+    current = _snapshot(np.array([[6.0, 8.0, 0.0], [1.0, 1.0, 1.0]]), scale=1.0)
+
+    movement = ClusterDriftMonitor().compare(previous, current)['supplier_movement'].set_index('supplier_name')
+
+    assert np.isclose(movement.loc['A', 'distance'], 5.0)
+    assert np.isclose(movement.loc['B', 'distance'], 0.0)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from autoTasks.features_2 import FEATURE_COLUMNS, SupplierFeatureBuilder
+
+
+def _features(builder):
+    names, matrix = builder.build()
+    return pd.DataFrame(matrix, index=names, columns=FEATURE_COLUMNS)
+
+
+def test_records_without_supplier_do_not_change_other_suppliers():
+    lab = pd.DataFrame({'Поставщик': ['A', 'B', 'B'], 'Содержание примесей (%)': [1.0, 2.0, 4.0]})
+    prices = pd.DataFrame({'Поставщик': ['A', 'B'], 'Цена (руб/т)': [900.0, 1000.0]})
+    deliveries = pd.DataFrame({'Поставщик': ['A', 'B'], 'Плановая_дата': ['01.01.2024', '01.01.2024'],
+                               'Фактическая_дата': ['01.01.2024', '03.01.2024']})
+
+    clean = SupplierFeatureBuilder()
+    clean.add_deliveries(deliveries)
+    clean.add_prices(prices)
+    clean.add_lab(lab)
+
+    dirty = SupplierFeatureBuilder()
+    dirty.add_deliveries(pd.concat([deliveries, pd.DataFrame({
+        'Поставщик': [None], 'Плановая_дата': ['01.01.2024'], 'Фактическая_дата': ['09.01.2024']})]))
+    dirty.add_prices(pd.concat([prices, pd.DataFrame({'Поставщик': [np.nan], 'Цена (руб/т)': [5000.0]})]))
+    dirty.add_lab(pd.concat([lab, pd.DataFrame({'Поставщик': [np.nan, ' '], 'Содержание примесей (%)': [50.0, 60.0]})]))
+
+    pd.testing.assert_frame_equal(_features(dirty), _features(clean))
+    assert dirty.skipped_records == 4
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoTasks.multicommodity_3 import CAPACITY_TYPE, parse_multicommodity_dataframe
+
+COLUMNS = ['Тип', 'Поставщик/Производство', 'Завод', 'Мощность/Потребность', 'Материал']
+
+
+def _dataframe(capacity_rows):
+    rows = [
+        ['Стоимость', 'Карьер', 10, None, 'Песок'],
+        ['Мощность', 'Карьер', None, 50, 'Песок'],
+        ['Спрос', 'Завод', None, 40, 'Песок'],
+        ['Стоимость', 'Карьер', 20, None, 'Щебень'],
+        ['Мощность', 'Карьер', None, 50, 'Щебень'],
+        ['Спрос', 'Завод', None, 30, 'Щебень'],
+    ]
+    rows += [[CAPACITY_TYPE, name, value, None, None] for name, value in capacity_rows]
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+@pytest.mark.parametrize('value, expected', [(60, 60.0), ('60', 60.0), (None, np.inf), ('  ', np.inf)])
+def test_capacity_values(value, expected):
+    parsed = parse_multicommodity_dataframe(_dataframe([('Карьер', value)]))
+
+    assert parsed['errors'] == []
+    assert parsed['arc_capacity'][0, 0] == expected
+
+
+@pytest.mark.parametrize('name, value, message', [
+    ('Карьер', 'abc', "строка 8 (Карьер), столбец 'Завод': 'abc'"),
+    ('Карьер', -5, "столбец 'Завод': '-5"),
+    ('Карьр', 60, "8 (Карьр)"),
+])
+def test_invalid_capacity_is_reported(name, value, message):
+    parsed = parse_multicommodity_dataframe(_dataframe([(name, value)]))
+
+    assert len(parsed['errors']) == 1
+    assert message in parsed['errors'][0]
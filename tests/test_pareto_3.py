@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoTasks.pareto_3 import ParetoFrontierSolver, solve_pareto_frontier
+from autoTasks.Task3 import parse_transportation_dataframe
+
+SAMPLE = 'csvFiles/Task3Csv.csv'
+
+
+def test_long_weight_chain_keeps_every_point():
+    rng = np.random.default_rng(3)
+    costs = rng.integers(1, 100, (40, 30)).astype(float)
+    supply = rng.integers(50, 100, 40).astype(float)
+    demand = rng.integers(50, 100, 30).astype(float)
+
+    frontier = ParetoFrontierSolver(costs, supply, demand, rng.uniform(0, 1, 40), n_jobs=1).solve(n_points=101)
+
+    assert frontier['n_failed'] == 0
+    assert frontier['points']['Стоимость, руб.'].is_monotonic_increasing
+    assert frontier['points']['Риск'].is_monotonic_decreasing
+
+
+@pytest.mark.parametrize('bad_value', ['abc', None, -1.0])
+def test_invalid_risk_is_rejected(bad_value):
+    dataframe = pd.read_csv(SAMPLE, sep=';', encoding='utf-8-sig')
+    names = parse_transportation_dataframe(dataframe)['supply_names']
+    risk = {name: 0.1 for name in names}
+    risk[names[0]] = bad_value
+
+    with pytest.raises(ValueError, match=names[0]):
+        solve_pareto_frontier(dataframe, risk, n_jobs=1)
@@ -0,0 +1,40 @@
+import threading
+import tracemalloc
+
+from autoTasks.profiling_3 import clear_profile_log, finish_profile, new_profile, profile_phase
+
+
+def test_tracing_survives_the_phase_that_started_it():
+    first_started, second_started = threading.Event(), threading.Event()
+    first = new_profile('simplex', trace_memory=True)
+    second = new_profile('simplex', trace_memory=True)
+
+    def run_first():
+        with profile_phase(first, 'solve'):
+            first_started.set()
+            second_started.wait()
+
+    thread = threading.Thread(target=run_first)
+    thread.start()
+    first_started.wait()
+    with profile_phase(second, 'solve'):
+        second_started.set()
+        thread.join()
+        assert tracemalloc.is_tracing()
+        buffer = bytearray(4 * 2 ** 20)
+        del buffer
+
+    assert not tracemalloc.is_tracing()
+    assert second['phases']['solve']['peak_mb'] > 3.9
+
+
+def test_total_includes_display_after_finish():
+    profile = new_profile('pulp')
+    with profile_phase(profile, 'solve'):
+        pass
+    finish_profile(profile)
+    with profile_phase(profile, 'display'):
+        pass
+    clear_profile_log()
+
+    assert profile['total_seconds'] == sum(phase['seconds'] for phase in profile['phases'].values())
@@ -0,0 +1,18 @@
+import numpy as np
+
+from autoTasks.scenarios_3 import ScenarioBatchSolver, perturbed_scenarios
+
+
+def test_long_simplex_chunk_solves_every_scenario():
+    rng = np.random.default_rng(1)
+    costs = rng.integers(1, 100, (40, 30)).astype(float)
+    supply = rng.integers(50, 100, 40).astype(float)
+    demand = rng.integers(50, 100, 30).astype(float)
+
+    summary = ScenarioBatchSolver('simplex', n_jobs=1, chunk_size=300).solve(
+        perturbed_scenarios(costs, supply, demand, n_scenarios=300))
+
+    assert summary['n_solved'] == 300
+    assert summary['n_failed'] == 0
+    assert not len(summary['failed_scenarios'])
+    assert summary['status_counts'] == {'Optimal': 300}
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoTasks.similarity_2 import SupplierSimilarityIndex
+from autoTasks.Task2 import ClusteringSolver
+
+SAMPLE = 'csvFiles/Task2Csv.csv'
+
+
+def test_index_without_solver_raises_clear_error():
+    index = SupplierSimilarityIndex(np.zeros((3, 3)), ['A', 'B', 'C'], [0, 0, 1])
+
+    with pytest.raises(ValueError, match='solver'):
+        index.closest_to_profile(95, 900, 1.0)
+    with pytest.raises(ValueError, match='solver'):
+        index.add_from_dataframe(pd.DataFrame())
+
+
+def test_constructor_solver_is_used():
+    df = pd.read_csv(SAMPLE, sep=';', encoding='utf-8-sig')
+    solver = ClusteringSolver()
+    solver.perform_clustering(df)
+
+    index = SupplierSimilarityIndex(solver.scaled_features(), solver.supplier_names, solver.labels, solver=solver)
+    closest = index.closest_to_profile(95, 900, 1.0, k=3)
+
+    assert len(closest) == 3
@@ -0,0 +1,31 @@
+import numpy as np
+from scipy.optimize import linprog
+
+from autoTasks.simplex_3 import TransportationSimplex
+
+
+def _highs_cost(costs, supply, demand):
+    m, n = costs.shape
+    a_ub = np.zeros((m, m * n))
+    for i in range(m):
+        a_ub[i, i * n:(i + 1) * n] = 1
+    a_eq = np.zeros((n, m * n))
+    for j in range(n):
+        a_eq[j, j::n] = 1
+    return linprog(costs.ravel(), A_ub=a_ub, b_ub=supply, A_eq=a_eq, b_eq=demand, method='highs').fun
+
+
+def test_repeated_resolves_count_iterations_per_call():
+    rng = np.random.default_rng(0)
+    costs = rng.integers(1, 100, (40, 30)).astype(float)
+    supply = rng.integers(50, 100, 40).astype(float)
+    demand = rng.integers(50, 100, 30).astype(float)
+    solver = TransportationSimplex(costs, supply, demand).solve()
+
+    for _ in range(200):
+        new_costs = costs * rng.uniform(0.5, 1.5, costs.shape)
+        new_supply = supply * rng.uniform(0.9, 1.1, 40)
+        report = solver.resolve(new_costs, new_supply, demand)
+        assert report['status'] == 'Optimal'
+        assert report['iterations'] == solver.iterations <= solver.max_iter
+        assert np.isclose(report['total_cost'], _highs_cost(new_costs, new_supply, demand))
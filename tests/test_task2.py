@@ -0,0 +1,30 @@
+import pandas as pd
+
+from autoTasks.Task2 import ClusteringSolver
+
+SAMPLE = 'csvFiles/Task2Csv.csv'
+
+
+def test_cluster_stats_match_float64_groupby():
+    df = pd.read_csv(SAMPLE, sep=';', encoding='utf-8-sig')
+    result, stats, _ = ClusteringSolver().perform_clustering(df)
+
+    source = pd.DataFrame({
+        'delivery_rate': df['Коэффициент выполнения поставок в срок (%)'] / 100.0,
+        'price': df['Стоимость 1 тонны песка (руб)'],
+        'quality': 1 - df['Содержание примесей (%)'] / df['Содержание примесей (%)'].max(),
+        'cluster': result['cluster']
+    })
+    expected = source.groupby('cluster').agg(['mean', 'std']).round(2)
+    expected.columns = [f'{feature}_{stat}' for feature, stat in expected.columns]
+
+    pd.testing.assert_frame_equal(stats[expected.columns], expected, check_names=False, check_index_type=False)
+
+
+def test_hierarchical_k_is_clamped_for_three_suppliers():
+    df = pd.read_csv(SAMPLE, sep=';', encoding='utf-8-sig').head(3)
+
+    result, stats, _ = ClusteringSolver().perform_clustering(df, k_method='hierarchical')
+
+    assert len(stats) == 2
+    assert result['cluster'].nunique() == 2
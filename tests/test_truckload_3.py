@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoTasks.truckload_3 import _warm_start, build_truckload_model, solve_truckload_problem
+
+SAMPLE = 'csvFiles/Task3Csv.csv'
+
+
+def test_solve_does_not_touch_process_environment():
+    dataframe = pd.read_csv(SAMPLE, sep=';', encoding='utf-8-sig')
+    environment = dict(os.environ)
+    seen = []
+
+    solution = solve_truckload_problem(dataframe, truck_capacity=20, trip_cost=500, fixed_cost=1000,
+                                       on_incumbent=lambda *_: seen.append(dict(os.environ)))
+
+    assert solution['status'] in ('Optimal', 'Feasible')
+    assert seen and all(snapshot == environment for snapshot in seen)
+    assert dict(os.environ) == environment
+
+
+def _random_instance(seed, m, n, supply_ratio):
+    rng = np.random.default_rng(seed)
+    costs = rng.integers(10, 500, (m, n)).astype(float)
+    demand = rng.integers(30, 100, n).astype(float)
+    supply = rng.random(m) + 0.5
+    supply = np.round(supply / supply.sum() * demand.sum() * supply_ratio)
+    return costs, supply, demand
+
+
+def _assert_plan_respects_trucks_and_lots(flows, trucks, truck_capacity, min_lot):
+    opened = flows > 1e-6
+    assert (flows <= truck_capacity * trucks + 1e-6).all()
+    assert (flows[opened] >= min_lot - 1e-6).all()
+
+
+def test_returned_plan_respects_trucks_and_min_lot():
+    dataframe = pd.read_csv(SAMPLE, sep=';', encoding='utf-8-sig')
+
+    solution = solve_truckload_problem(dataframe, truck_capacity=20, trip_cost=500, fixed_cost=1000, min_lot=15)
+
+    assert solution['status'] in ('Optimal', 'Feasible')
+    _assert_plan_respects_trucks_and_lots(np.array(solution['results']), solution['trucks'], 20, 15)
+
+
+@pytest.mark.parametrize('supply_ratio', [1.3, 0.8])
+def test_warm_start_plan_respects_trucks_and_min_lot(supply_ratio):
+    costs, supply, demand = _random_instance(0, 15, 8, supply_ratio)
+    _, x, trucks, opened = build_truckload_model(costs, supply, demand, 20, 800, 3000, 15)
+
+    _, started_warm = _warm_start(costs, supply, demand, 20, 800, 3000, 15, x, trucks, opened)
+
+    assert started_warm
+    flows = np.array([[x[i, j].varValue for j in range(len(demand))] for i in range(len(supply))])
+    truck_counts = np.array([[trucks[i, j].varValue for j in range(len(demand))] for i in range(len(supply))])
+    _assert_plan_respects_trucks_and_lots(flows, truck_counts, 20, 15)
+    shipped = min(supply.sum(), demand.sum())
+    assert flows.sum() == pytest.approx(shipped)
+    assert (flows.sum(axis=1) <= supply + 1e-6).all() and (flows.sum(axis=0) <= demand + 1e-6).all()
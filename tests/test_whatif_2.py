@@ -0,0 +1,22 @@
+import pandas as pd
+
+from autoTasks.Task2 import ClusteringSolver
+from autoTasks.whatif_2 import ClusterWhatIf
+
+SAMPLE = 'csvFiles/Task2Csv.csv'
+
+
+def test_old_cluster_type_does_not_depend_on_apply():
+    df = pd.read_csv(SAMPLE, sep=';', encoding='utf-8-sig')
+    solver = ClusteringSolver()
+    result, stats, _ = solver.perform_clustering(df)
+    # Единственный поставщик своего кластера переходит в другой - исходный кластер пустеет
+    single = stats.index[stats['suppliers_count'] == 1][0]
+    supplier = result.loc[result['cluster'] == single, 'Название поставщика'].iloc[0]
+    change = {'delivery_rate': 96, 'price': 980, 'impurity': 0.9}
+
+    preview = ClusterWhatIf(solver, stats).what_if(supplier, **change)
+    applied = ClusterWhatIf(solver, stats).what_if(supplier, apply=True, **change)
+
+    assert preview['cluster_changed']
+    assert applied['old_cluster_type'] == preview['old_cluster_type'] == stats.loc[preview['old_cluster'], 'cluster_type']